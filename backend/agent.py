@@ -1,81 +1,269 @@
 import asyncio
+import concurrent.futures
 import inspect
 import json
 import logging
-from typing import Any, Callable, Dict, Optional
-from pathlib import Path
+import os
+import threading
+import time
+import weakref
+from functools import lru_cache
+from typing import AbstractSet, Any, Callable, Dict, List, Optional
 
 import aiohttp
-import pdfplumber
-from docx import Document
-from langchain.schema import HumanMessage, SystemMessage
-from langchain.agents import Tool, initialize_agent, AgentType
-from langchain_openai import ChatOpenAI
-from sqlalchemy.orm import Session
-from database.db import get_db, engine, Base
-from database.models import Chat, Message
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.db import AsyncSessionLocal
+from blob_store import Attachment, chat_attachments
+from database.crud import get_or_create_chat, set_chat_title_if_missing
+from database.models import Message
+from dedup import item_hash
+from documents import UPLOAD_DIR, aload_attachment_text
+from extraction import POLISH_SECTIONS, batched_extraction_enabled, extract_resume, merge_extraction
+from intent_router import intent_router
+from llm import DEFAULT_MODEL
+from llm_cache import estimate_cost, llm_cache
 from prompt import SYSTEM_PROMPT
-
-Base.metadata.create_all(bind=engine)
+from prompt_budget import fit_document
+from render_cache import render_cache
+from session_state import EXTRACTED_BLOBS_KEY, EXTRACTED_ITEMS_KEY, RESUME_SECTIONS, session_state
+from singleflight import SingleFlight
+from tools.registry import TOOL_PROMPTS, TOOL_REGISTRY
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 DEFAULT_SESSION = "default_session"
-session_store: Dict[str, Dict[str, Any]] = {}
+RESUME_TOOLS = RESUME_SECTIONS
+MCP_HOST = os.getenv("MCP_HOST", "http://localhost:8000/mcp/tools")
+# "local" dispatches through TOOL_REGISTRY in-process; "remote" posts to MCP_HOST for scale-out.
+TOOL_TRANSPORT = os.getenv("TOOL_TRANSPORT", "local")
 
-RESUME_TOOLS = ["personal_info", "summary", "experience", "education", "skills", "projects", "achievements"]
-MCP_HOST = "http://localhost:8000/mcp/tools"
+ASSEMBLY_CONCURRENCY = int(os.getenv("ASSEMBLY_CONCURRENCY", "16"))
+SESSION_ASSEMBLY_CONCURRENCY = int(os.getenv("SESSION_ASSEMBLY_CONCURRENCY", "8"))
+TOOL_CALL_TIMEOUT = float(os.getenv("TOOL_CALL_TIMEOUT", "60"))
 
+# Created on first use in each event loop; an asyncio primitive belongs to the loop it is used in.
+_assembly_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+_assembly_lock = threading.Lock()
+_session_semaphores: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = weakref.WeakValueDictionary()
 
-async def call_mcp_tool(tool_name: str, input_data: str, session_id: str) -> str:
+MCP_CONNECTION_LIMIT = int(os.getenv("MCP_CONNECTION_LIMIT", "100"))
+MCP_DNS_CACHE_TTL = int(os.getenv("MCP_DNS_CACHE_TTL", "300"))
+MCP_KEEPALIVE_TIMEOUT = float(os.getenv("MCP_KEEPALIVE_TIMEOUT", "30"))
+
+_http_session: Optional[aiohttp.ClientSession] = None
+_http_session_loop: Optional[asyncio.AbstractEventLoop] = None
+http_stats = {"requests": 0, "connections_created": 0, "connections_reused": 0}
+# Trace hooks fire on the app loop, the tool bridge loop and private per-call sessions.
+_http_stats_lock = threading.Lock()
+
+tool_flight = SingleFlight("tools")
+
+BRIDGE_MAX_PENDING = int(os.getenv("BRIDGE_MAX_PENDING", "64"))
+# Seconds a sync caller may wait for a free slot; 0 rejects immediately when the bridge is saturated.
+BRIDGE_QUEUE_TIMEOUT = float(os.getenv("BRIDGE_QUEUE_TIMEOUT", "0"))
+
+_bridge_loop: Optional[asyncio.AbstractEventLoop] = None
+_bridge_lock = threading.Lock()
+_bridge_slots = threading.BoundedSemaphore(BRIDGE_MAX_PENDING)
+
+
+def _count_http(stat: str) -> None:
+    with _http_stats_lock:
+        http_stats[stat] += 1
+
+
+async def _on_request_start(session, ctx, params):
+    _count_http("requests")
+
+
+async def _on_connection_create_end(session, ctx, params):
+    _count_http("connections_created")
+
+
+async def _on_connection_reuseconn(session, ctx, params):
+    _count_http("connections_reused")
+
+
+def _new_http_session() -> aiohttp.ClientSession:
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_create_end.append(_on_connection_create_end)
+    trace_config.on_connection_reuseconn.append(_on_connection_reuseconn)
+    connector = aiohttp.TCPConnector(
+        limit=MCP_CONNECTION_LIMIT,
+        ttl_dns_cache=MCP_DNS_CACHE_TTL,
+        keepalive_timeout=MCP_KEEPALIVE_TIMEOUT,
+    )
+    return aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+
+
+async def open_http_session() -> aiohttp.ClientSession:
+    global _http_session, _http_session_loop
+    if _http_session is None or _http_session.closed:
+        _http_session = _new_http_session()
+        _http_session_loop = asyncio.get_running_loop()
+    return _http_session
+
+
+async def close_http_session() -> None:
+    global _http_session, _http_session_loop
+    if _http_session is not None:
+        await _http_session.close()
+    _http_session = None
+    _http_session_loop = None
+
+
+def _tool_result(tool_name: str, session_id: str, res: Dict[str, Any]) -> str:
+    if "result" in res:
+        logger.info(f"[MCP RESPONSE] {tool_name} | Session: {session_id} | Output: {str(res['result'])[:100]}...")
+        return res["result"]
+    logger.error(f"[MCP ERROR] {tool_name} | Session: {session_id} | Error: {res.get('error')}")
+    return f"[tool_error] {res.get('error', 'Unknown error')}"
+
+
+async def _call_local_tool(tool_name: str, input_data: str, session_id: str) -> str:
+    tool = TOOL_REGISTRY.get(tool_name)
+    if tool is None:
+        return _tool_result(tool_name, session_id, {"error": f"Unknown tool: {tool_name}"})
+    return _tool_result(tool_name, session_id, await tool(input_data, session_id))
+
+
+async def _call_remote_tool(tool_name: str, input_data: str, session_id: str) -> str:
     url = f"{MCP_HOST}/{tool_name}"
     payload = {"query": input_data, "session_id": session_id}
+    # The shared session is opened by the app lifespan and bound to its loop; other callers get a private one.
+    own_session = _http_session is None or _http_session.closed or _http_session_loop is not asyncio.get_running_loop()
+    session = _new_http_session() if own_session else _http_session
+    try:
+        async with session.post(url, json=payload) as resp:
+            return _tool_result(tool_name, session_id, await resp.json())
+    finally:
+        if own_session:
+            await session.close()
+
+
+async def call_mcp_tool(tool_name: str, input_data: str, session_id: str) -> str:
     logger.info(f"[MCP CALL] {tool_name} | Session: {session_id} | Input: {input_data[:100]}...")
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=payload) as resp:
-                res = await resp.json()
-                if "result" in res:
-                    logger.info(
-                        f"[MCP RESPONSE] {tool_name} | Session: {session_id} | Output: {str(res['result'])[:100]}...")
-                    return res["result"]
-                else:
-                    logger.error(f"[MCP ERROR] {tool_name} | Session: {session_id} | Error: {res.get('error')}")
-                    return f"[tool_error] {res.get('error', 'Unknown error')}"
+        if TOOL_TRANSPORT == "remote":
+            return await _call_remote_tool(tool_name, input_data, session_id)
+        return await _call_local_tool(tool_name, input_data, session_id)
     except Exception as e:
         logger.exception(f"[MCP EXCEPTION] {tool_name} | Session: {session_id} | Error: {e}")
         return f"[tool_error] {str(e)}"
 
 
+async def render_section(tool_name: str, section_input: str, session_id: str) -> str:
+    key = render_cache.key_for(tool_name, section_input, TOOL_PROMPTS.get(tool_name, ""), DEFAULT_MODEL)
+    cached = await render_cache.lookup(key)
+    if cached is not None:
+        logger.info(f"[RENDER CACHE HIT] {tool_name} | Session: {session_id}")
+        return cached
+    # Double submits and racing section updates render the same key at once; only one call goes out.
+    result = await tool_flight.do(key, lambda: call_mcp_tool(tool_name, section_input, session_id))
+    if not result.startswith("[tool_error]"):
+        await render_cache.store(key, result)
+    return result
+
+
+def _assembly_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    with _assembly_lock:
+        sem = _assembly_semaphores.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(ASSEMBLY_CONCURRENCY)
+            _assembly_semaphores[loop] = sem
+    return sem
+
+
+def _session_semaphore(session_id: str) -> asyncio.Semaphore:
+    sem = _session_semaphores.get(session_id)
+    if sem is None:
+        sem = asyncio.Semaphore(SESSION_ASSEMBLY_CONCURRENCY)
+        _session_semaphores[session_id] = sem
+    return sem
+
+
+async def _render_bounded(tool_name: str, section_input: str, session_id: str, session_sem: asyncio.Semaphore) -> str:
+    async with session_sem, _assembly_semaphore():
+        try:
+            return await asyncio.wait_for(render_section(tool_name, section_input, session_id), TOOL_CALL_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error(f"[MCP TIMEOUT] {tool_name} | Session: {session_id} | After {TOOL_CALL_TIMEOUT}s")
+            return f"[tool_error] {tool_name} timed out"
+
+
+async def _verbatim(section_input: str) -> str:
+    return section_input
+
+
+async def assemble_resume(session_data: Dict[str, Any], session_id: str, polish: Optional[AbstractSet[str]] = None) -> str:
+    """
+    Renders every filled section through its tool. When polish is given, items that batched
+    extraction copied from the document are used verbatim unless their section is in polish.
+    """
+    calls = []
+    for tool_name in RESUME_TOOLS:
+        section_input = session_data.get(tool_name)
+        if not section_input:
+            continue
+        if isinstance(section_input, list):
+            calls.extend((tool_name, item) for item in section_input)
+        else:
+            calls.append((tool_name, section_input))
+
+    extracted = set(session_data.get(EXTRACTED_ITEMS_KEY, ())) if polish is not None else set()
+    session_sem = _session_semaphore(session_id)
+    rendered = await asyncio.gather(*(
+        _verbatim(item) if item_hash(item) in extracted and tool_name not in polish
+        else _render_bounded(tool_name, item, session_id, session_sem)
+        for tool_name, item in calls
+    ))
+    return "\n\n".join(rendered).strip()
+
+
 async def _tool_async(tool_name: str, query: str, session_id: str):
     return await call_mcp_tool(tool_name, query, session_id)
 
 
+def _get_bridge_loop() -> asyncio.AbstractEventLoop:
+    global _bridge_loop
+    with _bridge_lock:
+        if _bridge_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="tool-bridge-loop", daemon=True).start()
+            _bridge_loop = loop
+    return _bridge_loop
+
+
 def bridge_for(tool_name: str) -> Callable[[Any, Optional[str]], Any]:
     def sync_or_awaitable(input_data, session_id: Optional[str] = None):
         sid = session_id or DEFAULT_SESSION
-        coro = _tool_async(tool_name, input_data, sid)
         try:
             loop = asyncio.get_running_loop()
         except RuntimeError:
             loop = None
         if loop and loop.is_running():
-            return asyncio.create_task(coro)
-
-        import concurrent.futures
+            return asyncio.create_task(_tool_async(tool_name, input_data, sid))
 
-        def _run_in_new_loop(c):
-            new_loop = asyncio.new_event_loop()
+        # Sync callers share one long-lived background loop (with its own LLM client, see
+        # llm.get_async_client); the slot semaphore applies backpressure.
+        if BRIDGE_QUEUE_TIMEOUT > 0:
+            acquired = _bridge_slots.acquire(timeout=BRIDGE_QUEUE_TIMEOUT)
+        else:
+            acquired = _bridge_slots.acquire(blocking=False)
+        if not acquired:
+            raise RuntimeError(f"Tool bridge saturated: {BRIDGE_MAX_PENDING} calls already pending")
+        try:
+            fut = asyncio.run_coroutine_threadsafe(_tool_async(tool_name, input_data, sid), _get_bridge_loop())
             try:
-                asyncio.set_event_loop(new_loop)
-                return new_loop.run_until_complete(c)
-            finally:
-                new_loop.close()
-
-        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as ex:
-            fut = ex.submit(_run_in_new_loop, coro)
-            return fut.result()
+                return fut.result(timeout=TOOL_CALL_TIMEOUT)
+            except concurrent.futures.TimeoutError:
+                fut.cancel()
+                return f"[tool_error] {tool_name} timed out"
+        finally:
+            _bridge_slots.release()
 
     return sync_or_awaitable
 
@@ -88,33 +276,71 @@ skills_bridge = bridge_for("skills")
 projects_bridge = bridge_for("projects")
 achievements_bridge = bridge_for("achievements")
 
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-tools = [
-    Tool(name="personal_info", func=personal_info_bridge, description="Extract personal info from text"),
-    Tool(name="summary", func=summary_bridge, description="Generate a professional summary"),
-    Tool(name="experience", func=experience_bridge, description="Extract work experience"),
-    Tool(name="education", func=education_bridge, description="Extract education details"),
-    Tool(name="skills", func=skills_bridge, description="Extract skills from text"),
-    Tool(name="projects", func=projects_bridge, description="Extract project details"),
-    Tool(name="achievements", func=achievements_bridge, description="Extract achievements"),
-]
-RESUME_AGENT = initialize_agent(tools, llm, agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION, verbose=True)
+@lru_cache(maxsize=None)
+def get_llm():
+    """
+    Decision/fallback chat model, built on first use so importing this module stays cheap.
+    """
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(model="gpt-4o-mini", temperature=0)
+
+
+@lru_cache(maxsize=None)
+def get_resume_agent():
+    """
+    LangChain ReAct agent over the sync tool bridges. Nothing on the request path builds it;
+    Runner dispatches the tools itself.
+    """
+    from langchain.agents import Tool, initialize_agent, AgentType
+    tools = [
+        Tool(name="personal_info", func=personal_info_bridge, description="Extract personal info from text"),
+        Tool(name="summary", func=summary_bridge, description="Generate a professional summary"),
+        Tool(name="experience", func=experience_bridge, description="Extract work experience"),
+        Tool(name="education", func=education_bridge, description="Extract education details"),
+        Tool(name="skills", func=skills_bridge, description="Extract skills from text"),
+        Tool(name="projects", func=projects_bridge, description="Extract project details"),
+        Tool(name="achievements", func=achievements_bridge, description="Extract achievements"),
+    ]
+    return initialize_agent(tools, get_llm(), agent=AgentType.ZERO_SHOT_REACT_DESCRIPTION, verbose=True)
+
+
+async def _generate_with_system_prompt(llm_model, user_content: str, semantic_scope: Optional[str] = None) -> str:
+    """
+    Runs SYSTEM_PROMPT + user_content through the LangChain model, consulting llm_cache for deterministic models.
+    Near-duplicate prompts are only matched within semantic_scope, and only when one is given.
+    """
+    from langchain.schema import HumanMessage, SystemMessage
+    model = getattr(llm_model, "model_name", "unknown")
+    temperature = getattr(llm_model, "temperature", None)
+    cache_messages = [{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user_content}]
+    use_cache = temperature is not None and llm_cache.cacheable(temperature)
+    if use_cache:
+        cached = await llm_cache.lookup(cache_messages, model, temperature, semantic_scope)
+        if cached is not None:
+            return cached
+
+    messages = [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=user_content)]
+    response = await llm_model.agenerate([messages])
+    text = response.generations[0][0].text
+    if use_cache:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        cost = estimate_cost(model, usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0))
+        await llm_cache.store(cache_messages, model, temperature, text, cost, semantic_scope)
+    return text
 
 
 async def fallback_handler(query: str, session_id: str, llm_model) -> str:
     query_clean = query.strip()
     if not query_clean:
         return "Please type something related to your resume."
-    messages = [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=query_clean)]
-    response = await llm_model.agenerate([messages])
-    return response.generations[0][0].text
+    # Free-text answers may quote the user's resume, so near-duplicates are only reused within the session.
+    return await _generate_with_system_prompt(llm_model, query_clean, semantic_scope=session_id)
 
 
 async def decide_action_with_llm(user_message: str, session_id: str, llm_model) -> Dict[str, Any]:
-    messages = [SystemMessage(content=SYSTEM_PROMPT), HumanMessage(content=user_message)]
     try:
-        response = await llm_model.agenerate([messages])
-        raw = response.generations[0][0].text.strip()
+        # No semantic tier: decisions echo the user's text into tool_input/content.
+        raw = (await _generate_with_system_prompt(llm_model, user_message)).strip()
         try:
             parsed = json.loads(raw)
             if isinstance(parsed, dict) and 'action' in parsed:
@@ -153,51 +379,89 @@ def determine_tool_from_query(query: str) -> Optional[str]:
     return None
 
 
+async def _extract_attachment_once(session_id: str, attachment: Attachment, file_text: str) -> None:
+    """
+    Batched mode: one structured call covers every section instead of sending the file through each
+    tool. It runs on the first turn that sees an attachment; later turns reuse the merged sections.
+    """
+    key = attachment.sha256 or attachment.filename
+    session_data, _ = await session_state.load(session_id)
+    if key in session_data.get(EXTRACTED_BLOBS_KEY, ()):
+        return
+    resume = await extract_resume(file_text, session_id)
+    if resume is None:
+        return
+
+    def apply(data: Dict[str, Any]) -> None:
+        extracted = data.setdefault(EXTRACTED_BLOBS_KEY, [])
+        if key not in extracted:
+            merge_extraction(data, resume)
+            extracted.append(key)
+
+    await session_state.update(session_id, apply)
+
+
 class Runner:
     @staticmethod
-    async def run(agent, query: str, context: Optional[Dict] = None, db: Optional[Session] = None):
+    async def run(query: str, context: Optional[Dict] = None, db: Optional[AsyncSession] = None):
         if db is None:
-            db_gen = get_db()
-            db = next(db_gen)
+            async with AsyncSessionLocal() as db:
+                return await Runner.run(query, context, db=db)
         session_id = context.get("session_id", DEFAULT_SESSION) if context else DEFAULT_SESSION
-        if session_id not in session_store:
-            session_store[session_id] = {
-                tool: [] if tool in ["experience", "education", "skills", "projects", "achievements"] else None
-                for tool in RESUME_TOOLS
-            }
-        session_data = session_store[session_id]
-
-        chat = db.query(Chat).filter(Chat.session_id == session_id).first()
-        if not chat:
-            chat = Chat(session_id=session_id)
-            db.add(chat)
-            db.commit()
-            db.refresh(chat)
-
-        user_msg = Message(chat_id=chat.id, role="user", content=query)
-        db.add(user_msg)
-        db.commit()
-
-        uploaded_files = [msg.content.replace("[Attachment]", "").strip()
-                          for msg in chat.messages if msg.content.startswith("[Attachment]")]
+
+        # Short transaction 1: the user's message is committed (and visible to other requests)
+        # before any model work starts, and the connection goes back to the pool.
+        chat = await get_or_create_chat(db, session_id)
+        chat_id = chat.id
+        db.add(Message(chat_id=chat_id, role="user", content=query))
+        set_chat_title_if_missing(chat, query)
+        # Only a single attachment is ever used, so fetching two is enough to tell.
+        attachments = await chat_attachments(db, chat_id, limit=2)
+        await db.commit()
+
+        # No transaction or connection is held while the LLM and tools run.
+        final_output = await Runner._respond(query, session_id, attachments)
+
+        # Short transaction 2: the reply.
+        db.add(Message(chat_id=chat_id, role="assistant", content=final_output))
+        await db.commit()
+        return {"final_output": final_output}
+
+    @staticmethod
+    async def _respond(query: str, session_id: str, attachments: List[Attachment]) -> str:
         file_text = ""
-        if len(uploaded_files) == 1:
-            filename = uploaded_files[0]
-            file_path = Path("uploads") / filename
+        parsed = False
+        if len(attachments) == 1:
+            attachment = attachments[0]
+            file_path = UPLOAD_DIR / attachment.filename
             if file_path.exists():
-                if file_path.suffix.lower() == ".pdf":
-                    with pdfplumber.open(file_path) as pdf:
-                        file_text = "\n".join([p.extract_text() or "" for p in pdf.pages])
-                elif file_path.suffix.lower() == ".docx":
-                    doc = Document(file_path)
-                    file_text = "\n".join([p.text for p in doc.paragraphs])
-                else:
-                    file_text = f"[Cannot parse this file type: {file_path.suffix}]"
-            query_with_file = f"{query}\n\n[File Content from {filename}]:\n{file_text}"
+                try:
+                    file_text = await aload_attachment_text(file_path, attachment.sha256)
+                    parsed = True
+                except Exception as e:
+                    logger.error(
+                        f"[EXTRACT] Could not parse {attachment.display_name} | Session: {session_id} | Error: {e!r}")
+                    file_text = f"[Could not parse {attachment.display_name}]"
+
+        polish = None
+        if batched_extraction_enabled():
+            polish = POLISH_SECTIONS
+            if parsed and file_text:
+                # Extraction works from the whole document; only the decision prompt is budgeted.
+                await _extract_attachment_once(session_id, attachment, file_text)
+
+        if len(attachments) == 1:
+            if parsed:
+                file_text = await fit_document(query, file_text, session_id)
+            query_with_file = f"{query}\n\n[File Content from {attachment.display_name}]:\n{file_text}"
         else:
             query_with_file = query
 
-        decision = await decide_action_with_llm(query_with_file, session_id, llm)
+        decision = intent_router.classify(query, has_attachment=len(attachments) == 1)
+        if decision is None:
+            started = time.perf_counter()
+            decision = await decide_action_with_llm(query_with_file, session_id, get_llm())
+            intent_router.record_llm_decision(query, decision, time.perf_counter() - started)
         action = decision.get("action")
         if not action:
             selected_tool = determine_tool_from_query(query)
@@ -206,34 +470,20 @@ class Runner:
                 action = "use_tool"
             else:
                 action = "fallback"
-                decision = {"action": "fallback", "response": await fallback_handler(query_with_file, session_id, llm)}
+                decision = {
+                    "action": "fallback",
+                    "response": await fallback_handler(query_with_file, session_id, get_llm()),
+                }
 
         if action == "update_section":
             section = decision.get("section")
             content = decision.get("content", "")
-            if section in session_data:
-                if section in ["experience", "education", "skills", "projects", "achievements"]:
-                    session_data[section].append(content)
-                else:
-                    session_data[section] = content
+            if section in RESUME_TOOLS:
+                session_data = await session_state.apply_section(session_id, section, content)
                 logger.info(
                     f"[UPDATE_SECTION] Session: {session_id} | Section: {section} | Content: {content[:100]}...")
 
-                final_resume = ""
-                for tool_name in RESUME_TOOLS:
-                    section_input = session_data.get(tool_name)
-                    if not section_input or (isinstance(section_input, list) and len(section_input) == 0):
-                        continue
-                    if isinstance(section_input, list):
-                        for item in section_input:
-                            final_resume += await call_mcp_tool(tool_name, item, session_id) + "\n\n"
-                    else:
-                        final_resume += await call_mcp_tool(tool_name, section_input, session_id) + "\n\n"
-
-                assistant_msg = Message(chat_id=chat.id, role="assistant", content=final_resume.strip())
-                db.add(assistant_msg)
-                db.commit()
-                return {"final_output": final_resume.strip()}
+                return await assemble_resume(session_data, session_id, polish=polish)
 
         if action == "use_tool":
             tool_name = decision.get("tool")
@@ -241,41 +491,15 @@ class Runner:
             if tool_name not in RESUME_TOOLS:
                 tool_name = determine_tool_from_query(query)
             if not tool_name:
-                resp = await fallback_handler(query_with_file, session_id, llm)
-                assistant_msg = Message(chat_id=chat.id, role="assistant", content=resp)
-                db.add(assistant_msg)
-                db.commit()
-                return {"final_output": resp}
-
-            if tool_name in ["experience", "education", "skills", "projects", "achievements"]:
-                session_data[tool_name].append(tool_input)
-            else:
-                session_data[tool_name] = tool_input
-
-            final_resume = ""
-            for section_name in RESUME_TOOLS:
-                section_input = session_data.get(section_name)
-                if not section_input or (isinstance(section_input, list) and len(section_input) == 0):
-                    continue
-                if isinstance(section_input, list):
-                    for item in section_input:
-                        final_resume += await call_mcp_tool(section_name, item, session_id) + "\n\n"
-                else:
-                    final_resume += await call_mcp_tool(section_name, section_input, session_id) + "\n\n"
-
-            assistant_msg = Message(chat_id=chat.id, role="assistant", content=final_resume.strip())
-            db.add(assistant_msg)
-            db.commit()
-            return {"final_output": final_resume.strip()}
-
-        resp = await fallback_handler(query_with_file, session_id, llm)
-        assistant_msg = Message(chat_id=chat.id, role="assistant", content=resp)
-        db.add(assistant_msg)
-        db.commit()
-        return {"final_output": resp}
-
-
-async def run_resume_agent(query: str, session_id: Optional[str] = None, db: Optional[Session] = None) -> Any:
+                return await fallback_handler(query_with_file, session_id, get_llm())
+
+            session_data = await session_state.apply_section(session_id, tool_name, tool_input)
+            return await assemble_resume(session_data, session_id, polish=polish)
+
+        return await fallback_handler(query_with_file, session_id, get_llm())
+
+
+async def run_resume_agent(query: str, session_id: Optional[str] = None, db: Optional[AsyncSession] = None) -> Any:
     ctx = {"session_id": session_id or DEFAULT_SESSION}
-    r = await Runner.run(RESUME_AGENT, query, ctx, db=db)
+    r = await Runner.run(query, ctx, db=db)
     return r.get("final_output")
@@ -0,0 +1,133 @@
+import logging
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database.models import Blob, Message
+from documents import UPLOAD_DIR, TEXT_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+ATTACHMENT_PREFIX = "[Attachment]"
+# Untracked files younger than this may still be in the middle of an upload.
+ORPHAN_GRACE_SECONDS = 3600
+
+
+class Attachment(NamedTuple):
+    filename: str  # stored file under UPLOAD_DIR
+    display_name: str  # what the user uploaded
+    sha256: Optional[str]  # None for uploads stored before blobs existed
+
+
+def blob_filename(digest: str, suffix: str) -> str:
+    return f"{digest}{suffix.lower()}"
+
+
+def attachment_name(content: str) -> str:
+    return content.replace(ATTACHMENT_PREFIX, "").strip()
+
+
+def attachment_content(display_name: str) -> str:
+    return f"{ATTACHMENT_PREFIX} {display_name}"
+
+
+async def add_blob_ref(db: AsyncSession, digest: str, suffix: str, size: int) -> str:
+    """
+    Records one more reference to a content-addressed blob and returns its stored filename.
+    The caller owns the transaction.
+    """
+    filename = blob_filename(digest, suffix)
+    increment = update(Blob).where(Blob.sha256 == digest).values(ref_count=Blob.ref_count + 1)
+    if (await db.execute(increment)).rowcount:
+        return filename
+    try:
+        async with db.begin_nested():
+            await db.execute(insert(Blob).values(sha256=digest, filename=filename, size=size, ref_count=1))
+    except IntegrityError:
+        # A concurrent upload of the same content created the row first.
+        await db.execute(increment)
+    return filename
+
+
+async def release_blob_refs(db: AsyncSession, names: Iterable[str]) -> None:
+    for filename, count in Counter(names).items():
+        await db.execute(
+            update(Blob).where(Blob.filename == filename).values(ref_count=Blob.ref_count - count)
+        )
+
+
+def _attachments_query(chat_id: Optional[int] = None):
+    stmt = (
+        select(Message.content, Blob.filename, Blob.sha256)
+        .outerjoin(Blob, Blob.sha256 == Message.blob_sha256)
+        .where(Message.content.startswith(ATTACHMENT_PREFIX))
+    )
+    return stmt if chat_id is None else stmt.where(Message.chat_id == chat_id)
+
+
+def _attachment(content: str, filename: Optional[str], sha256: Optional[str]) -> Attachment:
+    display_name = attachment_name(content)
+    return Attachment(filename or display_name, display_name, sha256)
+
+
+async def chat_attachments(db: AsyncSession, chat_id: int, limit: Optional[int] = None) -> List[Attachment]:
+    """
+    Looks up a chat's attachments directly instead of scanning its message history.
+    """
+    stmt = _attachments_query(chat_id).order_by(Message.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return [_attachment(*row) for row in await db.execute(stmt)]
+
+
+async def chat_attachment_names(db: AsyncSession, chat_id: int, limit: Optional[int] = None) -> List[str]:
+    return [attachment.filename for attachment in await chat_attachments(db, chat_id, limit)]
+
+
+async def release_chat_blobs(db: AsyncSession, chat_id: int) -> None:
+    await release_blob_refs(db, await chat_attachment_names(db, chat_id))
+
+
+def collect_garbage(db: Session, dry_run: bool = False) -> Dict[str, int]:
+    """
+    Deletes unreferenced blobs and untracked upload files, returning what was reclaimed.
+    """
+    stats = {"blobs_removed": 0, "orphans_removed": 0, "bytes_reclaimed": 0}
+
+    dead = db.query(Blob).filter(Blob.ref_count <= 0).with_for_update(skip_locked=True).all()
+    for blob in dead:
+        path = UPLOAD_DIR / blob.filename
+        stats["bytes_reclaimed"] += path.stat().st_size if path.exists() else 0
+        stats["blobs_removed"] += 1
+        if not dry_run:
+            path.unlink(missing_ok=True)
+            for text_path in TEXT_CACHE_DIR.glob(f"{blob.sha256}.*"):
+                text_path.unlink(missing_ok=True)
+            db.delete(blob)
+
+    tracked = {filename for (filename,) in db.query(Blob.filename).all()}
+    tracked.update(_attachment(*row).filename for row in db.execute(_attachments_query()))
+    cutoff = time.time() - ORPHAN_GRACE_SECONDS
+    if UPLOAD_DIR.exists():
+        for path in UPLOAD_DIR.iterdir():
+            if not path.is_file() or path.name in tracked:
+                continue
+            stat = path.stat()
+            if stat.st_mtime > cutoff:
+                continue
+            stats["bytes_reclaimed"] += stat.st_size
+            stats["orphans_removed"] += 1
+            if not dry_run:
+                path.unlink(missing_ok=True)
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+    logger.info(f"[BLOB GC] {stats} | dry_run: {dry_run}")
+    return stats
@@ -0,0 +1,146 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database.models import Chat, Message
+
+DEFAULT_CHAT_TITLE = "New Chat"
+
+
+def title_from_text(text: str, max_words: int = 7) -> str:
+    words = text.split()
+    title = " ".join(words[:max_words])
+    return title + "..." if len(words) > max_words else title
+
+
+def generate_chat_title(messages: list[Message], max_words: int = 7) -> str:
+    title_candidates = []
+
+    # Look at the first 5 messages
+    for msg in messages[:5]:
+        if msg.role == "user" and msg.content.strip():
+            title_candidates.append(msg.content.strip())
+
+    if not title_candidates:
+        return DEFAULT_CHAT_TITLE
+
+    return title_from_text(" ".join(title_candidates), max_words)
+
+
+def set_chat_title_if_missing(chat: Chat, text: Optional[str]) -> None:
+    """
+    Materializes the chat title from the first user input so listings never derive it from messages.
+    """
+    if chat.title or not text or not text.strip():
+        return
+    chat.title = title_from_text(text.strip())
+
+
+def backfill_chat_titles(db: Session, batch_size: int = 500) -> int:
+    """
+    One-off job: stores a title for every chat created before titles were persisted.
+    Chats without any user message stay untitled so their first message can name them.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        chats = (
+            db.query(Chat)
+            .filter(Chat.title.is_(None), Chat.id > last_id)
+            .order_by(Chat.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not chats:
+            break
+        for chat in chats:
+            messages = (
+                db.query(Message).filter(Message.chat_id == chat.id).order_by(Message.id).limit(5).all()
+            )
+            title = generate_chat_title(messages)
+            if title != DEFAULT_CHAT_TITLE:
+                chat.title = title
+                updated += 1
+        last_id = chats[-1].id
+        db.commit()
+    return updated
+
+
+async def page_messages(db: AsyncSession, chat_id: int, before_id: Optional[int] = None,
+                        limit: int = 100) -> Tuple[List[Message], Optional[int]]:
+    """
+    Returns up to `limit` messages older than `before_id` in chronological order,
+    plus the cursor for the next older page (None when the history is exhausted).
+    """
+    stmt = select(Message).where(Message.chat_id == chat_id)
+    if before_id is not None:
+        stmt = stmt.where(Message.id < before_id)
+    messages = list((await db.scalars(stmt.order_by(Message.id.desc()).limit(limit + 1))).all())
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    messages.reverse()
+    return messages, (messages[0].id if has_more else None)
+
+
+async def get_chat_by_session(db: AsyncSession, session_id: str) -> Optional[Chat]:
+    return await db.scalar(select(Chat).where(Chat.session_id == session_id))
+
+
+async def get_or_create_chat(db: AsyncSession, session_id: str) -> Chat:
+    """
+    New chats are only flushed (to get an id); the caller commits them with the rest of its unit of work.
+    """
+    chat = await get_chat_by_session(db, session_id)
+    if chat:
+        return chat
+    try:
+        async with db.begin_nested():
+            chat = Chat(session_id=session_id)
+            db.add(chat)
+    except IntegrityError:
+        # A concurrent first request for this session created it; use theirs.
+        chat = await get_chat_by_session(db, session_id)
+    return chat
+
+
+def _import_title(chat: dict) -> Optional[str]:
+    first = next(
+        (m["content"].strip() for m in chat.get("messages", []) if m["role"] == "user" and m["content"].strip()), None
+    )
+    return title_from_text(first) if first else None
+
+
+def import_chat_history(db: Session, chats: List[dict], batch_size: int = 1000) -> Tuple[int, int]:
+    """
+    Bulk-imports historical chats: [{"session_id", "title"?, "messages": [{"role", "content", "created_at"?}]}].
+    Rows are written with multi-row INSERTs in one transaction. Untitled chats are named after their
+    first user message, as live chats are. Returns (chats, messages) imported.
+    """
+    chat_rows = [{"session_id": c["session_id"], "title": c.get("title") or _import_title(c)} for c in chats]
+    if not chat_rows:
+        return 0, 0
+    ids = {
+        session_id: chat_id
+        for chat_id, session_id in db.execute(
+            insert(Chat).returning(Chat.id, Chat.session_id), chat_rows
+        )
+    }
+    now = datetime.utcnow()
+    message_rows = [
+        {
+            "chat_id": ids[c["session_id"]],
+            "role": m["role"],
+            "content": m["content"],
+            "created_at": datetime.fromisoformat(m["created_at"]) if m.get("created_at") else now,
+        }
+        for c in chats
+        for m in c.get("messages", [])
+    ]
+    for start in range(0, len(message_rows), batch_size):
+        db.execute(insert(Message), message_rows[start:start + batch_size])
+    db.commit()
+    return len(chat_rows), len(message_rows)
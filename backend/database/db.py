@@ -1,7 +1,8 @@
 import os
-from typing import Generator
+from typing import AsyncGenerator, Generator
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base, Session
 from sqlalchemy_utils import create_database, database_exists
 
@@ -14,9 +15,7 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "postgres")
 DB_NAME = os.getenv("DB_NAME", "resume_builder")
 
 DATABASE_URL = f"postgresql+psycopg2://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-
-if not database_exists(DATABASE_URL):
-    create_database(DATABASE_URL)
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 engine = create_engine(
     DATABASE_URL,
@@ -30,9 +29,30 @@ engine = create_engine(
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 
+# Request handlers use the async engine so commits never block the event loop;
+# the sync engine above remains for migrations and maintenance scripts.
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_recycle=1800,
+    pool_size=10,
+    max_overflow=20
+)
+
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
+def ensure_database() -> None:
+    """
+    Creates the database on first run. Called from startup, never at import time.
+    """
+    if not database_exists(DATABASE_URL):
+        create_database(DATABASE_URL)
+
+
 def get_db() -> Generator[Session, None, None]:
 
     db = SessionLocal()
@@ -40,3 +60,9 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+
+    async with AsyncSessionLocal() as db:
+        yield db
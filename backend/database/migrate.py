@@ -0,0 +1,57 @@
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from database.db import ensure_database
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Set to false when migrations run as their own deploy step (`python maintenance.py migrate`)
+# instead of from every worker's startup.
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+# Arbitrary application-wide key for pg_advisory_lock; every migrator must use the same one.
+MIGRATION_LOCK_KEY = 0x7265_7375_6D65
+
+
+def alembic_config() -> Config:
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "migrations"))
+    return config
+
+
+@contextmanager
+def migration_lock(connection: Connection) -> Iterator[None]:
+    """
+    Serializes migrators across processes and hosts. Workers that lose the race block here and then
+    find the schema already at head. Only PostgreSQL has advisory locks; elsewhere this is a no-op.
+    """
+    if connection.dialect.name != "postgresql":
+        yield
+        return
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    connection.commit()
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        connection.commit()
+
+
+def upgrade_database(revision: str = "head", bind: Optional[Engine] = None) -> None:
+    """
+    Applies pending schema migrations. Replaces the old import-time Base.metadata.create_all.
+    """
+    if bind is None:
+        from database.db import engine as bind
+        ensure_database()
+    config = alembic_config()
+    with bind.connect() as connection:
+        with migration_lock(connection):
+            config.attributes["connection"] = connection
+            command.upgrade(config, revision)
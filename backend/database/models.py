@@ -1,27 +1,35 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, func, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, func, Text, Index, JSON
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from database.db import Base
 
 
 class Chat(Base):
     __tablename__ = "chats"
+    __table_args__ = (Index("ix_chats_created_at_id", "created_at", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, unique=True, index=True)
     title = Column(String, nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
-    messages = relationship("Message", back_populates="chat", cascade="all, delete")
+    # Write-only so chat.messages is never materialized (and is safe under AsyncSession);
+    # rows are removed by ON DELETE CASCADE.
+    messages = relationship("Message", back_populates="chat", lazy="write_only", cascade="all, delete",
+                            passive_deletes=True)
 
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (Index("ix_messages_chat_id_id", "chat_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     chat_id = Column(Integer, ForeignKey("chats.id", ondelete="CASCADE"))
     role = Column(String, nullable=False)  # "user" or "assistant"
     content = Column(String, nullable=False)
+    # Set on attachment messages; content keeps the user's filename, the blob holds the stored file.
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256", ondelete="SET NULL"), nullable=True)
     created_at = Column(DateTime, server_default=func.now())
 
     chat = relationship("Chat", back_populates="messages")
@@ -29,8 +37,28 @@ class Message(Base):
 
 class ResumeVersion(Base):
     __tablename__ = "resume_versions"
+    __table_args__ = (Index("ix_resume_versions_session_id_created_at", "session_id", "created_at"),)
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(String, index=True)
+    session_id = Column(String)
     name = Column(String, default="Untitled Resume")
     content = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    filename = Column(String, nullable=False, unique=True)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+
+
+class SessionState(Base):
+    __tablename__ = "session_states"
+
+    session_id = Column(String, primary_key=True)
+    data = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=False)
+    version = Column(Integer, nullable=False, default=1)  # bumped on every save for optimistic concurrency
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import re
+import threading
+from typing import FrozenSet, List, Optional, Set, Tuple
+
+# Only exact (normalized) repeats are dropped outright. A rewording is merged into the item it
+# rewords only when it scores at least this character-trigram Jaccard similarity AND its key fields
+# (start year, other numbers, degree and seniority words) are identical; similar items whose key
+# fields differ are kept and counted as flagged. Distinct entries routinely score 0.6-0.9 on
+# similarity alone ("BSc" vs "MSc", "Engineer" vs "Senior Engineer"), which is why the key fields
+# decide and the threshold only has to keep apart different items that share them.
+SECTION_DEDUP_THRESHOLD = float(os.getenv("SECTION_DEDUP_THRESHOLD", "0.7"))
+SHINGLE_SIZE = 3
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_YEAR = re.compile(r"(?:19|20)\d{2}")
+_WORD = re.compile(r"\w+")
+# Words that make otherwise identical entries different: degrees, seniority and certification levels.
+KEY_WORDS = frozenset({
+    "associate", "ba", "bachelor", "bachelors", "bs", "bsc", "certificate", "diploma", "doctorate", "ma", "master",
+    "masters", "mba", "ms", "msc", "phd", "chief", "director", "head", "intern", "junior", "lead", "manager",
+    "principal", "senior", "staff", "expert", "foundational", "practitioner", "professional", "specialty",
+})
+
+dedup_stats = {"exact_duplicates": 0, "near_duplicates": 0, "flagged_similar": 0}
+_STAT_FOR_KIND = {"exact": "exact_duplicates", "near": "near_duplicates", "flagged": "flagged_similar"}
+_stats_lock = threading.Lock()
+
+
+def normalize_item(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def item_hash(text: str) -> str:
+    return hashlib.sha256(normalize_item(text).encode("utf-8")).hexdigest()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> Set[str]:
+    normalized = normalize_item(text)
+    if len(normalized) <= size:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + size] for i in range(len(normalized) - size + 1)}
+
+
+def similarity(a: str, b: str) -> float:
+    sa, sb = shingles(a), shingles(b)
+    if not sa or not sb:
+        return 0.0
+    return len(sa & sb) / len(sa | sb)
+
+
+def key_fields(text: str) -> Tuple[Optional[str], FrozenSet[str], FrozenSet[str]]:
+    """
+    (start year, other numbers, key words) of an item. Later years are left out so that an entry
+    whose end date moved ("2019-2022" -> "2019-Present") still matches itself.
+    """
+    words = _WORD.findall(text.lower().replace(".", ""))
+    years = [word for word in words if _YEAR.fullmatch(word)]
+    numbers = frozenset(word for word in words if any(c.isdigit() for c in word) and not _YEAR.fullmatch(word))
+    return (years[0] if years else None), numbers, frozenset(word for word in words if word in KEY_WORDS)
+
+
+def find_duplicate(items: List[str], content: str,
+                   threshold: float = SECTION_DEDUP_THRESHOLD) -> Tuple[Optional[int], Optional[str]]:
+    """
+    Returns (index, kind) for the existing item content duplicates, or (None, None): "exact" for a
+    normalized repeat, "near" for a rewording with the same key fields, "flagged" for a similar
+    item whose key fields differ (a different entry that must be kept).
+    Sections are capped at a few dozen items, so exact pairwise Jaccard is cheaper than MinHash sketches.
+    """
+    content_hash = item_hash(content)
+    content_key = key_fields(content)
+    near_index, near_score, flagged_index = None, threshold, None
+    for index, item in enumerate(items):
+        if item_hash(item) == content_hash:
+            return index, "exact"
+        score = similarity(item, content)
+        if score < threshold:
+            continue
+        if key_fields(item) != content_key:
+            flagged_index = index
+        elif score >= near_score:
+            near_index, near_score = index, score
+    if near_index is not None:
+        return near_index, "near"
+    if flagged_index is not None:
+        return flagged_index, "flagged"
+    return None, None
+
+
+def record_duplicate(kind: Optional[str]) -> None:
+    """Counts a duplicate once the state it was merged into has been saved."""
+    if kind is None:
+        return
+    with _stats_lock:
+        dedup_stats[_STAT_FOR_KIND[kind]] += 1
+
+
+def dedup_metrics() -> dict:
+    with _stats_lock:
+        stats = dict(dedup_stats)
+    return {
+        **stats,
+        # Items merged across all sessions since startup; each is one section tool call fewer on
+        # every later rebuild of the resume it was merged into.
+        "merged_items_total": stats["exact_duplicates"] + stats["near_duplicates"],
+    }
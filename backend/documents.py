@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import logging
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_DIR = Path("uploads")
+TEXT_CACHE_DIR = UPLOAD_DIR / ".text"
+PARSEABLE_SUFFIXES = {".pdf", ".docx"}
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+# Leading bytes each accepted upload type must start with (DOCX is a ZIP container).
+FILE_SIGNATURES = {".pdf": b"%PDF-", ".docx": b"PK\x03\x04"}
+
+PARSER_WORKERS = int(os.getenv("PARSER_WORKERS", "2"))
+PARSE_TIMEOUT = float(os.getenv("PARSE_TIMEOUT", "30"))
+# Extra seconds the caller waits past PARSE_TIMEOUT before giving up on a worker that ignored its deadline.
+PARSE_TIMEOUT_GRACE = float(os.getenv("PARSE_TIMEOUT_GRACE", "5"))
+PARSE_MAX_PAGES = int(os.getenv("PARSE_MAX_PAGES", "20"))
+PARSER_MEMORY_LIMIT_MB = int(os.getenv("PARSER_MEMORY_LIMIT_MB", "1024"))
+# DOCX has no stored pagination, so the page cap counts hard page breaks plus this many characters per page.
+DOCX_CHARS_PER_PAGE = int(os.getenv("DOCX_CHARS_PER_PAGE", "3000"))
+
+_parser_pool: Optional[ProcessPoolExecutor] = None
+
+
+class UploadRejected(ValueError):
+    status_code = 400
+
+
+class UnsupportedFileType(UploadRejected):
+    status_code = 415
+
+
+class UploadTooLarge(UploadRejected):
+    status_code = 413
+
+
+class ParseTimeout(TimeoutError):
+    """Raised in a parser worker whose document took longer than PARSE_TIMEOUT."""
+
+
+def file_sha256(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def save_upload(upload, dest: Path, max_bytes: int = MAX_UPLOAD_BYTES) -> Tuple[str, int]:
+    """
+    Streams an upload to disk in fixed-size chunks, hashing as it goes.
+
+    The type is checked against the first bytes before anything is written, and the
+    write is aborted as soon as the size limit is crossed. Returns (sha256, size).
+    """
+    suffix = dest.suffix.lower()
+    signature = FILE_SIGNATURES.get(suffix)
+    if signature is None:
+        raise UnsupportedFileType(f"Unsupported file type: {suffix or 'unknown'}")
+
+    chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+    if not chunk.startswith(signature):
+        raise UnsupportedFileType(f"File content does not match its {suffix} extension")
+
+    digest = hashlib.sha256()
+    size = 0
+    tmp_path = dest.with_name(dest.name + ".part")
+    try:
+        with open(tmp_path, "wb") as f:
+            while chunk:
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit")
+                digest.update(chunk)
+                f.write(chunk)
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        tmp_path.replace(dest)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return digest.hexdigest(), size
+
+
+@lru_cache(maxsize=1024)
+def _memoized_sha256(file_path: str, mtime_ns: int, size: int) -> str:
+    return file_sha256(Path(file_path))
+
+
+def content_hash(file_path: Path) -> str:
+    stat = file_path.stat()
+    return _memoized_sha256(str(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def _docx_text(file_path: Path, max_pages: int) -> str:
+    from docx import Document
+    from docx.oxml.ns import qn
+
+    lines = []
+    page, page_chars = 1, 0
+    for paragraph in Document(file_path).paragraphs:
+        element = paragraph._p
+        breaks = sum(1 for br in element.iter(qn("w:br")) if br.get(qn("w:type")) == "page")
+        breaks += sum(1 for _ in element.iter(qn("w:pageBreakBefore")))
+        if breaks:
+            page, page_chars = page + breaks, 0
+        page_chars += len(paragraph.text)
+        if page_chars > DOCX_CHARS_PER_PAGE:
+            page, page_chars = page + 1, len(paragraph.text)
+        if page > max_pages:
+            break
+        lines.append(paragraph.text)
+    return "\n".join(lines)
+
+
+def extract_text(file_path: Path, max_pages: Optional[int] = None) -> str:
+    max_pages = max_pages or PARSE_MAX_PAGES
+    suffix = file_path.suffix.lower()
+    if suffix == ".pdf":
+        import pdfplumber
+        with pdfplumber.open(file_path) as pdf:
+            return "\n".join([p.extract_text() or "" for p in pdf.pages[:max_pages]])
+    if suffix == ".docx":
+        return _docx_text(file_path, max_pages)
+    return f"[Cannot parse this file type: {file_path.suffix}]"
+
+
+def _text_cache_path(digest: str, max_pages: int) -> Path:
+    # The page cap changes the extracted text, so it is part of the cache key.
+    return TEXT_CACHE_DIR / f"{digest}.p{max_pages}.txt"
+
+
+def cached_text(digest: str, max_pages: int) -> Optional[str]:
+    path = _text_cache_path(digest, max_pages)
+    if path.exists():
+        return path.read_text(encoding="utf-8")
+    return None
+
+
+def store_text(digest: str, max_pages: int, text: str) -> None:
+    TEXT_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    path = _text_cache_path(digest, max_pages)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    tmp_path.replace(path)
+
+
+def _init_parser_worker(memory_limit_mb: int) -> None:
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"[EXTRACT] Could not apply parser memory cap: {e}")
+
+
+def get_parser_pool() -> ProcessPoolExecutor:
+    global _parser_pool
+    if _parser_pool is None:
+        _parser_pool = ProcessPoolExecutor(
+            max_workers=PARSER_WORKERS,
+            initializer=_init_parser_worker,
+            initargs=(PARSER_MEMORY_LIMIT_MB,),
+        )
+    return _parser_pool
+
+
+def shutdown_parser_pool(cancel_pending: bool = True) -> None:
+    """
+    Detaches the pool and shuts it down without waiting. Parses already running finish and still
+    deliver their results; queued ones are cancelled unless cancel_pending is False.
+    """
+    global _parser_pool
+    pool, _parser_pool = _parser_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=cancel_pending)
+
+
+def _parse_with_deadline(file_path: Path, max_pages: int, timeout: float) -> str:
+    """
+    Runs in a parser worker. SIGALRM interrupts a parse that overruns its deadline, so a hung
+    document frees its worker without anyone having to kill the process.
+    """
+    if timeout <= 0 or not hasattr(signal, "SIGALRM"):
+        return extract_text(file_path, max_pages)
+
+    def expired(signum, frame):
+        raise ParseTimeout(f"Parsing {file_path.name} took longer than {timeout}s")
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return extract_text(file_path, max_pages)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+async def aextract_text(file_path: Path, max_pages: Optional[int] = None) -> str:
+    """
+    Parses a document in the worker process pool so the event loop is never blocked by pdfplumber.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_parser_pool()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(pool, _parse_with_deadline, file_path, max_pages or PARSE_MAX_PAGES, PARSE_TIMEOUT),
+            PARSE_TIMEOUT + PARSE_TIMEOUT_GRACE,
+        )
+    except ParseTimeout:
+        logger.error(f"[EXTRACT] Parsing {file_path.name} timed out after {PARSE_TIMEOUT}s")
+        raise
+    except asyncio.TimeoutError:
+        # The worker is stuck somewhere its deadline cannot interrupt. Route new parses to a fresh
+        # pool and let the old one drain: other callers' parses on it still complete.
+        logger.error(f"[EXTRACT] Parser worker for {file_path.name} is unresponsive; starting a new parser pool")
+        if _parser_pool is pool:
+            shutdown_parser_pool(cancel_pending=False)
+        raise
+    except BrokenProcessPool:
+        # A worker died (e.g. hit the memory cap); start a fresh pool for the next document.
+        if _parser_pool is pool:
+            shutdown_parser_pool()
+        raise
+
+
+async def aload_attachment_text(file_path: Path, digest: Optional[str] = None) -> str:
+    """
+    Returns the extracted text of an attachment, parsing it at most once per unique content hash.
+    """
+    if file_path.suffix.lower() not in PARSEABLE_SUFFIXES:
+        return extract_text(file_path)
+    digest = digest or await asyncio.to_thread(content_hash, file_path)
+    text = cached_text(digest, PARSE_MAX_PAGES)
+    if text is not None:
+        return text
+    logger.info(f"[EXTRACT] Parsing {file_path.name} in worker pool | sha256: {digest}")
+    text = await aextract_text(file_path, PARSE_MAX_PAGES)
+    store_text(digest, PARSE_MAX_PAGES, text)
+    return text
@@ -0,0 +1,94 @@
+import json
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from database.schemas import ResumeBase
+from dedup import find_duplicate, item_hash
+from llm import achat_with_llm
+from session_state import EXTRACTED_ITEMS_KEY, LIST_SECTIONS, RESUME_SECTIONS, SESSION_MAX_ITEMS
+
+logger = logging.getLogger(__name__)
+
+# "per_section" sends the attachment through each section tool; "batched" extracts every section in one call.
+RESUME_EXTRACTION_MODE = os.getenv("RESUME_EXTRACTION_MODE", "per_section")
+# Sections whose extracted text still goes through its tool for rewording; extracted items of the
+# other sections are used verbatim. Anything the user adds or edits in chat is always rendered.
+POLISH_SECTIONS = frozenset(
+    s.strip() for s in os.getenv("RESUME_POLISH_SECTIONS", "summary,experience,projects,achievements").split(",")
+    if s.strip()
+)
+
+EXTRACTION_PROMPT = (
+    "You are a resume parser. Extract the resume below into a single JSON object with exactly these keys:\n"
+    '"personal_info" (string: name and contact details), "summary" (string), and '
+    '"experience", "education", "skills", "projects", "achievements" (arrays of strings, one entry per item).\n'
+    "Copy facts from the document only; use null or [] for anything missing. Respond with JSON and nothing else."
+)
+
+
+def batched_extraction_enabled() -> bool:
+    return RESUME_EXTRACTION_MODE == "batched"
+
+
+def _strip_code_fence(raw: str) -> str:
+    raw = raw.strip()
+    if raw.startswith("```"):
+        raw = raw.split("\n", 1)[1] if "\n" in raw else ""
+        raw = raw.rsplit("```", 1)[0]
+    return raw.strip()
+
+
+def parse_extraction(raw: str) -> Optional[ResumeBase]:
+    try:
+        data = json.loads(_strip_code_fence(raw))
+        if not isinstance(data, dict):
+            return None
+        return ResumeBase(**data)
+    except (TypeError, ValueError) as e:
+        logger.error(f"[EXTRACTION] Invalid structured output: {e}")
+        return None
+
+
+async def extract_resume(text: str, session_id: str) -> Optional[ResumeBase]:
+    """
+    Extracts every resume section from a document in one deterministic LLM call. Returns None
+    when the response does not validate against ResumeBase, so callers can fall back.
+    """
+    messages = [
+        {"role": "system", "content": EXTRACTION_PROMPT},
+        {"role": "user", "content": text},
+    ]
+    raw = await achat_with_llm(messages, temperature=0)
+    resume = parse_extraction(raw or "")
+    logger.info(f"[EXTRACTION] Session: {session_id} | Valid: {resume is not None}")
+    return resume
+
+
+def merge_extraction(session_data: Dict[str, Any], resume: ResumeBase) -> None:
+    """
+    Fills empty scalar sections and appends list items that do not repeat or reword an existing
+    one, recording what was taken from the document under EXTRACTED_ITEMS_KEY.
+    """
+    extracted = set(session_data.get(EXTRACTED_ITEMS_KEY, ()))
+    for section in RESUME_SECTIONS:
+        value = getattr(resume, section, None)
+        if not value:
+            continue
+        if section in LIST_SECTIONS:
+            items = session_data[section]
+            for item in (item.strip() for item in value if item and item.strip()):
+                _, kind = find_duplicate(items, item)
+                if kind in (None, "flagged"):
+                    items.append(item)
+                    extracted.add(item_hash(item))
+            del items[:-SESSION_MAX_ITEMS]
+        elif not session_data[section]:
+            session_data[section] = value.strip()
+            extracted.add(item_hash(session_data[section]))
+    # Forget items that have since been edited or dropped.
+    present = {
+        item_hash(item) for section in RESUME_SECTIONS
+        for item in (session_data[section] if section in LIST_SECTIONS else [session_data[section]]) if item
+    }
+    session_data[EXTRACTED_ITEMS_KEY] = sorted(extracted & present)
@@ -0,0 +1,164 @@
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.8"))
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH")
+INTENT_DECISION_LOG = os.getenv("INTENT_DECISION_LOG")
+
+SECTION_PATTERNS = {
+    "personal_info": re.compile(r"\b(?:my name|name is|phone|e-?mail|contact|linkedin)\b", re.I),
+    "summary": re.compile(r"\b(?:summary|career objective|about me|profile statement)\b", re.I),
+    "experience": re.compile(r"\b(?:experience|worked|working|employer|company|job|role as|intern(?:ship)?)\b", re.I),
+    "education": re.compile(
+        r"\b(?:education|degree|university|college|school|bachelor'?s?|master'?s?|ph\.?d|gpa)\b", re.I
+    ),
+    "skills": re.compile(r"\b(?:skills?|technolog(?:y|ies)|tools|proficient|frameworks?)\b", re.I),
+    "projects": re.compile(r"\b(?:projects?|built an? app|application i built|side project)\b", re.I),
+    "achievements": re.compile(r"\b(?:achievements?|awards?|certifications?|certified|honou?rs?)\b", re.I),
+}
+
+# Requests to change existing content, and questions, need the LLM: the raw sentence is not
+# content to append to a section. Only declarative content is routed locally.
+EDIT_INSTRUCTION_PATTERN = re.compile(
+    r"\b(?:make|remove|delete|drop|rewrite|reword|rephrase|change|shorten|lengthen|trim|cut|expand|edit|fix|"
+    r"update|replace|improve|polish|tailor|move|reorder|add|fill in)\b",
+    re.I,
+)
+QUESTION_PATTERN = re.compile(
+    r"\?|^\s*(?:what|how|why|when|where|which|who|can|could|would|should|is|are|do|does|did)\b", re.I
+)
+
+RULE_CONFIDENCE = 0.9
+ATTACHMENT_RULE_CONFIDENCE = 0.6
+AMBIGUOUS_RULE_CONFIDENCE = 0.4
+
+
+class IntentRouter:
+    """
+    Local classification tier in front of the decision LLM.
+
+    Compiled keyword rules run first; an optional scikit-learn model trained from logged
+    LLM decisions runs second, only when the rules were not confident. Only predictions at
+    or above the confidence threshold are used, everything else still goes to the LLM, and
+    so do edit instructions and questions. With an attachment in play both tiers are capped
+    below the threshold, since a local decision would drop the file text.
+    """
+
+    def __init__(self, threshold: float = INTENT_CONFIDENCE_THRESHOLD, model_path: Optional[str] = INTENT_MODEL_PATH,
+                 decision_log: Optional[str] = INTENT_DECISION_LOG):
+        self.threshold = threshold
+        self.decision_log = decision_log
+        self.model = self._load_model(model_path)
+        self._lock = threading.Lock()
+        self.stats = {"rules": 0, "model": 0, "llm": 0, "llm_seconds_total": 0.0}
+
+    @staticmethod
+    def _load_model(model_path: Optional[str]):
+        if not model_path or not os.path.exists(model_path):
+            return None
+        try:
+            import joblib
+            return joblib.load(model_path)
+        except Exception as e:
+            logger.error(f"[INTENT] Could not load intent model from {model_path}: {e}")
+            return None
+
+    @staticmethod
+    def is_instruction(query: str) -> bool:
+        return bool(EDIT_INSTRUCTION_PATTERN.search(query) or QUESTION_PATTERN.search(query))
+
+    def rule_match(self, query: str, has_attachment: bool = False) -> Tuple[Optional[str], float]:
+        matches = [tool for tool, pattern in SECTION_PATTERNS.items() if pattern.search(query)]
+        if not matches:
+            return None, 0.0
+        if len(matches) > 1 or self.is_instruction(query):
+            return matches[0], AMBIGUOUS_RULE_CONFIDENCE
+        return matches[0], ATTACHMENT_RULE_CONFIDENCE if has_attachment else RULE_CONFIDENCE
+
+    def model_match(self, query: str, has_attachment: bool = False) -> Tuple[Optional[str], float]:
+        if self.model is None:
+            return None, 0.0
+        probabilities = self.model.predict_proba([query])[0]
+        best = probabilities.argmax()
+        confidence = float(probabilities[best])
+        if has_attachment:
+            confidence = min(confidence, ATTACHMENT_RULE_CONFIDENCE)
+        return self.model.classes_[best], confidence
+
+    def classify(self, query: str, has_attachment: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Returns a use_tool decision when a local tier is confident enough, otherwise None.
+        """
+        if self.is_instruction(query):
+            return None
+        for tier, match in (("rules", self.rule_match), ("model", self.model_match)):
+            tool, confidence = match(query, has_attachment)
+            if tool in SECTION_PATTERNS and confidence >= self.threshold:
+                with self._lock:
+                    self.stats[tier] += 1
+                logger.info(f"[INTENT] {tier} tier -> {tool} ({confidence:.2f})")
+                return {"action": "use_tool", "tool": tool, "tool_input": query, "call_immediately": True}
+        return None
+
+    def record_llm_decision(self, query: str, decision: Dict[str, Any], elapsed: float) -> None:
+        with self._lock:
+            self.stats["llm"] += 1
+            self.stats["llm_seconds_total"] += elapsed
+        if not self.decision_log:
+            return
+        label = decision.get("tool") if decision.get("action") == "use_tool" else decision.get("action")
+        try:
+            with open(self.decision_log, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"query": query, "label": label}) + "\n")
+        except OSError as e:
+            logger.error(f"[INTENT] Could not log decision: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        local_hits = stats["rules"] + stats["model"]
+        total = local_hits + stats["llm"]
+        avg_llm_seconds = stats["llm_seconds_total"] / stats["llm"] if stats["llm"] else 0.0
+        return {
+            "rules_hits": stats["rules"],
+            "model_hits": stats["model"],
+            "llm_calls": stats["llm"],
+            "local_hit_rate": local_hits / total if total else 0.0,
+            "avg_llm_decision_seconds": avg_llm_seconds,
+            "estimated_seconds_saved": local_hits * avg_llm_seconds,
+        }
+
+
+def train_intent_model(decision_log: str, model_path: str) -> int:
+    """
+    Fits a TF-IDF + logistic regression classifier on logged LLM decisions. Returns the sample count.
+    """
+    from joblib import dump
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+
+    queries: List[str] = []
+    labels: List[str] = []
+    with open(decision_log, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("label"):
+                queries.append(record["query"])
+                labels.append(record["label"])
+    if len(set(labels)) < 2:
+        raise ValueError("Need logged decisions for at least two intents to train a classifier")
+
+    model = make_pipeline(TfidfVectorizer(ngram_range=(1, 2)), LogisticRegression(max_iter=1000))
+    model.fit(queries, labels)
+    dump(model, model_path)
+    return len(queries)
+
+
+intent_router = IntentRouter()
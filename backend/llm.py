@@ -1,19 +1,143 @@
+import asyncio
 import os
-from openai import OpenAI
+import random
+import threading
+import weakref
+from typing import List, Optional
+
+import httpx
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, RateLimitError, InternalServerError
 from dotenv import load_dotenv
 
+from llm_cache import estimate_cost, llm_cache
+from singleflight import SingleFlight
+
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+DEFAULT_MODEL = "gpt-3.5-turbo"
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "20"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+LLM_BACKOFF_CAP = float(os.getenv("LLM_BACKOFF_CAP", "8"))
+
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+_client: Optional[OpenAI] = None
+# httpx pools are bound to the loop that opened them, so each event loop (the app's and the
+# tool-bridge loop) gets its own pooled client.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+llm_flight = SingleFlight("llm")
+
+
+def get_client() -> OpenAI:
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    """
+    Returns the running loop's async OpenAI client, backed by a pooled keep-alive HTTP client.
+    """
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+    if client is None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+            timeout=LLM_TIMEOUT,
+        )
+        client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), http_client=http_client, max_retries=0)
+        with _async_clients_lock:
+            client = _async_clients.setdefault(loop, client)
+    return client
+
+
+async def close_async_client() -> None:
+    with _async_clients_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
 
 
-def chat_with_llm(messages: list, model: str = "gpt-3.5-turbo", temperature: float = 0.7) -> str:
+def chat_with_llm(messages: list, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+                  cache: Optional[bool] = None) -> str:
     """
     Sends chat messages to OpenAI and returns the response text.
     """
-    response = client.chat.completions.create(
+    use_cache = llm_cache.cacheable(temperature, cache)
+    key = llm_cache.key_for(messages, model, temperature) if use_cache else None
+    if key:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+    response = get_client().chat.completions.create(
         model=model,
         messages=messages,
         temperature=temperature
     )
-    return response.choices[0].message.content
+    content = response.choices[0].message.content
+    if key and content is not None:
+        llm_cache.put(key, content, _response_cost(model, response))
+    return content
+
+
+async def achat_with_llm(messages: list, model: str = DEFAULT_MODEL, temperature: float = 0.7,
+                         timeout: float = LLM_TIMEOUT, cache: Optional[bool] = None) -> str:
+    """
+    Async variant of chat_with_llm. Retries transient failures with full-jitter exponential backoff.
+    Deterministic (temperature 0) calls are served from llm_cache unless cache=False, and identical
+    concurrent calls share a single request.
+    """
+    key = (llm_cache.key_for(messages, model, temperature), timeout, cache)
+    return await llm_flight.do(key, lambda: _achat_with_llm(messages, model, temperature, timeout, cache))
+
+
+async def _achat_with_llm(messages: list, model: str, temperature: float, timeout: float,
+                          cache: Optional[bool]) -> str:
+    use_cache = llm_cache.cacheable(temperature, cache)
+    if use_cache:
+        cached = await llm_cache.lookup(messages, model, temperature)
+        if cached is not None:
+            return cached
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            response = await get_async_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                timeout=timeout,
+            )
+            content = response.choices[0].message.content
+            if use_cache and content is not None:
+                await llm_cache.store(messages, model, temperature, content, _response_cost(model, response))
+            return content
+        except RETRYABLE_ERRORS:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            await asyncio.sleep(random.uniform(0, min(LLM_BACKOFF_CAP, LLM_BACKOFF_BASE * 2 ** attempt)))
+
+
+def _response_cost(model: str, response) -> float:
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return 0.0
+    return estimate_cost(model, usage.prompt_tokens, usage.completion_tokens)
+
+
+async def embed_text(text: str) -> List[float]:
+    response = await get_async_client().embeddings.create(model=EMBEDDING_MODEL, input=text)
+    return response.data[0].embedding
+
+
+if os.getenv("LLM_CACHE_SEMANTIC", "0") == "1":
+    llm_cache.embedder = embed_text
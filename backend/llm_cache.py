@@ -0,0 +1,250 @@
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "4096"))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_DB = os.getenv("LLM_CACHE_DB")
+LLM_CACHE_SEMANTIC_SIZE = int(os.getenv("LLM_CACHE_SEMANTIC_SIZE", "1000"))
+LLM_CACHE_SEMANTIC_THRESHOLD = float(os.getenv("LLM_CACHE_SEMANTIC_THRESHOLD", "0.97"))
+
+# USD per 1K tokens (input, output), used to estimate what cache hits saved.
+MODEL_PRICES = {
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-4o": (0.0025, 0.01),
+}
+
+Embedder = Callable[[str], Awaitable[List[float]]]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1000
+
+
+def _normalize(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return [{"role": m["role"], "content": " ".join(str(m["content"]).split())} for m in messages]
+
+
+def _hash(payload: Any) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _cosine(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class LLMCache:
+    """
+    Response cache for chat completions.
+
+    Exact matches are keyed by a hash of (model, temperature, normalized messages) and looked up
+    in an in-memory LRU, then an optional SQLite tier (opened on first use, queried off the event
+    loop). When an embedder is configured, callers can opt in to a semantic tier by passing a
+    semantic_scope: a near-duplicate final user message under the same scope, model, temperature
+    and system context is then also served from cache. Scope it to whatever the response may echo
+    (e.g. the session), so one user's content is never returned to another. Only temperature-0
+    calls are cached unless a caller opts in.
+    """
+
+    def __init__(self, max_entries: int = LLM_CACHE_SIZE, ttl: float = LLM_CACHE_TTL,
+                 db_path: Optional[str] = LLM_CACHE_DB, embedder: Optional[Embedder] = None,
+                 semantic_threshold: float = LLM_CACHE_SEMANTIC_THRESHOLD):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.embedder = embedder
+        self.semantic_threshold = semantic_threshold
+        self._entries: "OrderedDict[str, Tuple[float, str, float]]" = OrderedDict()
+        self._vectors: "deque[Tuple[str, List[float], str]]" = deque(maxlen=LLM_CACHE_SEMANTIC_SIZE)
+        # Embeddings computed by a missed lookup, handed to the matching store so it doesn't embed again.
+        self._pending_vectors: "OrderedDict[str, Tuple[str, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "semantic_hits": 0, "misses": 0, "dollars_saved": 0.0}
+
+    @staticmethod
+    def cacheable(temperature: float, cache: Optional[bool] = None) -> bool:
+        if not LLM_CACHE_ENABLED:
+            return False
+        return cache if cache is not None else temperature == 0
+
+    @staticmethod
+    def key_for(messages: List[Dict[str, str]], model: str, temperature: float) -> str:
+        return _hash({"model": model, "temperature": temperature, "messages": _normalize(messages)})
+
+    @staticmethod
+    def _semantic_parts(messages: List[Dict[str, str]], model: str, temperature: float,
+                        scope: str) -> Tuple[str, str]:
+        normalized = _normalize(messages)
+        namespace = _hash({"scope": scope, "model": model, "temperature": temperature, "context": normalized[:-1]})
+        return namespace, normalized[-1]["content"] if normalized else ""
+
+    def _connection(self) -> sqlite3.Connection:
+        # Callers hold _db_lock.
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, cost REAL, created_at REAL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def _fetch_memory(self, key: str) -> Optional[Tuple[str, float, str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, value, cost = entry
+            if time.time() - created_at <= self.ttl:
+                self._entries.move_to_end(key)
+                return value, cost, "memory_hits"
+            del self._entries[key]
+            return None
+
+    def _fetch_disk(self, key: str) -> Optional[Tuple[str, float, str]]:
+        if not self.db_path:
+            return None
+        with self._db_lock:
+            row = self._connection().execute(
+                "SELECT value, cost, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if not row or time.time() - row[2] > self.ttl:
+            return None
+        with self._lock:
+            self._remember(key, row[0], row[1], row[2])
+        return row[0], row[1], "disk_hits"
+
+    def _write_disk(self, key: str, value: str, cost: float, created_at: float) -> None:
+        if not self.db_path:
+            return
+        with self._db_lock:
+            db = self._connection()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, cost, created_at) VALUES (?, ?, ?, ?)",
+                (key, value, cost, created_at),
+            )
+            db.commit()
+
+    async def _afetch(self, key: str) -> Optional[Tuple[str, float, str]]:
+        found = self._fetch_memory(key)
+        if found is None and self.db_path:
+            found = await asyncio.to_thread(self._fetch_disk, key)
+        return found
+
+    def _count(self, stat: str, cost: float = 0.0) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+            self.stats["dollars_saved"] += cost
+
+    def _hit(self, found: Optional[Tuple[str, float, str]]) -> Optional[str]:
+        if found is None:
+            return None
+        value, cost, tier = found
+        self._count(tier, cost)
+        return value
+
+    def get(self, key: str) -> Optional[str]:
+        """Blocking lookup for sync callers."""
+        value = self._hit(self._fetch_memory(key) or self._fetch_disk(key))
+        if value is None:
+            self._count("misses")
+        return value
+
+    def put(self, key: str, value: str, cost: float = 0.0) -> None:
+        """Blocking store for sync callers."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, cost, now)
+        self._write_disk(key, value, cost, now)
+
+    def _remember(self, key: str, value: str, cost: float, created_at: float) -> None:
+        self._entries[key] = (created_at, value, cost)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def lookup(self, messages: List[Dict[str, str]], model: str, temperature: float,
+                     semantic_scope: Optional[str] = None) -> Optional[str]:
+        key = self.key_for(messages, model, temperature)
+        value = self._hit(await self._afetch(key))
+        if value is not None:
+            return value
+        if self.embedder is None or semantic_scope is None:
+            self._count("misses")
+            return None
+
+        namespace, text = self._semantic_parts(messages, model, temperature, semantic_scope)
+        try:
+            vector = await self.embedder(text)
+        except Exception as e:
+            logger.error(f"[LLM CACHE] Embedding failed: {e}")
+            self._count("misses")
+            return None
+        best_key, best_score = None, 0.0
+        with self._lock:
+            candidates = list(self._vectors)
+            self._pending_vectors[key] = (namespace, vector)
+            while len(self._pending_vectors) > LLM_CACHE_SEMANTIC_SIZE:
+                self._pending_vectors.popitem(last=False)
+        for candidate_namespace, candidate_vector, candidate_key in candidates:
+            if candidate_namespace != namespace:
+                continue
+            score = _cosine(vector, candidate_vector)
+            if score > best_score:
+                best_key, best_score = candidate_key, score
+        if best_key is not None and best_score >= self.semantic_threshold:
+            found = await self._afetch(best_key)
+            if found is not None:
+                value, cost, _ = found
+                self._count("semantic_hits", cost)
+                return value
+        self._count("misses")
+        return None
+
+    async def store(self, messages: List[Dict[str, str]], model: str, temperature: float, value: str,
+                    cost: float = 0.0, semantic_scope: Optional[str] = None) -> None:
+        key = self.key_for(messages, model, temperature)
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, cost, now)
+            pending = self._pending_vectors.pop(key, None)
+        if self.db_path:
+            await asyncio.to_thread(self._write_disk, key, value, cost, now)
+        if self.embedder is None or semantic_scope is None:
+            return
+        if pending is None:
+            namespace, text = self._semantic_parts(messages, model, temperature, semantic_scope)
+            try:
+                pending = namespace, await self.embedder(text)
+            except Exception as e:
+                logger.error(f"[LLM CACHE] Embedding failed: {e}")
+                return
+        with self._lock:
+            self._vectors.append((*pending, key))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            size = len(self._entries)
+        hits = stats["memory_hits"] + stats["disk_hits"] + stats["semantic_hits"]
+        total = hits + stats["misses"]
+        return {**stats, "size": size, "hit_ratio": hits / total if total else 0.0}
+
+
+llm_cache = LLMCache()
@@ -0,0 +1,106 @@
+import argparse
+import json
+
+from database.db import SessionLocal
+from database.migrate import upgrade_database
+from blob_store import collect_garbage
+from database.crud import backfill_chat_titles, import_chat_history
+from intent_router import train_intent_model
+from session_state import rendered_item_count, replay_history
+
+
+def migrate(args) -> None:
+    # Deploys run this as its own step before starting workers with MIGRATE_ON_STARTUP=false.
+    upgrade_database()
+    print("Schema is at head")
+
+
+def gc_blobs(args) -> None:
+    db = SessionLocal()
+    try:
+        stats = collect_garbage(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+    verb = "Would reclaim" if args.dry_run else "Reclaimed"
+    print(f"{verb} {stats['bytes_reclaimed']} bytes "
+          f"({stats['blobs_removed']} blobs, {stats['orphans_removed']} orphaned files)")
+    print(json.dumps(stats))
+
+
+def backfill_titles(args) -> None:
+    db = SessionLocal()
+    try:
+        updated = backfill_chat_titles(db, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Stored titles for {updated} chats")
+
+
+def import_chats(args) -> None:
+    with open(args.path, encoding="utf-8") as f:
+        chats = json.load(f)
+    db = SessionLocal()
+    try:
+        chat_count, message_count = import_chat_history(db, chats, batch_size=args.batch_size)
+    finally:
+        db.close()
+    print(f"Imported {chat_count} chats with {message_count} messages")
+
+
+def train_intent(args) -> None:
+    samples = train_intent_model(args.decision_log, args.model_path)
+    print(f"Trained intent model on {samples} logged decisions -> {args.model_path}")
+
+
+def dedup_report(args) -> None:
+    from sqlalchemy import select
+    from database.models import Message
+
+    db = SessionLocal()
+    try:
+        rows = db.execute(select(Message.chat_id, Message.role, Message.content).order_by(Message.chat_id, Message.id))
+        history = {}
+        for chat_id, role, content in rows:
+            history.setdefault(chat_id, []).append((role, content))
+    finally:
+        db.close()
+    before = sum(rendered_item_count(replay_history(messages, dedupe=False)) for messages in history.values())
+    after = sum(rendered_item_count(replay_history(messages)) for messages in history.values())
+    print(f"Replayed {len(history)} chats: {before} -> {after} section tool calls per full rebuild "
+          f"({before - after} avoided)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Resume Builder maintenance tasks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_cmd = commands.add_parser("migrate", help="Apply pending schema migrations and exit")
+    migrate_cmd.set_defaults(func=migrate)
+
+    gc = commands.add_parser("gc-blobs", help="Delete unreferenced upload blobs and report reclaimed bytes")
+    gc.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    gc.set_defaults(func=gc_blobs)
+
+    titles = commands.add_parser("backfill-titles", help="Persist titles for chats created before titles were stored")
+    titles.add_argument("--batch-size", type=int, default=500)
+    titles.set_defaults(func=backfill_titles)
+
+    importer = commands.add_parser("import-chats", help="Bulk-import historical chats from a JSON file")
+    importer.add_argument("path", help="JSON list of {session_id, title, messages: [{role, content, created_at}]}")
+    importer.add_argument("--batch-size", type=int, default=1000)
+    importer.set_defaults(func=import_chats)
+
+    intent = commands.add_parser("train-intent", help="Train the local intent classifier from logged LLM decisions")
+    intent.add_argument("decision_log", help="JSONL written via INTENT_DECISION_LOG")
+    intent.add_argument("model_path", help="Where to save the model; point INTENT_MODEL_PATH at it")
+    intent.set_defaults(func=train_intent)
+
+    report = commands.add_parser("dedup-report", help="Replay logged chats and count tool calls saved by deduplication")
+    report.set_defaults(func=dedup_report)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,28 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, Request, Query, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
-from fastmcp import FastMCP
-from sqlalchemy.orm import Session
-from database.db import get_db, engine, Base
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.db import get_async_db
+from database.crud import get_chat_by_session, get_or_create_chat, page_messages
 from database.models import Chat, Message
-from agent import RESUME_AGENT, Runner, DEFAULT_SESSION
+from agent import (
+    Runner, DEFAULT_SESSION, open_http_session, close_http_session, http_stats, tool_flight,
+)
+from blob_store import release_chat_blobs
+from dedup import dedup_metrics
+from documents import shutdown_parser_pool
+from intent_router import intent_router
+from llm import close_async_client, llm_flight
+from llm_cache import llm_cache
+from render_cache import render_cache
+from session_state import UPDATE_SECTION_PREFIX, session_state
 from routers import chats
+from tools.registry import TOOL_REGISTRY
 import os
 import re
 from uuid import uuid4
@@ -17,15 +32,33 @@ import uvicorn
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 logger = logging.getLogger(__name__)
 
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI(title="Resume Builder MCP Host")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Everything that touches the network, the database or heavy imports happens here, not at import time.
+    from fastmcp import FastMCP
+    from database.migrate import MIGRATE_ON_STARTUP, upgrade_database
+    if MIGRATE_ON_STARTUP:
+        # Concurrent workers serialize on a database advisory lock inside upgrade_database.
+        await asyncio.to_thread(upgrade_database)
+    app.state.mcp = FastMCP(name="ResumeMCPHost")
+    logger.info("FastMCP server initialized and ready.")
+    await open_http_session()
+    yield
+    await close_http_session()
+    await close_async_client()
+    shutdown_parser_pool()
+
+
+app = FastAPI(title="Resume Builder MCP Host", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    # Browsers hide non-safelisted response headers from fetch() unless they are exposed.
+    expose_headers=["X-Next-Cursor"],
 )
 
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -47,52 +80,70 @@ def health_check():
     return {"status": "Resume Builder API is running with MCP"}
 
 
+@app.get("/metrics")
+def metrics():
+    return {
+        "render_cache": render_cache.metrics(),
+        "llm_cache": llm_cache.metrics(),
+        "mcp_http": http_stats,
+        "intent_router": intent_router.metrics(),
+        "session_state": session_state.metrics(),
+        "section_dedup": dedup_metrics(),
+        "singleflight": {"tools": tool_flight.metrics(), "llm": llm_flight.metrics()},
+    }
+
+
 @app.post("/session/create")
-def create_session(db: Session = Depends(get_db)):
+async def create_session(db: AsyncSession = Depends(get_async_db)):
     session_id = str(uuid4())
     new_chat = Chat(session_id=session_id)
     db.add(new_chat)
-    db.commit()
-    db.refresh(new_chat)
+    await db.commit()
+    await db.refresh(new_chat)
     return {"session_id": new_chat.session_id, "chat_id": new_chat.id, "message": "Session created successfully"}
 
 
 @app.delete("/session/{session_id}")
-def delete_session(session_id: str, db: Session = Depends(get_db)):
-    chat = db.query(Chat).filter(Chat.session_id == session_id).first()
+async def delete_session(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    chat = await get_chat_by_session(db, session_id)
     if chat:
-        db.delete(chat)
-        db.commit()
+        await release_chat_blobs(db, chat.id)
+        await db.delete(chat)
+        await db.commit()
+        await session_state.delete(session_id)
         return {"message": f"Session {session_id} deleted successfully"}
     return {"error": "Session not found"}
 
 
 @app.get("/session/{session_id}/history")
-def get_history(session_id: str, db: Session = Depends(get_db)):
-    chat = db.query(Chat).filter(Chat.session_id == session_id).first()
+async def get_history(
+    session_id: str,
+    before_id: Optional[int] = Query(None),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    chat = await get_chat_by_session(db, session_id)
     if not chat:
         return {"messages": []}
 
+    messages, next_before_id = await page_messages(db, chat.id, before_id, limit)
     return {
         "session_id": chat.session_id,
         "messages": [
-            {"role": m.role, "content": m.content, "created_at": m.created_at}
-            for m in chat.messages
+            {"id": m.id, "role": m.role, "content": m.content, "created_at": m.created_at}
+            for m in messages
         ],
+        "next_before_id": next_before_id,
     }
 
 
-mcp = FastMCP(name="ResumeMCPHost")
-logger.info("FastMCP server initialized and ready.")
-
-
 @app.post("/mcp/tools/resume_agent")
-async def resume_agent(request: Request, db: Session = Depends(get_db)):
+async def resume_agent(request: Request, db: AsyncSession = Depends(get_async_db)):
     body = await request.json()
     query = body.get("query", "")
     session_id = body.get("session_id", DEFAULT_SESSION)
     try:
-        result = await Runner.run(RESUME_AGENT, query, context={"session_id": session_id}, db=db)
+        result = await Runner.run(query, context={"session_id": session_id}, db=db)
         logger.info(f"[RESUME_AGENT] Session: {session_id} | Query: {query[:100]}... | Result: {str(result)[:100]}...")
         return {"result": result["final_output"]}
     except Exception as e:
@@ -101,7 +152,7 @@ async def resume_agent(request: Request, db: Session = Depends(get_db)):
 
 
 @app.post("/mcp/tools/update_section")
-async def update_section(request: Request, db: Session = Depends(get_db)):
+async def update_section(request: Request, db: AsyncSession = Depends(get_async_db)):
     body = await request.json()
     section = body.get("section")
     content = body.get("content")
@@ -110,16 +161,11 @@ async def update_section(request: Request, db: Session = Depends(get_db)):
     if section not in ["personal_info", "summary", "experience", "education", "skills", "projects", "achievements"]:
         return {"error": f"Invalid section: {section}"}
 
-    chat = db.query(Chat).filter(Chat.session_id == session_id).first()
-    if not chat:
-        chat = Chat(session_id=session_id)
-        db.add(chat)
-        db.commit()
-        db.refresh(chat)
+    chat = await get_or_create_chat(db, session_id)
 
-    update_msg = Message(chat_id=chat.id, role="assistant", content=f"[Update Section] {section}: {content}")
+    update_msg = Message(chat_id=chat.id, role="assistant", content=f"{UPDATE_SECTION_PREFIX} {section}: {content}")
     db.add(update_msg)
-    db.commit()
+    await db.commit()
     logger.info(f"[UPDATE_SECTION] Session: {session_id} | Section: {section} | Content: {content[:100]}...")
 
     return {"result": f"Section '{section}' updated successfully."}
@@ -135,19 +181,40 @@ def extract_resume_content(text: str) -> str:
 
 
 @app.get("/mcp/tools/resume_agent/preview")
-def preview_resume(session_id: str = Query(DEFAULT_SESSION), db: Session = Depends(get_db)):
-    chat = db.query(Chat).filter(Chat.session_id == session_id).first()
+async def preview_resume(session_id: str = Query(DEFAULT_SESSION), db: AsyncSession = Depends(get_async_db)):
+    chat = await get_chat_by_session(db, session_id)
     if not chat:
         return {"result": "No resume data found."}
 
-    for msg in reversed(chat.messages):
-        if msg.role == "assistant" and not msg.content.startswith("[Update Section]"):
-            resume_only = extract_resume_content(msg.content)
-            return {"result": resume_only}
+    msg = await db.scalar(
+        select(Message)
+        .where(
+            Message.chat_id == chat.id,
+            Message.role == "assistant",
+            ~Message.content.startswith(UPDATE_SECTION_PREFIX),
+        )
+        .order_by(Message.id.desc())
+        .limit(1)
+    )
+    if msg:
+        return {"result": extract_resume_content(msg.content)}
 
     return {"result": "No resume data found."}
 
 
+@app.post("/mcp/tools/{tool_name}")
+async def run_tool(tool_name: str, request: Request):
+    tool = TOOL_REGISTRY.get(tool_name)
+    if tool is None:
+        return {"error": f"Unknown tool: {tool_name}"}
+    body = await request.json()
+    try:
+        return await tool(body.get("query", ""), body.get("session_id", DEFAULT_SESSION))
+    except Exception as e:
+        logger.error(f"Error in tool {tool_name}: {e}")
+        return {"error": str(e)}
+
+
 if __name__ == "__main__":
     logger.info("Starting Resume Builder MCP server...")
     uvicorn.run("mcp_host:app", host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,73 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+Databases created by the old import-time create_all already have these tables,
+so each one is only created when missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade() -> None:
+    if not _has_table("chats"):
+        op.create_table(
+            "chats",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("session_id", sa.String(), nullable=True),
+            sa.Column("title", sa.String(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_chats_id", "chats", ["id"])
+        op.create_index("ix_chats_session_id", "chats", ["session_id"], unique=True)
+
+    if not _has_table("messages"):
+        op.create_table(
+            "messages",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("chat_id", sa.Integer(), sa.ForeignKey("chats.id", ondelete="CASCADE"), nullable=True),
+            sa.Column("role", sa.String(), nullable=False),
+            sa.Column("content", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index("ix_messages_id", "messages", ["id"])
+
+    if not _has_table("resume_versions"):
+        op.create_table(
+            "resume_versions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("session_id", sa.String(), nullable=True),
+            sa.Column("name", sa.String(), nullable=True),
+            sa.Column("content", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_resume_versions_id", "resume_versions", ["id"])
+        op.create_index("ix_resume_versions_session_id", "resume_versions", ["session_id"])
+
+    if not _has_table("blobs"):
+        op.create_table(
+            "blobs",
+            sa.Column("sha256", sa.String(64), primary_key=True),
+            sa.Column("filename", sa.String(), nullable=False, unique=True),
+            sa.Column("size", sa.Integer(), nullable=False),
+            sa.Column("ref_count", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("blobs")
+    op.drop_table("resume_versions")
+    op.drop_table("messages")
+    op.drop_table("chats")
@@ -0,0 +1,29 @@
+"""hot path indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # History paging, attachment lookup and last-message previews all filter by chat and order by id.
+    op.create_index("ix_messages_chat_id_id", "messages", ["chat_id", "id"])
+    # Keyset pagination of the chat listing.
+    op.create_index("ix_chats_created_at_id", "chats", ["created_at", "id"])
+    # Version lookups filter by session and list in creation order.
+    op.drop_index("ix_resume_versions_session_id", table_name="resume_versions")
+    op.create_index("ix_resume_versions_session_id_created_at", "resume_versions", ["session_id", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_resume_versions_session_id_created_at", table_name="resume_versions")
+    op.create_index("ix_resume_versions_session_id", "resume_versions", ["session_id"])
+    op.drop_index("ix_chats_created_at_id", table_name="chats")
+    op.drop_index("ix_messages_chat_id_id", table_name="messages")
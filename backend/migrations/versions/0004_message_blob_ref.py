@@ -0,0 +1,36 @@
+"""message blob reference
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+Attachment messages now show the uploaded filename and point at their blob through
+messages.blob_sha256. Existing "[Attachment] <sha256><ext>" rows are linked to their blob.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Batch mode is a plain ALTER TABLE on PostgreSQL and a table copy on SQLite, which cannot add constraints.
+    with op.batch_alter_table("messages") as batch:
+        batch.add_column(sa.Column("blob_sha256", sa.String(64), nullable=True))
+        batch.create_foreign_key(
+            "fk_messages_blob_sha256_blobs", "blobs", ["blob_sha256"], ["sha256"], ondelete="SET NULL"
+        )
+    op.execute(
+        "UPDATE messages SET blob_sha256 = "
+        "(SELECT blobs.sha256 FROM blobs WHERE messages.content = '[Attachment] ' || blobs.filename) "
+        "WHERE content LIKE '[Attachment]%'"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("messages") as batch:
+        batch.drop_constraint("fk_messages_blob_sha256_blobs", type_="foreignkey")
+        batch.drop_column("blob_sha256")
@@ -0,0 +1,144 @@
+import asyncio
+import codecs
+import logging
+import os
+from functools import lru_cache
+from typing import List
+
+from llm import DEFAULT_MODEL, achat_with_llm
+from prompt import SYSTEM_PROMPT
+
+logger = logging.getLogger(__name__)
+
+# Total input tokens allowed for SYSTEM_PROMPT + query + attached file on a decision/fallback turn.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+# Documents above this many tokens are condensed chunk by chunk before being trimmed to the budget.
+MAP_REDUCE_CHUNK_TOKENS = int(os.getenv("MAP_REDUCE_CHUNK_TOKENS", "2000"))
+MAP_REDUCE_CONCURRENCY = int(os.getenv("MAP_REDUCE_CONCURRENCY", "4"))
+CHARS_PER_TOKEN = 4
+
+CONDENSE_PROMPT = (
+    "You are condensing part of a resume. Rewrite the excerpt as compact plain text, keeping every "
+    "name, contact detail, employer, title, date, degree, skill, project and achievement. Drop filler only."
+)
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # Encodings are downloaded on first use; offline hosts fall back to the heuristic.
+        logger.warning(f"[PROMPT BUDGET] Could not load tiktoken encoding, estimating tokens | Error: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """
+    Exact count with tiktoken when installed, otherwise the ~4 characters per token heuristic.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_MODEL) -> str:
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    # The cut can fall inside a multi-byte character; drop it rather than emit a replacement char.
+    return encoding.decode_bytes(tokens[:max_tokens]).decode("utf-8", errors="ignore")
+
+
+def _split_paragraph(paragraph: str, chunk_tokens: int, model: str) -> List[str]:
+    """
+    Cuts one paragraph into pieces of chunk_tokens on token boundaries; the pieces concatenate
+    back to exactly the paragraph. Bytes of a character split across a boundary are carried over
+    to the next piece.
+    """
+    encoding = _encoding(model)
+    if encoding is None:
+        size = chunk_tokens * CHARS_PER_TOKEN
+        return [paragraph[i:i + size] for i in range(0, len(paragraph), size)]
+    tokens = encoding.encode(paragraph)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pieces = [decoder.decode(encoding.decode_bytes(tokens[i:i + chunk_tokens]))
+              for i in range(0, len(tokens), chunk_tokens)]
+    pieces[-1] += decoder.decode(b"", final=True)
+    return pieces
+
+
+def split_into_chunks(text: str, chunk_tokens: int = MAP_REDUCE_CHUNK_TOKENS, model: str = DEFAULT_MODEL) -> List[str]:
+    """
+    Splits on paragraph boundaries, packing paragraphs into chunks of at most chunk_tokens;
+    longer paragraphs are cut on token boundaries.
+    """
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for paragraph in text.split("\n\n"):
+        tokens = count_tokens(paragraph, model)
+        if current and current_tokens + tokens > chunk_tokens:
+            chunks.append("\n\n".join(current))
+            current, current_tokens = [], 0
+        if tokens > chunk_tokens:
+            *heads, paragraph = _split_paragraph(paragraph, chunk_tokens, model)
+            chunks.extend(heads)
+            tokens = count_tokens(paragraph, model)
+        current.append(paragraph)
+        current_tokens += tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return [chunk for chunk in chunks if chunk.strip()]
+
+
+async def condense_document(text: str, session_id: str) -> str:
+    """
+    Map-reduce over an oversized document: chunks are condensed concurrently (deterministic, so
+    repeated turns are served from llm_cache) and the results are joined in document order.
+    """
+    chunks = split_into_chunks(text)
+    semaphore = asyncio.Semaphore(MAP_REDUCE_CONCURRENCY)
+
+    async def condense(chunk: str) -> str:
+        messages = [{"role": "system", "content": CONDENSE_PROMPT}, {"role": "user", "content": chunk}]
+        async with semaphore:
+            try:
+                return await achat_with_llm(messages, temperature=0) or chunk
+            except Exception as e:
+                logger.error(f"[PROMPT BUDGET] Condense failed, keeping chunk | Session: {session_id} | Error: {e}")
+                return chunk
+
+    condensed = await asyncio.gather(*(condense(chunk) for chunk in chunks))
+    logger.info(f"[PROMPT BUDGET] Condensed {len(chunks)} chunks | Session: {session_id}")
+    return "\n\n".join(condensed)
+
+
+async def fit_document(query: str, file_text: str, session_id: str, budget: int = PROMPT_TOKEN_BUDGET) -> str:
+    """
+    Returns file_text reduced to whatever budget is left after SYSTEM_PROMPT and the query.
+    """
+    available = budget - count_tokens(SYSTEM_PROMPT) - count_tokens(query)
+    file_tokens = count_tokens(file_text)
+    if file_tokens <= available:
+        return file_text
+    if file_tokens > MAP_REDUCE_CHUNK_TOKENS:
+        file_text = await condense_document(file_text, session_id)
+    fitted = truncate_to_tokens(file_text, available)
+    logger.info(
+        f"[PROMPT BUDGET] File {file_tokens} -> {count_tokens(fitted)} tokens (budget {available}) | Session: {session_id}"
+    )
+    return fitted
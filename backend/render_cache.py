@@ -0,0 +1,124 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RENDER_CACHE_SIZE = int(os.getenv("RENDER_CACHE_SIZE", "2048"))
+RENDER_CACHE_PATH = os.getenv("RENDER_CACHE_PATH")
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Content-addressed cache of rendered resume sections.
+
+    Entries are keyed by (section, input hash, section prompt hash, model), so a rebuild only has
+    to call the tools for sections whose input actually changed, and editing a tool's prompt
+    invalidates exactly that section's renders. Lookups go to an in-memory LRU, then an optional
+    SQLite tier shared by all workers (opened on first use, queried off the event loop).
+    """
+
+    def __init__(self, max_entries: int = RENDER_CACHE_SIZE, db_path: Optional[str] = RENDER_CACHE_PATH):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def key_for(section: str, section_input: str, prompt: str, model: str) -> str:
+        return f"{section}:{_sha256(section_input)}:{_sha256(prompt)[:16]}:{model}"
+
+    def _connection(self) -> sqlite3.Connection:
+        # Callers hold _db_lock.
+        if self._db is None:
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS render_cache (key TEXT PRIMARY KEY, value TEXT)")
+            self._db.commit()
+        return self._db
+
+    def _fetch_memory(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.stats["memory_hits"] += 1
+            return value
+
+    def _fetch_disk(self, key: str) -> Optional[str]:
+        if not self.db_path:
+            return None
+        try:
+            with self._db_lock:
+                row = self._connection().execute("SELECT value FROM render_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"[RENDER_CACHE] Could not read persistent store at {self.db_path}: {e}")
+            return None
+        if row is None:
+            return None
+        with self._lock:
+            self._remember(key, row[0])
+            self.stats["disk_hits"] += 1
+        return row[0]
+
+    def _write_disk(self, key: str, value: str) -> None:
+        if not self.db_path:
+            return
+        try:
+            with self._db_lock:
+                db = self._connection()
+                db.execute("INSERT OR REPLACE INTO render_cache (key, value) VALUES (?, ?)", (key, value))
+                db.commit()
+        except sqlite3.Error as e:
+            logger.error(f"[RENDER_CACHE] Could not write persistent store at {self.db_path}: {e}")
+
+    def _remember(self, key: str, value: str) -> None:
+        # Callers hold _lock.
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def lookup(self, key: str) -> Optional[str]:
+        value = self._fetch_memory(key)
+        if value is None and self.db_path:
+            value = await asyncio.to_thread(self._fetch_disk, key)
+        if value is None:
+            with self._lock:
+                self.stats["misses"] += 1
+        return value
+
+    async def store(self, key: str, value: str) -> None:
+        with self._lock:
+            self._remember(key, value)
+        if self.db_path:
+            await asyncio.to_thread(self._write_disk, key, value)
+
+    def clear(self) -> None:
+        """Blocking; for maintenance and tests, not for the event loop."""
+        with self._lock:
+            self._entries.clear()
+        if self.db_path:
+            with self._db_lock:
+                db = self._connection()
+                db.execute("DELETE FROM render_cache")
+                db.commit()
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "size": len(self._entries), "max_entries": self.max_entries}
+
+
+render_cache = RenderCache()
@@ -1,22 +1,37 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Request
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, UploadFile, File, Request, Response, Query
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import uuid4
+from pathlib import Path
+import logging
 import os
-from database.db import get_db
+from database.db import get_async_db
+from database.crud import (
+    DEFAULT_CHAT_TITLE, get_chat_by_session, get_or_create_chat, page_messages, set_chat_title_if_missing,
+)
 from database.models import Chat, Message, ResumeVersion
-from agent import call_mcp_tool, RESUME_TOOLS, session_store, DEFAULT_SESSION
+from blob_store import add_blob_ref, attachment_content, release_chat_blobs
+from documents import UPLOAD_DIR, UploadRejected, aload_attachment_text, save_upload
+from agent import assemble_resume, RESUME_TOOLS, DEFAULT_SESSION
+from session_state import UPDATE_SECTION_PREFIX, session_state
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/chats", tags=["Chats"])
 
+PREVIEW_CHARS = 120
+
 
 @router.post("/")
-def create_chat(db: Session = Depends(get_db)):
+async def create_chat(db: AsyncSession = Depends(get_async_db)):
     session_id = str(uuid4())
     new_chat = Chat(session_id=session_id)
     db.add(new_chat)
-    db.commit()
-    db.refresh(new_chat)
+    await db.commit()
+    await db.refresh(new_chat)
     return {
         "session_id": new_chat.session_id,
         "chat_id": new_chat.id,
@@ -24,51 +39,71 @@ def create_chat(db: Session = Depends(get_db)):
     }
 
 
-def generate_chat_title(messages: list[Message], max_words: int = 7) -> str:
-    title_candidates = []
+def _encode_cursor(created_at: datetime, chat_id: int) -> str:
+    return f"{created_at.isoformat()}|{chat_id}"
 
-    # Look at the first 5 messages
-    for msg in messages[:5]:
-        if msg.role == "user" and msg.content.strip():
-            title_candidates.append(msg.content.strip())
 
-    if not title_candidates:
-        return "New Chat"
-
-    first_text = " ".join(title_candidates)
-    words = first_text.split()
-    title = " ".join(words[:max_words])
-    return title + "..." if len(words) > max_words else title
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    created_at, chat_id = cursor.rsplit("|", 1)
+    return datetime.fromisoformat(created_at), int(chat_id)
 
 
 @router.get("/")
-def list_chats(db: Session = Depends(get_db)):
-    chats = db.query(Chat).all()
-    result = []
-
-    for c in chats:
-        messages = [
-            {"id": m.id, "role": m.role, "content": m.content, "created_at": m.created_at}
-            for m in c.messages
-        ]
-        title = c.title or generate_chat_title(c.messages)
-        result.append({
-            "id": c.session_id,
-            "chat_id": c.id,
-            "title": title,
-            "messages": messages,
-        })
-
-    return result
+async def list_chats(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Lists chat metadata newest-first in keyset-paginated pages; full messages come from get_chat.
+    Each page is returned oldest-to-newest, and the cursor for the next (older) page is sent in X-Next-Cursor.
+    """
+    last_message = (
+        select(func.substr(Message.content, 1, PREVIEW_CHARS))
+        .where(Message.chat_id == Chat.id)
+        .order_by(Message.id.desc())
+        .limit(1)
+        .correlate(Chat)
+        .scalar_subquery()
+    )
+    stmt = select(Chat.id, Chat.session_id, Chat.title, Chat.created_at, last_message.label("last_message"))
+    if cursor:
+        try:
+            created_at, chat_id = _decode_cursor(cursor)
+        except ValueError:
+            return JSONResponse({"error": "Invalid cursor"}, status_code=400)
+        stmt = stmt.where(tuple_(Chat.created_at, Chat.id) < tuple_(created_at, chat_id))
+    rows = (await db.execute(stmt.order_by(Chat.created_at.desc(), Chat.id.desc()).limit(limit))).all()
+
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return [
+        {
+            "id": row.session_id,
+            "chat_id": row.id,
+            "title": row.title or DEFAULT_CHAT_TITLE,
+            "created_at": row.created_at,
+            "last_message": row.last_message,
+        }
+        for row in reversed(rows)
+    ]
 
 
 @router.get("/{session_id}")
-def get_chat(session_id: str, db: Session = Depends(get_db)):
-    chat = db.query(Chat).filter(Chat.session_id == session_id).first()
+async def get_chat(
+    session_id: str,
+    before_id: Optional[int] = Query(None, description="Only return messages older than this id"),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+):
+    chat = await get_chat_by_session(db, session_id)
     if not chat:
         return {"error": "Chat not found"}
 
-    resume_version = db.query(ResumeVersion).filter(ResumeVersion.session_id == session_id).first()
+    resume_version = await db.scalar(select(ResumeVersion).where(ResumeVersion.session_id == session_id))
+    messages, next_before_id = await page_messages(db, chat.id, before_id, limit)
 
     return {
         "id": chat.session_id,
@@ -76,60 +111,74 @@ def get_chat(session_id: str, db: Session = Depends(get_db)):
         "final_resume": resume_version.content if resume_version else None,
         "messages": [
             {"id": m.id, "role": m.role, "content": m.content, "created_at": m.created_at}
-            for m in chat.messages
+            for m in messages
         ],
+        "next_before_id": next_before_id,
     }
 
 
 @router.delete("/{session_id}")
-def delete_chat(session_id: str, db: Session = Depends(get_db)):
-    chat = db.query(Chat).filter(Chat.session_id == session_id).first()
+async def delete_chat(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    chat = await get_chat_by_session(db, session_id)
     if not chat:
         return {"error": "Chat not found"}
-    db.delete(chat)
-    db.commit()
+    await release_chat_blobs(db, chat.id)
+    await db.delete(chat)
+    await db.commit()
+    await session_state.delete(session_id)
     return {"message": f"Chat {session_id} deleted successfully"}
 
 
 @router.post("/{session_id}/upload")
-async def upload_file(session_id: str, file: UploadFile = File(...), db: Session = Depends(get_db)):
-    temp_dir = "uploads"
-    os.makedirs(temp_dir, exist_ok=True)
-    file_path = os.path.join(temp_dir, f"{uuid4()}_{file.filename}")
+async def upload_file(session_id: str, file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db)):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    suffix = Path(file.filename or "").suffix.lower()
+    temp_path = UPLOAD_DIR / f"{uuid4()}{suffix}"
 
     try:
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+        digest, size = await save_upload(file, temp_path)
 
-        chat = db.query(Chat).filter(Chat.session_id == session_id).first()
-        if not chat:
-            chat = Chat(session_id=session_id)
-            db.add(chat)
-            db.commit()
-            db.refresh(chat)
+        chat = await get_or_create_chat(db, session_id)
+        # Taking the reference first holds the blob row until commit, so GC cannot reclaim the
+        # path underneath us. The file is in place before the reference is committed; if the
+        # commit fails, the untracked file is reclaimed by blob GC.
+        file_path = UPLOAD_DIR / await add_blob_ref(db, digest, suffix, size)
+        temp_path.replace(file_path)
 
+        display_name = Path(file.filename or file_path.name).name
+        set_chat_title_if_missing(chat, display_name)
         attachment_msg = Message(
             chat_id=chat.id,
             role="user",
-            content=f"[Attachment] {os.path.basename(file_path)}",
+            content=attachment_content(display_name),
+            blob_sha256=digest,
         )
         db.add(attachment_msg)
-        db.commit()
-        db.refresh(attachment_msg)
+        await db.commit()
+
+        # Extract once here so chat turns reuse the cached text instead of re-parsing the file.
+        try:
+            await aload_attachment_text(file_path, digest)
+        except Exception as e:
+            logger.error(f"[UPLOAD] Text extraction failed for {file_path}: {e!r}")
 
         return {
             "session_id": chat.session_id,
             "chat_id": chat.id,
             "message": f"File '{file.filename}' uploaded successfully.",
-            "file_path": file_path,
+            "file_path": str(file_path),
         }
 
+    except UploadRejected as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
+    finally:
+        temp_path.unlink(missing_ok=True)
 
 
 @router.post("/update_section")
-async def update_section_endpoint(request: Request, db: Session = Depends(get_db)):
+async def update_section_endpoint(request: Request, db: AsyncSession = Depends(get_async_db)):
     body = await request.json()
     section = body.get("section")
     content = body.get("content")
@@ -137,55 +186,26 @@ async def update_section_endpoint(request: Request, db: Session = Depends(get_db
 
     if section not in RESUME_TOOLS:
         return {"error": f"Invalid section: {section}"}
+    if not isinstance(content, str):
+        return JSONResponse({"error": "content must be a string"}, status_code=400)
 
-    chat = db.query(Chat).filter(Chat.session_id == session_id).first()
-    if not chat:
-        chat = Chat(session_id=session_id)
-        db.add(chat)
-        db.commit()
-        db.refresh(chat)
-
-    update_msg = Message(
+    chat = await get_or_create_chat(db, session_id)
+    db.add(Message(
         chat_id=chat.id,
         role="assistant",
-        content=f"[Update Section] {section}: {content}"
-    )
-    db.add(update_msg)
-    db.commit()
+        content=f"{UPDATE_SECTION_PREFIX} {section}: {content}"
+    ))
+    await db.commit()
 
-    if session_id not in session_store:
-        session_store[session_id] = {
-            tool: [] if tool in ["experience", "education", "skills", "projects", "achievements"] else None
-            for tool in RESUME_TOOLS
-        }
-
-    session_data = session_store[session_id]
+    # Assembly runs with no transaction open; session_state uses its own short-lived connection.
+    session_data = await session_state.apply_section(session_id, section, content, replace=True)
+    final_resume = await assemble_resume(session_data, session_id)
 
-    if section in ["experience", "education", "skills", "projects", "achievements"]:
-        session_data[section] = [content]
-    else:
-        session_data[section] = content
-
-    final_resume = ""
-    for tool_name in RESUME_TOOLS:
-        section_input = session_data.get(tool_name)
-        if not section_input:
-            continue
-        if isinstance(section_input, list):
-            for item in section_input:
-                final_resume += await call_mcp_tool(tool_name, item, session_id) + "\n\n"
-        else:
-            final_resume += await call_mcp_tool(tool_name, section_input, session_id) + "\n\n"
-
-    final_resume = final_resume.strip()
-
-    resume_version = db.query(ResumeVersion).filter(ResumeVersion.session_id == session_id).first()
+    resume_version = await db.scalar(select(ResumeVersion).where(ResumeVersion.session_id == session_id))
     if resume_version:
         resume_version.content = final_resume
     else:
-        resume_version = ResumeVersion(session_id=session_id, content=final_resume)
-        db.add(resume_version)
-
-    db.commit()
+        db.add(ResumeVersion(session_id=session_id, content=final_resume))
+    await db.commit()
 
     return {"result": final_resume}
@@ -1,14 +1,15 @@
 # routers/collaboration.py
 from fastapi import APIRouter, Request, Depends
-from sqlalchemy.orm import Session
-from database.db import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.db import get_async_db
 from database.models import ResumeVersion
 
 router = APIRouter(prefix="/collaboration", tags=["Collaboration"])
 
 
 @router.post("/save_version")
-async def save_version(request: Request, db: Session = Depends(get_db)):
+async def save_version(request: Request, db: AsyncSession = Depends(get_async_db)):
     data = await request.json()
     session_id = data.get("session_id")
     resume_name = data.get("resume_name", "Untitled Resume")
@@ -18,12 +19,16 @@ async def save_version(request: Request, db: Session = Depends(get_db)):
 
     version = ResumeVersion(session_id=session_id, name=resume_name, content=resume_text)
     db.add(version)
-    db.commit()
-    db.refresh(version)
+    await db.commit()
+    await db.refresh(version)
     return {"message": "Resume version saved", "version_id": version.id}
 
 
 @router.get("/versions/{session_id}")
-def get_versions(session_id: str, db: Session = Depends(get_db)):
-    versions = db.query(ResumeVersion).filter(ResumeVersion.session_id == session_id).all()
+async def get_versions(session_id: str, db: AsyncSession = Depends(get_async_db)):
+    versions = await db.scalars(
+        select(ResumeVersion)
+        .where(ResumeVersion.session_id == session_id)
+        .order_by(ResumeVersion.created_at)
+    )
     return {"versions": [{"id": v.id, "name": v.name, "created_at": v.created_at} for v in versions]}
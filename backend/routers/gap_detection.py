@@ -1,13 +1,13 @@
 # routers/gap_detection.py
 from fastapi import APIRouter, Request, Depends
-from sqlalchemy.orm import Session
-from agent import Runner, RESUME_AGENT, DEFAULT_SESSION
-from database.db import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from agent import Runner, DEFAULT_SESSION
+from database.db import get_async_db
 
 router = APIRouter(prefix="/gap_detection", tags=["Gap Detection"])
 
 @router.post("/analyze")
-async def analyze_gaps(request: Request, db: Session = Depends(get_db)):
+async def analyze_gaps(request: Request, db: AsyncSession = Depends(get_async_db)):
     data = await request.json()
     session_id = data.get("session_id", DEFAULT_SESSION)
     resume_text = data.get("resume_text", "")
@@ -15,5 +15,5 @@ async def analyze_gaps(request: Request, db: Session = Depends(get_db)):
         return {"error": "No resume text provided."}
 
     prompt = f"Analyze the resume for gaps and weak sections, suggest improvements, and rewrite vague bullet points into measurable impact-driven points:\n{resume_text}"
-    result = await Runner.run(RESUME_AGENT, prompt, context={"session_id": session_id}, db=db)
+    result = await Runner.run(prompt, context={"session_id": session_id}, db=db)
     return {"enhanced_resume": result["final_output"]}
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, Request, Depends
-from sqlalchemy.orm import Session
-from agent import Runner, RESUME_AGENT, DEFAULT_SESSION
-from database.db import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from agent import Runner, DEFAULT_SESSION
+from database.db import get_async_db
 
 router = APIRouter(prefix="/manual_editor", tags=["Manual Editor"])
 
 
 @router.post("/sync")
-async def manual_editor_sync(request: Request, db: Session = Depends(get_db)):
+async def manual_editor_sync(request: Request, db: AsyncSession = Depends(get_async_db)):
     data = await request.json()
     session_id = data.get("session_id", DEFAULT_SESSION)
     user_text = data.get("text", "")
@@ -15,5 +15,5 @@ async def manual_editor_sync(request: Request, db: Session = Depends(get_db)):
         return {"error": "No text provided."}
 
     prompt = f"Polish the following resume section with measurable, impact-driven bullet points:\n{user_text}"
-    result = await Runner.run(RESUME_AGENT, prompt, context={"session_id": session_id}, db=db)
+    result = await Runner.run(prompt, context={"session_id": session_id}, db=db)
     return {"polished_text": result["final_output"]}
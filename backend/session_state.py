@@ -0,0 +1,359 @@
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from dedup import find_duplicate, record_duplicate
+
+logger = logging.getLogger(__name__)
+
+# "database" and "redis" persist applied state and share it across workers, with an in-process cache
+# in front; "memory" keeps it in-process only (single worker, lost on eviction or restart).
+SESSION_STATE_BACKEND = os.getenv("SESSION_STATE_BACKEND", "database")
+SESSION_STATE_REDIS_URL = os.getenv("SESSION_STATE_REDIS_URL", os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+SESSION_STATE_TTL = int(os.getenv("SESSION_STATE_TTL", "0"))
+SESSION_STATE_MAX_RETRIES = int(os.getenv("SESSION_STATE_MAX_RETRIES", "5"))
+
+# Bounds for the in-process backend and for every session's contents.
+SESSION_CACHE_MAX_SESSIONS = int(os.getenv("SESSION_CACHE_MAX_SESSIONS", "10000"))
+SESSION_CACHE_IDLE_TTL = float(os.getenv("SESSION_CACHE_IDLE_TTL", "3600"))
+SESSION_MAX_ITEMS = int(os.getenv("SESSION_MAX_ITEMS", "50"))
+SESSION_MAX_ITEM_CHARS = int(os.getenv("SESSION_MAX_ITEM_CHARS", "20000"))
+
+RESUME_SECTIONS = ["personal_info", "summary", "experience", "education", "skills", "projects", "achievements"]
+LIST_SECTIONS = ["experience", "education", "skills", "projects", "achievements"]
+
+UPDATE_SECTION_PREFIX = "[Update Section]"
+# Session key listing the attachments (blob digests) already merged by batched extraction.
+EXTRACTED_BLOBS_KEY = "extracted_blobs"
+# Session key listing dedup.item_hash of the items batched extraction merged in; only those may skip their tool.
+EXTRACTED_ITEMS_KEY = "extracted_items"
+
+SessionData = Dict[str, Any]
+
+
+class StaleSessionState(Exception):
+    """Raised when a session was saved by someone else since it was loaded."""
+
+
+def empty_session() -> SessionData:
+    return {section: [] if section in LIST_SECTIONS else None for section in RESUME_SECTIONS}
+
+
+def set_section(session_data: SessionData, section: str, content: str, replace: bool = False,
+                dedupe: bool = True) -> Optional[str]:
+    """
+    Appends to list sections (or replaces them when replace is set) and overwrites scalar sections.
+    An item that repeats an existing one is dropped and a rewording of one (same dates, numbers,
+    degree and title words) replaces it in place; anything else is appended. Returns the
+    find_duplicate kind ("exact", "near", "flagged") or None.
+    Items are truncated to SESSION_MAX_ITEM_CHARS and list sections keep their SESSION_MAX_ITEMS newest entries.
+    """
+    content = content[:SESSION_MAX_ITEM_CHARS]
+    if section not in LIST_SECTIONS:
+        session_data[section] = content
+        return None
+    if replace:
+        session_data[section] = [content]
+        return None
+
+    items = session_data[section]
+    index, kind = find_duplicate(items, content) if dedupe else (None, None)
+    if kind == "near":
+        items[index] = content
+    elif kind != "exact":
+        items.append(content)
+        del items[:-SESSION_MAX_ITEMS]
+    return kind
+
+
+def replay_history(messages: Iterable[Tuple[str, str]], dedupe: bool = True) -> SessionData:
+    """
+    Approximates section state from (role, content) chat messages: explicit section updates are
+    replayed as-is and user messages are re-attributed with the local intent rules. LLM decisions
+    and extractions are not in the history, so this only feeds offline reports such as
+    dedup-report; live sessions are always loaded from their persisted state.
+    """
+    from intent_router import intent_router
+    session_data = empty_session()
+    for role, content in messages:
+        if role == "assistant" and content.startswith(UPDATE_SECTION_PREFIX):
+            section, _, text = content[len(UPDATE_SECTION_PREFIX):].strip().partition(": ")
+            if section in RESUME_SECTIONS:
+                set_section(session_data, section, text, replace=True)
+        elif role == "user":
+            section, confidence = intent_router.rule_match(content)
+            if section and confidence >= intent_router.threshold:
+                set_section(session_data, section, content, dedupe=dedupe)
+    return session_data
+
+
+def rendered_item_count(session_data: SessionData) -> int:
+    """Number of section tool calls a full rebuild of this state issues."""
+    return sum(
+        len(value) if isinstance(value, list) else 1
+        for value in (session_data.get(section) for section in RESUME_SECTIONS) if value
+    )
+
+
+class SessionStateBackend(ABC):
+    """
+    Versioned per-session resume state. save() only succeeds if the stored version still
+    matches the one returned by load(); update() wraps that in a bounded retry loop.
+    """
+
+    @abstractmethod
+    async def load(self, session_id: str) -> Tuple[SessionData, int]:
+        """Returns the session's state and version; unknown sessions are empty at version 0."""
+
+    @abstractmethod
+    async def save(self, session_id: str, session_data: SessionData, version: int) -> int:
+        """Stores state saved on top of version and returns the new version, or raises StaleSessionState."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Forgets a session so a deleted chat's state is not resurrected."""
+
+    async def update(self, session_id: str, mutate: Callable[[SessionData], None]) -> SessionData:
+        for attempt in range(SESSION_STATE_MAX_RETRIES):
+            session_data, version = await self.load(session_id)
+            mutate(session_data)
+            try:
+                await self.save(session_id, session_data, version)
+                return session_data
+            except StaleSessionState:
+                logger.info(f"[SESSION_STATE] Conflict, retrying | Session: {session_id} | Attempt: {attempt + 1}")
+        raise StaleSessionState(f"Could not save session {session_id} after {SESSION_STATE_MAX_RETRIES} attempts")
+
+    async def apply_section(self, session_id: str, section: str, content: str, replace: bool = False) -> SessionData:
+        """
+        update() with set_section. A merged duplicate is counted once, for the attempt that was
+        saved, not for conflicting attempts that were retried.
+        """
+        kind = None
+
+        def mutate(session_data: SessionData) -> None:
+            nonlocal kind
+            kind = set_section(session_data, section, content, replace=replace)
+
+        session_data = await self.update(session_id, mutate)
+        record_duplicate(kind)
+        return session_data
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class MemorySessionState(SessionStateBackend):
+    """
+    Bounded in-process LRU of sessions with an idle TTL.
+
+    With a store it is a write-through cache: every save goes to the store first, and sessions
+    that were evicted, expired or written by another worker are loaded back from the store exactly
+    as they were applied. Without one it is the only copy, so it only suits a single worker and an
+    evicted session starts empty.
+    """
+
+    def __init__(self, max_sessions: int = SESSION_CACHE_MAX_SESSIONS, idle_ttl: float = SESSION_CACHE_IDLE_TTL,
+                 store: Optional[SessionStateBackend] = None):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.store = store
+        # session_id -> (data, version, last access); ordered least recently used first.
+        self._sessions: "OrderedDict[str, Tuple[SessionData, int, float]]" = OrderedDict()
+        self.stats = {"hits": 0, "store_loads": 0, "lru_evictions": 0, "ttl_evictions": 0, "invalidations": 0}
+        self.store_load_seconds = 0.0
+
+    def _expire(self, now: float) -> None:
+        while self._sessions:
+            session_id, (_, _, last_access) = next(iter(self._sessions.items()))
+            if now - last_access <= self.idle_ttl:
+                break
+            del self._sessions[session_id]
+            self.stats["ttl_evictions"] += 1
+
+    def _remember(self, session_id: str, session_data: SessionData, version: int) -> None:
+        self._sessions[session_id] = (json.loads(json.dumps(session_data)), version, time.monotonic())
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats["lru_evictions"] += 1
+
+    async def load(self, session_id: str) -> Tuple[SessionData, int]:
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            session_data, version, _ = entry
+            self._sessions[session_id] = (session_data, version, now)
+            self._sessions.move_to_end(session_id)
+            self.stats["hits"] += 1
+            return json.loads(json.dumps(session_data)), version
+        if self.store is None:
+            return empty_session(), 0
+
+        started = time.perf_counter()
+        session_data, version = await self.store.load(session_id)
+        self.store_load_seconds += time.perf_counter() - started
+        self.stats["store_loads"] += 1
+        if version:
+            self._remember(session_id, session_data, version)
+        return session_data, version
+
+    async def save(self, session_id: str, session_data: SessionData, version: int) -> int:
+        if self.store is None:
+            entry = self._sessions.get(session_id)
+            if (entry[1] if entry is not None else 0) != version:
+                raise StaleSessionState(session_id)
+            new_version = version + 1
+        else:
+            try:
+                new_version = await self.store.save(session_id, session_data, version)
+            except StaleSessionState:
+                # Another worker wrote it; the retry must see their state, not our cached copy.
+                self._sessions.pop(session_id, None)
+                self.stats["invalidations"] += 1
+                raise
+        self._remember(session_id, session_data, new_version)
+        return new_version
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+        if self.store is not None:
+            await self.store.delete(session_id)
+
+    def metrics(self) -> Dict[str, Any]:
+        loads = self.stats["store_loads"]
+        lookups = self.stats["hits"] + loads
+        return {
+            **super().metrics(),
+            "store": type(self.store).__name__ if self.store is not None else None,
+            "size": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            **self.stats,
+            "hit_ratio": self.stats["hits"] / lookups if lookups else 0.0,
+            # Reload latency of a session that is not (or no longer) cached in this worker.
+            "avg_store_load_seconds": self.store_load_seconds / loads if loads else 0.0,
+        }
+
+
+class DatabaseSessionState(SessionStateBackend):
+    """
+    One compact JSON row per session in session_states, guarded by its version column.
+    Uses its own short transactions so state writes never hold the caller's turn open.
+    """
+
+    def __init__(self, session_factory: Optional[async_sessionmaker] = None):
+        self.session_factory = session_factory
+
+    def _session_factory(self):
+        if self.session_factory is not None:
+            return self.session_factory()
+        # Resolved per call so constructing the backend at import time touches nothing.
+        from database.db import AsyncSessionLocal
+        return AsyncSessionLocal()
+
+    async def load(self, session_id: str) -> Tuple[SessionData, int]:
+        from database.models import SessionState
+        async with self._session_factory() as db:
+            row = (await db.execute(
+                select(SessionState.data, SessionState.version).where(SessionState.session_id == session_id)
+            )).first()
+        if row is None:
+            return empty_session(), 0
+        return {**empty_session(), **row.data}, row.version
+
+    async def save(self, session_id: str, session_data: SessionData, version: int) -> int:
+        from database.models import SessionState
+        async with self._session_factory() as db:
+            if version == 0:
+                try:
+                    await db.execute(insert(SessionState).values(session_id=session_id, data=session_data, version=1))
+                    await db.commit()
+                except IntegrityError:
+                    # Another worker created the row since our load.
+                    raise StaleSessionState(session_id)
+                return 1
+            result = await db.execute(
+                update(SessionState)
+                .where(SessionState.session_id == session_id, SessionState.version == version)
+                .values(data=session_data, version=version + 1)
+            )
+            await db.commit()
+        if result.rowcount != 1:
+            raise StaleSessionState(session_id)
+        return version + 1
+
+    async def delete(self, session_id: str) -> None:
+        from database.models import SessionState
+        async with self._session_factory() as db:
+            await db.execute(delete(SessionState).where(SessionState.session_id == session_id))
+            await db.commit()
+
+
+class RedisSessionState(SessionStateBackend):
+    """
+    Stores each session as a hash of {data, version}; saves use WATCH/MULTI so a concurrent
+    write aborts the transaction instead of being overwritten.
+    """
+
+    def __init__(self, url: str = SESSION_STATE_REDIS_URL, ttl: int = SESSION_STATE_TTL, client=None):
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self._client = client
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"session_state:{session_id}"
+
+    async def load(self, session_id: str) -> Tuple[SessionData, int]:
+        stored = await self._client.hgetall(self._key(session_id))
+        if not stored:
+            return empty_session(), 0
+        return {**empty_session(), **json.loads(stored["data"])}, int(stored["version"])
+
+    async def save(self, session_id: str, session_data: SessionData, version: int) -> int:
+        from redis.exceptions import WatchError
+        key = self._key(session_id)
+        async with self._client.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key)
+                current = await pipe.hget(key, "version")
+                if int(current or 0) != version:
+                    raise StaleSessionState(session_id)
+                pipe.multi()
+                pipe.hset(key, mapping={"data": json.dumps(session_data), "version": version + 1})
+                if self.ttl:
+                    pipe.expire(key, self.ttl)
+                await pipe.execute()
+            except WatchError:
+                raise StaleSessionState(session_id)
+        return version + 1
+
+    async def delete(self, session_id: str) -> None:
+        await self._client.delete(self._key(session_id))
+
+
+def create_session_state(backend: str = SESSION_STATE_BACKEND) -> SessionStateBackend:
+    """
+    Durable backends are fronted by a write-through MemorySessionState cache.
+    """
+    if backend == "database":
+        return MemorySessionState(store=DatabaseSessionState())
+    if backend == "redis":
+        return MemorySessionState(store=RedisSessionState())
+    if backend != "memory":
+        logger.error(f"[SESSION_STATE] Unknown backend {backend!r}, using memory")
+    return MemorySessionState()
+
+
+session_state = create_session_state()
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls: the first caller for a key starts the work as a task and
+    later callers await the same task until it finishes. Each caller waits through a shield, so a
+    cancelled caller never cancels the shared work for the others; the work itself is cancelled only
+    once every caller waiting on it has gone away. Flights are scoped to the running event loop;
+    one instance is shared by the main loop and the tool bridge loop, so the flight table and
+    stats are only touched under a thread lock.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Tuple[int, Hashable], _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "executions": 0, "coalesced": 0, "cancelled": 0}
+
+    def _count(self, stat: str) -> None:
+        with self._lock:
+            self.stats[stat] += 1
+
+    def _forget(self, flight_key: Tuple[int, Hashable], flight: _Flight) -> None:
+        with self._lock:
+            if self._flights.get(flight_key) is flight:
+                del self._flights[flight_key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        with self._lock:
+            self.stats["calls"] += 1
+            flight = self._flights.get(flight_key)
+            if flight is None:
+                flight = _Flight(loop.create_task(fn()))
+                self._flights[flight_key] = flight
+                self.stats["executions"] += 1
+                flight.task.add_done_callback(lambda _: self._forget(flight_key, flight))
+            else:
+                self.stats["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(flight_key, flight)
+                self._count("cancelled")
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._flights)}
@@ -0,0 +1,62 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
+
+
+def _enforce_foreign_keys(dbapi_connection, _):
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """
+    Points both session factories at a fresh file-backed SQLite database with the full schema.
+    """
+    import database.db as db
+    import database.models  # noqa: F401  registers the tables on Base
+
+    path = tmp_path / "app.db"
+    engine = create_engine(f"sqlite:///{path}", poolclass=NullPool)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    event.listen(engine, "connect", _enforce_foreign_keys)
+    event.listen(async_engine.sync_engine, "connect", _enforce_foreign_keys)
+    db.Base.metadata.create_all(engine)
+
+    sync_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
+    async_factory = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(db, "SessionLocal", sync_factory)
+    monkeypatch.setattr(db, "AsyncSessionLocal", async_factory)
+    yield async_factory
+    engine.dispose()
+
+
+@pytest.fixture
+def client(sqlite_db, tmp_path, monkeypatch):
+    """
+    The FastAPI app on the SQLite fixture, run from tmp_path so uploads/ stays inside it.
+    Lifespan is not entered, so no migrations or outbound sessions are started.
+    """
+    import database.db as db
+    from mcp_host import app
+
+    async def override():
+        async with sqlite_db() as session:
+            yield session
+
+    monkeypatch.chdir(tmp_path)
+    app.dependency_overrides[db.get_async_db] = override
+    yield TestClient(app)
+    app.dependency_overrides.clear()
@@ -0,0 +1,26 @@
+def completion_payload(content: str, prompt_tokens: int = 10, completion_tokens: int = 5) -> dict:
+    """Minimal OpenAI-compatible chat completion body for stub transports."""
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-3.5-turbo",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+def make_docx(path, pages) -> None:
+    """Writes a DOCX whose pages (lists of paragraphs) are separated by hard page breaks."""
+    from docx import Document
+    doc = Document()
+    for index, paragraphs in enumerate(pages):
+        if index:
+            doc.add_page_break()
+        for text in paragraphs:
+            doc.add_paragraph(text)
+    doc.save(path)
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+import agent
+from render_cache import RenderCache
+from tools.registry import TOOL_REGISTRY
+
+
+@pytest.fixture
+def tools(monkeypatch):
+    """Fake section tools with a per-tool delay; tracks how many run at once, overall and per session."""
+    delays, running, peaks = {}, {}, {}
+
+    def fake(name):
+        async def tool(query, session_id):
+            if name in tools.failing:
+                raise RuntimeError(f"{name} is down")
+            for scope in ("all", session_id):
+                running[scope] = running.get(scope, 0) + 1
+                peaks[scope] = max(peaks.get(scope, 0), running[scope])
+            try:
+                await asyncio.sleep(delays.get(name, 0.01))
+            finally:
+                for scope in ("all", session_id):
+                    running[scope] -= 1
+            return {"result": f"<{query}>"}
+        return tool
+
+    for name in TOOL_REGISTRY:
+        monkeypatch.setitem(TOOL_REGISTRY, name, fake(name))
+    monkeypatch.setattr(agent, "TOOL_TRANSPORT", "local")
+    monkeypatch.setattr(agent, "render_cache", RenderCache(db_path=None))
+    tools.delays, tools.peaks, tools.failing = delays, peaks, set()
+    return tools
+
+
+def test_sections_come_back_in_canonical_order(tools):
+    # Later sections finish first; the output still follows RESUME_TOOLS and item order.
+    for i, name in enumerate(agent.RESUME_TOOLS):
+        tools.delays[name] = 0.01 * (len(agent.RESUME_TOOLS) - i)
+    session = {"skills": ["Python", "Go"], "summary": "Engineer", "personal_info": "Jane", "education": ["MIT"]}
+
+    resume = asyncio.run(agent.assemble_resume(session, "order"))
+    assert resume.split("\n\n") == ["<Jane>", "<Engineer>", "<MIT>", "<Python>", "<Go>"]
+
+
+def test_slow_and_failing_tools_become_tool_errors(tools, monkeypatch):
+    monkeypatch.setattr(agent, "TOOL_CALL_TIMEOUT", 0.05)
+    tools.delays["skills"] = 1
+    tools.failing.add("education")
+    session = {"summary": "Engineer", "education": ["MIT"], "skills": ["Python"]}
+
+    parts = asyncio.run(agent.assemble_resume(session, "errors")).split("\n\n")
+    assert parts[0] == "<Engineer>"
+    assert parts[1] == "[tool_error] education is down"
+    assert parts[2] == "[tool_error] skills timed out"
+
+
+def test_global_bound_caps_tool_calls_across_sessions(tools, monkeypatch):
+    monkeypatch.setattr(agent, "ASSEMBLY_CONCURRENCY", 3)
+    monkeypatch.setattr(agent, "SESSION_ASSEMBLY_CONCURRENCY", 10)
+
+    async def run():
+        await asyncio.gather(*(
+            agent.assemble_resume({"skills": [f"{sid} skill {i}" for i in range(6)]}, sid) for sid in ("g1", "g2")
+        ))
+
+    asyncio.run(run())
+    assert tools.peaks["all"] == 3
+
+
+def test_session_bound_caps_each_session(tools, monkeypatch):
+    monkeypatch.setattr(agent, "ASSEMBLY_CONCURRENCY", 10)
+    monkeypatch.setattr(agent, "SESSION_ASSEMBLY_CONCURRENCY", 2)
+
+    async def run():
+        await asyncio.gather(*(
+            agent.assemble_resume({"skills": [f"{sid} skill {i}" for i in range(6)]}, sid) for sid in ("p1", "p2")
+        ))
+
+    asyncio.run(run())
+    assert tools.peaks["p1"] == tools.peaks["p2"] == 2
+    # Both sessions progress at the same time rather than one after the other.
+    assert tools.peaks["all"] == 4
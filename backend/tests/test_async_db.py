@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+import httpx
+from fastapi.dependencies.models import Dependant
+from sqlalchemy import event, func, insert, select
+
+import database.db as db
+from database.models import Chat
+
+DB_LATENCY = 0.005
+
+
+def _dependencies(dependant: Dependant):
+    for dep in dependant.dependencies:
+        yield dep.call
+        yield from _dependencies(dep)
+
+
+def test_no_request_path_uses_the_sync_session():
+    from mcp_host import app
+    calls = {call for route in app.routes if hasattr(route, "dependant") for call in _dependencies(route.dependant)}
+    assert db.get_async_db in calls
+    assert db.get_db not in calls
+
+
+def _round_trip(_) -> int:
+    time.sleep(DB_LATENCY)
+    return 1
+
+
+def _simulate_latency(engine) -> None:
+    # Runs inside the driver, which for aiosqlite is its own thread, like a network round trip.
+    event.listen(engine, "connect", lambda conn, _: conn.create_function("round_trip", 1, _round_trip))
+
+
+def test_async_sessions_keep_the_loop_free_under_concurrency(sqlite_db):
+    """
+    Load test with a simulated DB round trip: blocking sessions serialize every request on the
+    event loop, async sessions overlap them.
+    """
+    requests, queries = 40, 3
+    with db.SessionLocal() as session:
+        session.execute(insert(Chat), [{"session_id": f"s{i}"} for i in range(requests)])
+        session.commit()
+    _simulate_latency(db.SessionLocal.kw["bind"])
+    _simulate_latency(sqlite_db.kw["bind"].sync_engine)
+    lookup = select(Chat.id).where(func.round_trip(Chat.id) == 1)
+
+    async def blocking_request(i):
+        with db.SessionLocal() as session:
+            for _ in range(queries):
+                session.execute(lookup.where(Chat.session_id == f"s{i}")).all()
+
+    async def async_request(i):
+        async with sqlite_db() as session:
+            for _ in range(queries):
+                (await session.execute(lookup.where(Chat.session_id == f"s{i}"))).all()
+
+    async def load(handler):
+        lags, done = [], asyncio.Event()
+
+        async def heartbeat():
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0)
+                lags.append(time.perf_counter() - started)
+
+        beat = asyncio.create_task(heartbeat())
+        started = time.perf_counter()
+        await asyncio.gather(*(handler(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await beat
+        return elapsed, max(lags)
+
+    blocking, blocking_lag = asyncio.run(load(blocking_request))
+    concurrent, async_lag = asyncio.run(load(async_request))
+    print(f"\n{requests} requests: blocking={requests / blocking:.0f} req/s (max loop stall {blocking_lag * 1000:.0f}ms) "
+          f"async={requests / concurrent:.0f} req/s (max loop stall {async_lag * 1000:.0f}ms)")
+    assert blocking >= requests * queries * DB_LATENCY
+    assert concurrent < blocking / 2
+    assert async_lag < blocking_lag
+
+
+def test_chat_endpoints_roundtrip_on_the_async_engine(client, sqlite_db):
+    from mcp_host import app
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            created = await asyncio.gather(*(http.post("/chats/") for _ in range(20)))
+            session_ids = [res.json()["session_id"] for res in created]
+            fetched = await asyncio.gather(*(http.get(f"/chats/{sid}") for sid in session_ids))
+            return session_ids, fetched
+
+    session_ids, fetched = asyncio.run(run())
+    assert [res.json()["id"] for res in fetched] == session_ids
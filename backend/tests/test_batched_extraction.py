@@ -0,0 +1,273 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from openai import AsyncOpenAI
+
+import agent
+import extraction
+import llm
+import llm_cache as llm_cache_module
+import prompt_budget
+import session_state
+from blob_store import Attachment, add_blob_ref, attachment_content
+from database.crud import get_or_create_chat
+from database.models import Message
+from database.schemas import ResumeBase
+from dedup import item_hash
+from extraction import EXTRACTION_PROMPT
+from render_cache import RenderCache, render_cache
+from session_state import EXTRACTED_BLOBS_KEY, EXTRACTED_ITEMS_KEY, MemorySessionState
+from tests.helpers import completion_payload
+
+STUB_LATENCY = 0.02
+
+RESUME_TEXT = "\n".join([
+    "Jane Doe, jane@example.com, +1 555 0100",
+    "Backend engineer with eight years of experience building data platforms.",
+    "Acme Corp, Senior Engineer, 2019-2024: led the migration of billing to event sourcing.",
+    "Globex, Engineer, 2016-2019: built the ingestion pipeline for 2B events a day.",
+    "BSc Computer Science, MIT, 2016",
+    "Skills: Python, Go, PostgreSQL, Kafka",
+    "Project: open-source schema registry with 2k stars",
+    "AWS Certified Solutions Architect, 2021",
+])
+EXTRACTED = {
+    "personal_info": "Jane Doe, jane@example.com, +1 555 0100",
+    "summary": "Backend engineer with eight years of experience building data platforms.",
+    "experience": ["Acme Corp, Senior Engineer, 2019-2024", "Globex, Engineer, 2016-2019"],
+    "education": ["BSc Computer Science, MIT, 2016"],
+    "skills": ["Python, Go, PostgreSQL, Kafka"],
+    "projects": ["Open-source schema registry"],
+    "achievements": ["AWS Certified Solutions Architect, 2021"],
+}
+ATTACHMENT = Attachment("ab" * 32 + ".pdf", "Jane Doe.pdf", "ab" * 32)
+
+
+class StubLLM:
+    """OpenAI-compatible transport that answers extraction from extractions and tools with their input."""
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.latency = 0.0
+        self.extractions = {RESUME_TEXT: EXTRACTED}
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        messages = json.loads(request.content)["messages"]
+        self.calls += 1
+        self.prompt_tokens += sum(prompt_budget.count_tokens(m["content"]) for m in messages)
+        await asyncio.sleep(self.latency)
+        if messages[0]["content"] == EXTRACTION_PROMPT:
+            extracted = self.extractions[messages[-1]["content"]]
+            return httpx.Response(200, json=completion_payload(json.dumps(extracted)))
+        return httpx.Response(200, json=completion_payload(f"rendered: {messages[-1]['content'][:40]}"))
+
+
+@pytest.fixture
+def turn(monkeypatch, tmp_path):
+    """Runs Runner._respond against a fresh in-memory state, a stub LLM and a fixed decision."""
+    stub = StubLLM()
+    client = AsyncOpenAI(api_key="test-key", max_retries=0,
+                         http_client=httpx.AsyncClient(transport=httpx.MockTransport(stub)))
+    state = MemorySessionState()
+    extractions, digests = [], []
+
+    async def extract(text, session_id):
+        extractions.append(text)
+        return await extraction.extract_resume(text, session_id)
+
+    async def read_attachment(path, digest=None):
+        digests.append(digest)
+        return RESUME_TEXT
+
+    monkeypatch.setattr(llm, "get_async_client", lambda: client)
+    monkeypatch.setattr(agent, "session_state", state)
+    monkeypatch.setattr(agent, "extract_resume", extract)
+    monkeypatch.setattr(agent, "aload_attachment_text", read_attachment)
+    monkeypatch.setattr(agent, "UPLOAD_DIR", tmp_path)
+    # Offline: no tiktoken encodings to download, so budgets use the character heuristic.
+    monkeypatch.setattr(prompt_budget, "_encoding", lambda model: None)
+    monkeypatch.setattr(agent, "TOOL_TRANSPORT", "local")
+    monkeypatch.setattr(agent, "get_llm", lambda: None)
+    render_cache.clear()
+
+    def run(query, decision, mode="batched", attachments=(ATTACHMENT,)):
+        for attachment in attachments:
+            (tmp_path / attachment.filename).touch()
+        monkeypatch.setattr(extraction, "RESUME_EXTRACTION_MODE", mode)
+
+        async def decide(*args):
+            return decision
+
+        async def fallback(query, session_id, llm_model):
+            return decision.get("response", "")
+
+        monkeypatch.setattr(agent, "decide_action_with_llm", decide)
+        monkeypatch.setattr(agent, "fallback_handler", fallback)
+        return asyncio.run(agent.Runner._respond(query, "s1", list(attachments)))
+
+    run.stub, run.state, run.extractions, run.digests = stub, state, extractions, digests
+    return run
+
+
+def _state(turn):
+    return asyncio.run(turn.state.load("s1"))[0]
+
+
+def test_extraction_runs_once_per_attachment_and_edits_are_applied(turn):
+    skills = {"action": "use_tool", "tool": "skills", "tool_input": "Terraform"}
+    turn("Here is my resume", {"action": "fallback", "response": "Thanks!"})
+    turn("Add Terraform to my skills", skills)
+    turn("Also Rust", {"action": "use_tool", "tool": "skills", "tool_input": "Rust"})
+
+    session = _state(turn)
+    assert len(turn.extractions) == 1
+    assert session[EXTRACTED_BLOBS_KEY] == [ATTACHMENT.sha256]
+    assert session["skills"] == ["Python, Go, PostgreSQL, Kafka", "Terraform", "Rust"]
+    assert session["experience"] == EXTRACTED["experience"]
+
+
+def test_turns_look_up_attachment_text_by_the_stored_digest(turn):
+    turn("Here is my resume", {"action": "fallback", "response": "Thanks!"}, mode="per_section")
+    assert turn.digests == [ATTACHMENT.sha256]
+
+
+def test_update_section_on_the_upload_turn_is_not_dropped(turn):
+    decision = {"action": "update_section", "section": "summary", "content": "Staff engineer focused on data."}
+    result = turn("Use this summary instead: Staff engineer focused on data.", decision)
+
+    assert len(turn.extractions) == 1
+    assert _state(turn)["summary"] == "Staff engineer focused on data."
+    assert "rendered: Staff engineer focused on data." in result
+
+
+def test_extraction_sees_the_full_document_when_the_prompt_is_trimmed(turn, monkeypatch):
+    fitted = []
+
+    async def fit(query, file_text, session_id):
+        fitted.append(file_text)
+        return file_text[:20]
+
+    monkeypatch.setattr(agent, "fit_document", fit)
+    turn("Here is my resume", {"action": "fallback", "response": "Thanks!"})
+    assert turn.extractions == [RESUME_TEXT]
+    assert fitted == [RESUME_TEXT]
+
+
+def test_a_new_attachment_is_extracted_again(turn):
+    other = Attachment("cd" * 32 + ".pdf", "v2.pdf", "cd" * 32)
+    turn("first", {"action": "fallback", "response": "ok"})
+    turn("second", {"action": "fallback", "response": "ok"}, attachments=(other,))
+    assert len(turn.extractions) == 2
+    assert _state(turn)[EXTRACTED_BLOBS_KEY] == [ATTACHMENT.sha256, other.sha256]
+
+
+def test_items_typed_in_chat_are_rendered_in_batched_mode(turn):
+    decision = {"action": "use_tool", "tool": "education", "tool_input": "MSc Data Science, Stanford, 2018"}
+    result = turn("Add my masters: MSc Data Science, Stanford, 2018", decision)
+
+    # The extracted education item is used as-is, the one typed in chat goes through its tool.
+    assert EXTRACTED["education"][0] in result.split("\n\n")
+    assert "rendered: MSc Data Science, Stanford, 2018" in result
+    assert "rendered: BSc Computer Science" not in result
+
+
+def test_merge_skips_reworded_items_and_keeps_chat_items_rendered():
+    session = session_state.empty_session()
+    session["skills"] = ["Python, Go, Postgres, Kafka"]
+    extraction.merge_extraction(session, ResumeBase(**EXTRACTED))
+
+    assert session["skills"] == ["Python, Go, Postgres, Kafka"]
+    assert session["experience"] == EXTRACTED["experience"]
+    assert item_hash("Python, Go, Postgres, Kafka") not in session[EXTRACTED_ITEMS_KEY]
+    assert item_hash(EXTRACTED["education"][0]) in session[EXTRACTED_ITEMS_KEY]
+
+
+def _sample_resume(name, employers):
+    experience = [f"{company}, Engineer, {2010 + 3 * i}-{2013 + 3 * i}" for i, company in enumerate(employers)]
+    extracted = {
+        "personal_info": f"{name}, {name.split()[0].lower()}@example.com",
+        "summary": f"{name} builds reliable backend systems.",
+        "experience": experience,
+        "education": [f"BSc Computer Science, {employers[0]} University, 2009"],
+        "skills": ["Python, Go, PostgreSQL"],
+        "projects": [f"{name.split()[0]}'s open-source job scheduler"],
+        "achievements": ["Speaker at PyCon"],
+    }
+    lines = [extracted["personal_info"], extracted["summary"]]
+    lines += [f"{item}: led a team and shipped a platform used by millions of customers." for item in experience]
+    lines += [*extracted["education"], *extracted["skills"], *extracted["projects"], *extracted["achievements"]]
+    return "\n".join(lines), extracted
+
+
+SAMPLE_RESUMES = [
+    _sample_resume("Jane Doe", ["Acme", "Globex"]),
+    _sample_resume("Ravi Patel", ["Initech", "Hooli", "Umbrella", "Stark"]),
+    _sample_resume("Ana Souza", ["Wayne", "Tyrell", "Cyberdyne", "Soylent", "Oscorp", "Aperture"]),
+]
+
+
+def test_batched_vs_per_section_through_runner(turn, sqlite_db, tmp_path, monkeypatch):
+    """
+    Benchmark of full turns through Runner.run with a stub LLM that answers in STUB_LATENCY.
+    per_section: the document goes through one section tool per turn, seven turns per resume.
+    batched: one turn extracts every section and only polishes the POLISH_SECTIONS items.
+    The decision LLM is stubbed out of both.
+    """
+    documents = {f"{i:064x}": text for i, (text, _) in enumerate(SAMPLE_RESUMES)}
+    turn.stub.extractions = {text: extracted for text, extracted in SAMPLE_RESUMES}
+    turn.stub.latency = STUB_LATENCY
+
+    async def read_attachment(path, digest=None):
+        return documents[path.stem]
+
+    monkeypatch.setattr(agent, "aload_attachment_text", read_attachment)
+    monkeypatch.setattr(llm_cache_module, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(agent.intent_router, "classify", lambda query, has_attachment=False: None)
+    monkeypatch.setattr(agent.intent_router, "decision_log", None)
+
+    async def upload(session_id, digest):
+        async with sqlite_db() as db:
+            chat = await get_or_create_chat(db, session_id)
+            (tmp_path / await add_blob_ref(db, digest, ".pdf", 1)).touch()
+            db.add(Message(chat_id=chat.id, role="user", content=attachment_content("resume.pdf"), blob_sha256=digest))
+            await db.commit()
+
+    async def run_turn(query, session_id, decision):
+        async def decide(*args):
+            return decision
+        monkeypatch.setattr(agent, "decide_action_with_llm", decide)
+        async with sqlite_db() as db:
+            return (await agent.Runner.run(query, {"session_id": session_id}, db=db))["final_output"]
+
+    async def build(mode, session_id, digest):
+        await upload(session_id, digest)
+        if mode == "per_section":
+            for section in agent.RESUME_TOOLS:
+                decision = {"action": "use_tool", "tool": section, "tool_input": documents[digest]}
+                await run_turn(f"Fill in my {section} from the attached resume", session_id, decision)
+        else:
+            summary = turn.stub.extractions[documents[digest]]["summary"]
+            await run_turn("Build my resume from the attached file", session_id,
+                           {"action": "use_tool", "tool": "summary", "tool_input": summary})
+
+    results = {}
+    for mode in ("per_section", "batched"):
+        monkeypatch.setattr(extraction, "RESUME_EXTRACTION_MODE", mode)
+        monkeypatch.setattr(agent, "render_cache", RenderCache(db_path=None))
+        turn.stub.calls = turn.stub.prompt_tokens = 0
+        started = time.perf_counter()
+        for digest in documents:
+            asyncio.run(build(mode, f"{mode}-{digest[-1]}", digest))
+        results[mode] = (turn.stub.calls, turn.stub.prompt_tokens, time.perf_counter() - started)
+
+    for mode, (calls, tokens, seconds) in results.items():
+        print(f"\n{mode:>11}: {len(documents)} resumes | LLM calls={calls} prompt tokens={tokens} "
+              f"wall={seconds * 1000:.0f}ms")
+    per_section, batched = results["per_section"], results["batched"]
+    # Call counts are reported, not compared: batched polishes list items one call each.
+    assert batched[1] < per_section[1]
+    assert batched[2] < per_section[2]
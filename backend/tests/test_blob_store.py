@@ -0,0 +1,100 @@
+import asyncio
+import os
+import time
+
+from sqlalchemy import func, select
+
+import blob_store
+import database.db as db
+from database.models import Blob, Chat, Message
+from tests.helpers import make_docx
+
+
+def _upload(client, session_id, path, name):
+    with open(path, "rb") as f:
+        return client.post(f"/chats/{session_id}/upload", files={"file": (name, f)})
+
+
+def _query(sqlite_db, stmt):
+    async def run():
+        async with sqlite_db() as session:
+            return (await session.execute(stmt)).all()
+    return asyncio.run(run())
+
+
+def test_upload_keeps_original_filename_and_shares_one_blob(client, sqlite_db, tmp_path):
+    resume = tmp_path / "source.docx"
+    make_docx(resume, [["Jane Doe", "Python developer"]])
+
+    first = _upload(client, "s1", resume, "Jane Doe Resume.docx")
+    second = _upload(client, "s2", resume, "copy.docx")
+    assert first.status_code == second.status_code == 200
+
+    rows = _query(sqlite_db, select(Message.content, Message.blob_sha256).order_by(Message.id))
+    assert [content for content, _ in rows] == ["[Attachment] Jane Doe Resume.docx", "[Attachment] copy.docx"]
+    digest = rows[0][1]
+    assert rows[1][1] == digest
+
+    assert _query(sqlite_db, select(Blob.filename, Blob.ref_count)) == [(f"{digest}.docx", 2)]
+    assert sorted(p.name for p in (tmp_path / "uploads").iterdir() if p.is_file()) == [f"{digest}.docx"]
+
+    async def attachments():
+        async with sqlite_db() as session:
+            chat_id = (await session.execute(select(Message.chat_id).limit(1))).scalar_one()
+            return await blob_store.chat_attachments(session, chat_id)
+
+    assert asyncio.run(attachments()) == [blob_store.Attachment(f"{digest}.docx", "Jane Doe Resume.docx", digest)]
+
+
+def test_add_blob_ref_inserts_then_increments(sqlite_db):
+    async def run():
+        async with sqlite_db() as session:
+            for _ in range(3):
+                assert await blob_store.add_blob_ref(session, "ab" * 32, ".PDF", 10) == "ab" * 32 + ".pdf"
+            await session.commit()
+            return await session.scalar(select(Blob.ref_count))
+
+    assert asyncio.run(run()) == 3
+
+
+def test_deleting_chats_lets_gc_reclaim_shared_blob(client, sqlite_db, tmp_path):
+    resume = tmp_path / "source.docx"
+    make_docx(resume, [["Jane Doe"]])
+    _upload(client, "s1", resume, "a.docx")
+    _upload(client, "s2", resume, "b.docx")
+    stored = next(p for p in (tmp_path / "uploads").iterdir() if p.is_file())
+
+    client.delete("/chats/s1")
+    with db.SessionLocal() as session:
+        assert blob_store.collect_garbage(session)["blobs_removed"] == 0
+    assert stored.exists()
+
+    client.delete("/chats/s2")
+    with db.SessionLocal() as session:
+        stats = blob_store.collect_garbage(session)
+    assert stats["blobs_removed"] == 1
+    assert stats["bytes_reclaimed"] == os.path.getsize(resume)
+    assert not stored.exists()
+    assert _query(sqlite_db, select(func.count()).select_from(Blob)) == [(0,)]
+
+
+def test_gc_keeps_legacy_attachment_files(sqlite_db, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    legacy, orphan = uploads / "old-resume.pdf", uploads / "stray.pdf"
+    for path in (legacy, orphan):
+        path.write_bytes(b"%PDF-1.4")
+        stale = time.time() - blob_store.ORPHAN_GRACE_SECONDS - 60
+        os.utime(path, (stale, stale))
+
+    with db.SessionLocal() as session:
+        chat = Chat(session_id="legacy")
+        session.add(chat)
+        session.flush()
+        session.add(Message(chat_id=chat.id, role="user", content="[Attachment] old-resume.pdf"))
+        session.commit()
+        stats = blob_store.collect_garbage(session)
+
+    assert stats["orphans_removed"] == 1
+    assert legacy.exists() and not orphan.exists()
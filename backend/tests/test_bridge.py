@@ -0,0 +1,92 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import agent
+import llm
+from tools.registry import TOOL_REGISTRY
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def test_bridge_stress_uses_one_loop_thread(monkeypatch):
+    """
+    Fires hundreds of concurrent sync bridge calls and reports thread count and latency percentiles.
+    """
+    calls, callers = 400, 64
+    monkeypatch.setattr(agent, "_bridge_slots", threading.BoundedSemaphore(callers))
+    loops = set()
+
+    async def slow_tool(query, session_id):
+        loops.add(asyncio.get_running_loop())
+        await asyncio.sleep(0.01)
+        return {"result": query}
+
+    monkeypatch.setitem(TOOL_REGISTRY, "skills", slow_tool)
+    bridge = agent.bridge_for("skills")
+    baseline_threads = threading.active_count()
+    peak_threads = baseline_threads
+    latencies = []
+
+    def call(i):
+        nonlocal peak_threads
+        started = time.perf_counter()
+        result = bridge(str(i), "stress")
+        latencies.append(time.perf_counter() - started)
+        peak_threads = max(peak_threads, threading.active_count())
+        return result
+
+    with ThreadPoolExecutor(max_workers=callers) as pool:
+        results = list(pool.map(call, range(calls)))
+
+    print(f"\nthreads: baseline={baseline_threads} peak={peak_threads} | latency "
+          f"p50={statistics.median(latencies) * 1000:.1f}ms p99={_percentile(latencies, 99) * 1000:.1f}ms")
+    assert results == [str(i) for i in range(calls)]
+    assert loops == {agent._get_bridge_loop()}
+    # Only the caller pool plus the single bridge loop thread; no thread per call.
+    assert peak_threads <= baseline_threads + callers + 1
+
+
+def test_saturated_bridge_fails_fast(monkeypatch):
+    monkeypatch.setattr(agent, "_bridge_slots", threading.BoundedSemaphore(2))
+    monkeypatch.setattr(agent, "BRIDGE_QUEUE_TIMEOUT", 0)
+    release = threading.Event()
+
+    async def blocked_tool(query, session_id):
+        while not release.is_set():
+            await asyncio.sleep(0.01)
+        return {"result": query}
+
+    monkeypatch.setitem(TOOL_REGISTRY, "skills", blocked_tool)
+    bridge = agent.bridge_for("skills")
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        pending = [pool.submit(bridge, str(i), "busy") for i in range(2)]
+        while agent._bridge_slots._value:
+            time.sleep(0.005)
+        started = time.perf_counter()
+        with pytest.raises(RuntimeError, match="saturated"):
+            bridge("overflow", "busy")
+        assert time.perf_counter() - started < 0.1
+        release.set()
+        assert [f.result() for f in pending] == ["0", "1"]
+
+
+def test_bridge_loop_gets_its_own_llm_client():
+    async def client_on_this_loop():
+        return llm.get_async_client()
+
+    bridge_client = asyncio.run_coroutine_threadsafe(client_on_this_loop(), agent._get_bridge_loop()).result()
+
+    async def main():
+        client = llm.get_async_client()
+        await llm.close_async_client()
+        return client
+
+    assert asyncio.run(main()) is not bridge_client
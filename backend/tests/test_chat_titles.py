@@ -0,0 +1,49 @@
+import time
+
+from sqlalchemy import insert, select
+
+import database.db as db
+from database.crud import DEFAULT_CHAT_TITLE, backfill_chat_titles, set_chat_title_if_missing
+from database.models import Chat, Message
+from tests.helpers import make_docx
+
+
+def test_title_is_taken_from_first_input_and_kept():
+    chat = Chat(session_id="s1")
+    set_chat_title_if_missing(chat, "   ")
+    assert chat.title is None
+    set_chat_title_if_missing(chat, "Please rewrite my summary for a senior data engineer role")
+    assert chat.title == "Please rewrite my summary for a senior..."
+    set_chat_title_if_missing(chat, "something else")
+    assert chat.title == "Please rewrite my summary for a senior..."
+
+
+def test_upload_names_an_untitled_chat(client, sqlite_db, tmp_path):
+    resume = tmp_path / "source.docx"
+    make_docx(resume, [["Jane Doe"]])
+    with open(resume, "rb") as f:
+        client.post("/chats/s1/upload", files={"file": ("Jane Doe CV.docx", f)})
+    assert client.get("/chats/").json()[0]["title"] == "Jane Doe CV.docx"
+
+
+def test_backfill_titles_old_chats_in_batches(sqlite_db):
+    chats = 1200
+    with db.SessionLocal() as session:
+        session.execute(insert(Chat), [{"id": i, "session_id": f"s{i}"} for i in range(1, chats + 1)])
+        session.execute(insert(Message), [
+            {"chat_id": i, "role": role, "content": f"{role} {i}"}
+            for i in range(1, chats + 1) if i % 3 for role in ("user", "assistant")
+        ])
+        session.execute(insert(Chat), [{"id": chats + 1, "session_id": "titled", "title": "Kept"}])
+        session.commit()
+
+        started = time.perf_counter()
+        updated = backfill_chat_titles(session, batch_size=250)
+        print(f"\nbackfilled {updated} titles in {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        titles = dict(session.execute(select(Chat.id, Chat.title)).all())
+    assert updated == sum(1 for i in range(1, chats + 1) if i % 3)
+    assert titles[1] == "user 1"
+    assert titles[3] is None  # no user message yet: the first one will name it
+    assert titles[chats + 1] == "Kept"
+    assert DEFAULT_CHAT_TITLE not in titles.values()
@@ -0,0 +1,169 @@
+import asyncio
+import os
+import statistics
+import time
+
+import pytest
+
+import documents
+from tests.helpers import make_docx
+
+
+@pytest.fixture(autouse=True)
+def parser_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(documents, "TEXT_CACHE_DIR", tmp_path / ".text")
+    documents.shutdown_parser_pool()
+    yield
+    documents.shutdown_parser_pool()
+
+
+def _resume_pages(count):
+    return [[f"Page {n} heading", f"Worked on project {n} with Python and SQL."] for n in range(1, count + 1)]
+
+
+def test_docx_respects_page_cap(tmp_path):
+    path = tmp_path / "cv.docx"
+    make_docx(path, _resume_pages(5))
+    text = documents.extract_text(path, max_pages=2)
+    assert "Page 2 heading" in text
+    assert "Page 3 heading" not in text
+    assert "Page 5 heading" in documents.extract_text(path, max_pages=5)
+
+
+def test_docx_without_breaks_is_capped_by_length(tmp_path, monkeypatch):
+    monkeypatch.setattr(documents, "DOCX_CHARS_PER_PAGE", 100)
+    path = tmp_path / "long.docx"
+    make_docx(path, [[f"paragraph {i} " + "x" * 40 for i in range(20)]])
+    text = documents.extract_text(path, max_pages=2)
+    assert "paragraph 0 " in text
+    assert "paragraph 19 " not in text
+
+
+def test_text_cache_is_keyed_by_page_cap(tmp_path, monkeypatch):
+    path = tmp_path / "cv.docx"
+    make_docx(path, _resume_pages(4))
+    monkeypatch.setattr(documents, "PARSE_MAX_PAGES", 1)
+    short = asyncio.run(documents.aload_attachment_text(path))
+    monkeypatch.setattr(documents, "PARSE_MAX_PAGES", 4)
+    full = asyncio.run(documents.aload_attachment_text(path))
+    assert "Page 2 heading" not in short
+    assert "Page 4 heading" in full
+
+
+def test_timed_out_parse_does_not_wedge_the_pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(documents, "PARSER_WORKERS", 1)
+    monkeypatch.setattr(documents, "PARSE_TIMEOUT", 0.5)
+    hung = tmp_path / "hung.pdf"
+    os.mkfifo(hung)  # opening a FIFO with no writer blocks the parser forever
+    good = tmp_path / "cv.docx"
+    make_docx(good, _resume_pages(2))
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(asyncio.TimeoutError):
+                await documents.aextract_text(hung)
+        return await documents.aextract_text(good)
+
+    started = time.perf_counter()
+    assert "Page 2 heading" in asyncio.run(run())
+    assert time.perf_counter() - started < 10
+
+
+def test_timed_out_parse_leaves_other_parses_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(documents, "PARSER_WORKERS", 2)
+    monkeypatch.setattr(documents, "PARSE_TIMEOUT", 0.5)
+    hung = tmp_path / "hung.pdf"
+    os.mkfifo(hung)
+    good = tmp_path / "cv.docx"
+    make_docx(good, _resume_pages(2))
+
+    async def run():
+        pool = documents.get_parser_pool()
+        results = await asyncio.gather(documents.aextract_text(hung), documents.aextract_text(good),
+                                       return_exceptions=True)
+        return results, documents.get_parser_pool() is pool
+
+    (hung_result, good_result), same_pool = asyncio.run(run())
+    assert isinstance(hung_result, documents.ParseTimeout)
+    assert "Page 2 heading" in good_result
+    # The worker freed itself; the pool was neither torn down nor replaced.
+    assert same_pool
+
+
+def test_reuploads_and_repeated_turns_parse_a_file_once(client, sqlite_db, tmp_path, monkeypatch):
+    import agent
+    import prompt_budget
+
+    parses = []
+    parse = documents.aextract_text
+
+    async def counting_parse(file_path, max_pages=None):
+        parses.append(file_path.name)
+        return await parse(file_path, max_pages)
+
+    async def decide(*args):
+        return {"action": "fallback", "response": "ok"}
+
+    async def fallback(query, session_id, llm_model):
+        return "ok"
+
+    monkeypatch.setattr(documents, "aextract_text", counting_parse)
+    monkeypatch.setattr(prompt_budget, "_encoding", lambda model: None)
+    monkeypatch.setattr(agent.intent_router, "classify", lambda query, has_attachment=False: None)
+    monkeypatch.setattr(agent.intent_router, "decision_log", None)
+    monkeypatch.setattr(agent, "decide_action_with_llm", decide)
+    monkeypatch.setattr(agent, "fallback_handler", fallback)
+    monkeypatch.setattr(agent, "get_llm", lambda: None)
+
+    resume = tmp_path / "source.docx"
+    make_docx(resume, _resume_pages(2))
+    for session_id, name in (("s1", "cv.docx"), ("s1", "cv again.docx"), ("s2", "copy.docx")):
+        with open(resume, "rb") as f:
+            assert client.post(f"/chats/{session_id}/upload", files={"file": (name, f)}).status_code == 200
+    async def turns():
+        for i in range(3):
+            async with sqlite_db() as db:
+                assert await agent.run_resume_agent(f"turn {i}", "s2", db=db) == "ok"
+
+    asyncio.run(turns())
+
+    assert len(parses) == 1
+
+
+def test_parse_benchmark_serial_vs_pool(tmp_path, monkeypatch):
+    """
+    Parses a small corpus serially and through the pool, reporting docs/sec and p99 latency.
+    """
+    monkeypatch.setattr(documents, "PARSER_WORKERS", 4)
+    corpus = []
+    for i in range(16):
+        path = tmp_path / f"resume_{i}.docx"
+        make_docx(path, _resume_pages(3 + i % 4))
+        corpus.append(path)
+
+    serial_latencies = []
+    started = time.perf_counter()
+    serial = []
+    for path in corpus:
+        t0 = time.perf_counter()
+        serial.append(documents.extract_text(path))
+        serial_latencies.append(time.perf_counter() - t0)
+    serial_seconds = time.perf_counter() - started
+
+    async def timed(path):
+        t0 = time.perf_counter()
+        text = await documents.aextract_text(path)
+        return text, time.perf_counter() - t0
+
+    async def pooled():
+        return await asyncio.gather(*(timed(path) for path in corpus))
+
+    started = time.perf_counter()
+    results = asyncio.run(pooled())
+    pool_seconds = time.perf_counter() - started
+
+    pool_latencies = [latency for _, latency in results]
+    print(f"\nserial: {len(corpus) / serial_seconds:.0f} docs/s p99={max(serial_latencies) * 1000:.1f}ms | "
+          f"pool: {len(corpus) / pool_seconds:.0f} docs/s p99={max(pool_latencies) * 1000:.1f}ms "
+          f"(median {statistics.median(pool_latencies) * 1000:.1f}ms)")
+    assert [text for text, _ in results] == serial
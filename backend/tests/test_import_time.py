@@ -0,0 +1,49 @@
+import os
+import subprocess
+import sys
+
+from tests.conftest import BACKEND_DIR
+
+# Heavy or I/O-bound dependencies that must only load on first use, never on import.
+DEFERRED_MODULES = [
+    "langchain", "langchain_openai", "fastmcp", "alembic", "pdfplumber", "docx", "tiktoken", "redis",
+]
+# Cumulative `import mcp_host` time. Most of it is fastapi and the openai SDK, which are needed anyway.
+IMPORT_BUDGET_SECONDS = 5.0
+
+NO_IO_IMPORT = f"""
+import socket, sqlite3, sys
+
+def refuse(*args, **kwargs):
+    raise AssertionError("I/O at import time")
+
+socket.socket.connect = socket.socket.connect_ex = refuse
+socket.getaddrinfo = socket.create_connection = refuse
+sqlite3.connect = refuse
+
+import mcp_host
+from routers import ats_scoring, chats, gap_detection, jd_parser, manual_editor
+
+loaded = [name for name in {DEFERRED_MODULES!r} if name in sys.modules]
+assert not loaded, f"imported eagerly: {{loaded}}"
+"""
+
+
+def _python(*args):
+    env = {**os.environ, "OPENAI_API_KEY": "test-key"}
+    return subprocess.run([sys.executable, *args], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+
+
+def test_importing_the_app_does_no_network_or_db_io():
+    result = _python("-c", NO_IO_IMPORT)
+    assert result.returncode == 0, result.stderr
+
+
+def test_import_time_budget():
+    result = _python("-X", "importtime", "-c", "import mcp_host")
+    assert result.returncode == 0, result.stderr
+    cumulative_us = next(
+        int(line.split("|")[1]) for line in result.stderr.splitlines() if line.split("|")[-1].strip() == "mcp_host"
+    )
+    print(f"\nimport mcp_host: {cumulative_us / 1e6:.2f}s cumulative")
+    assert cumulative_us / 1e6 < IMPORT_BUDGET_SECONDS
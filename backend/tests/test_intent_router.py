@@ -0,0 +1,72 @@
+import pytest
+
+from intent_router import IntentRouter
+
+
+class _Probabilities(list):
+    def argmax(self):
+        return max(range(len(self)), key=self.__getitem__)
+
+
+class StubModel:
+    """predict_proba-compatible stand-in that always picks `label` with `confidence`."""
+
+    def __init__(self, label: str, confidence: float):
+        self.classes_ = [label, "fallback"]
+        self.confidence = confidence
+        self.calls = 0
+
+    def predict_proba(self, queries):
+        self.calls += 1
+        return [_Probabilities([self.confidence, 1 - self.confidence]) for _ in queries]
+
+
+def _router(model=None) -> IntentRouter:
+    router = IntentRouter(threshold=0.8, model_path=None, decision_log=None)
+    router.model = model
+    return router
+
+
+@pytest.mark.parametrize("query", [
+    "Make my summary shorter",
+    "Remove the Google job",
+    "Delete my education section",
+    "Rewrite my experience to sound more senior",
+    "Change my phone number to 555-0100",
+    "Add Kubernetes to my skills",
+    "What skills should I list for a data role?",
+    "Is my education section too long",
+])
+def test_edit_instructions_and_questions_go_to_the_llm(query):
+    router = _router(StubModel("skills", 0.99))
+    assert router.classify(query) is None
+    assert router.model.calls == 0
+
+
+@pytest.mark.parametrize("query, tool", [
+    ("I worked at Google as a backend engineer from 2019 to 2022", "experience"),
+    ("Bachelor's in Computer Science, MIT, 2018", "education"),
+    ("My skills: Python, Go, PostgreSQL", "skills"),
+    ("AWS Certified Solutions Architect, 2021", "achievements"),
+])
+def test_declarative_content_is_routed_locally(query, tool):
+    assert _router().classify(query) == {
+        "action": "use_tool", "tool": tool, "tool_input": query, "call_immediately": True,
+    }
+
+
+def test_attachment_downgrade_applies_to_both_tiers():
+    query = "I worked at Google as a backend engineer"
+    assert _router().classify(query, has_attachment=True) is None
+    assert _router(StubModel("experience", 0.99)).classify("Google, 2019-2022, backend", has_attachment=True) is None
+    assert _router(StubModel("experience", 0.99)).classify("Google, 2019-2022, backend")["tool"] == "experience"
+
+
+def test_model_tier_only_runs_when_rules_are_not_confident():
+    model = StubModel("skills", 0.99)
+    router = _router(model)
+    assert router.classify("My skills: Python, Go")["tool"] == "skills"
+    assert model.calls == 0
+    assert router.classify("Python, Go, PostgreSQL")["tool"] == "skills"
+    assert model.calls == 1
+    assert router.metrics()["rules_hits"] == router.metrics()["model_hits"] == 1
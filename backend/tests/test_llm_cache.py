@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+from llm_cache import LLMCache
+
+
+def _messages(text: str):
+    return [{"role": "system", "content": "sys"}, {"role": "user", "content": text}]
+
+
+class CountingEmbedder:
+    """Maps texts to fixed vectors so similarity is controlled by the test."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = []
+
+    async def __call__(self, text):
+        self.calls.append(text)
+        return self.vectors[text]
+
+
+def test_exact_hits_from_memory_then_disk(tmp_path):
+    path = tmp_path / "cache.db"
+
+    async def run():
+        first = LLMCache(db_path=str(path))
+        assert await first.lookup(_messages("hi"), "m", 0) is None
+        await first.store(_messages("hi"), "m", 0, "hello", cost=0.01)
+        assert await first.lookup(_messages("  hi "), "m", 0) == "hello"
+        second = LLMCache(db_path=str(path))
+        return first.metrics(), await second.lookup(_messages("hi"), "m", 0), second.metrics()
+
+    first, value, second = asyncio.run(run())
+    assert first["memory_hits"] == first["misses"] == 1
+    assert value == "hello"
+    assert second["disk_hits"] == 1
+    assert second["dollars_saved"] == 0.01
+
+
+def test_sqlite_is_opened_lazily_and_queried_off_the_event_loop(tmp_path, monkeypatch):
+    path = tmp_path / "cache.db"
+    cache = LLMCache(db_path=str(path))
+    assert not path.exists()
+
+    threads = []
+    fetch_disk = cache._fetch_disk
+    monkeypatch.setattr(cache, "_fetch_disk", lambda key: threads.append(threading.current_thread()) or fetch_disk(key))
+
+    async def run():
+        await cache.lookup(_messages("hi"), "m", 0)
+
+    asyncio.run(run())
+    assert path.exists()
+    assert threads and threads[0] is not threading.main_thread()
+
+
+def test_semantic_tier_is_opt_in_and_scoped():
+    embedder = CountingEmbedder({"my name is Jane Doe": [1.0, 0.0], "my name is Jane Doe.": [0.999, 0.01]})
+    cache = LLMCache(embedder=embedder)
+
+    async def run():
+        await cache.store(_messages("my name is Jane Doe"), "m", 0, "Jane's answer", semantic_scope="s1")
+        return (
+            await cache.lookup(_messages("my name is Jane Doe."), "m", 0),
+            await cache.lookup(_messages("my name is Jane Doe."), "m", 0, semantic_scope="s2"),
+            await cache.lookup(_messages("my name is Jane Doe."), "m", 0, semantic_scope="s1"),
+        )
+
+    unscoped, other_session, same_session = asyncio.run(run())
+    assert unscoped is None
+    assert other_session is None
+    assert same_session == "Jane's answer"
+    assert cache.metrics()["semantic_hits"] == 1
+
+
+def test_missed_lookup_embedding_is_reused_by_store():
+    embedder = CountingEmbedder({"summary please": [0.0, 1.0]})
+    cache = LLMCache(embedder=embedder)
+
+    async def run():
+        assert await cache.lookup(_messages("summary please"), "m", 0, semantic_scope="s1") is None
+        await cache.store(_messages("summary please"), "m", 0, "ok", semantic_scope="s1")
+
+    asyncio.run(run())
+    assert embedder.calls == ["summary please"]
+
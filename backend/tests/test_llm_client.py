@@ -0,0 +1,123 @@
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, BadRequestError, OpenAI
+
+import llm
+from tests.helpers import completion_payload
+
+STUB_LATENCY = 0.05
+
+
+def _reply(request: httpx.Request) -> httpx.Response:
+    prompt = json.loads(request.content)["messages"][-1]["content"]
+    return httpx.Response(200, json=completion_payload(f"echo: {prompt}"))
+
+
+async def _async_stub(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(STUB_LATENCY)
+    return _reply(request)
+
+
+def _sync_stub(request: httpx.Request) -> httpx.Response:
+    time.sleep(STUB_LATENCY)
+    return _reply(request)
+
+
+def _async_client(handler) -> AsyncOpenAI:
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncOpenAI(api_key="test-key", http_client=http_client, max_retries=0)
+
+
+@pytest.fixture
+def stub_async_client(monkeypatch):
+    def install(handler):
+        client = _async_client(handler)
+        monkeypatch.setattr(llm, "get_async_client", lambda: client)
+        return client
+    return install
+
+
+def _messages(i: int) -> list:
+    return [{"role": "user", "content": f"request {i}"}]
+
+
+def test_achat_returns_completion_text(stub_async_client):
+    stub_async_client(_async_stub)
+    assert asyncio.run(llm.achat_with_llm(_messages(1))) == "echo: request 1"
+
+
+def test_achat_retries_transient_errors(stub_async_client, monkeypatch):
+    monkeypatch.setattr(llm, "LLM_BACKOFF_BASE", 0)
+    attempts = []
+
+    async def flaky(request):
+        attempts.append(request)
+        if len(attempts) < 3:
+            return httpx.Response(503, json={"error": {"message": "overloaded"}})
+        return _reply(request)
+
+    stub_async_client(flaky)
+    assert asyncio.run(llm.achat_with_llm(_messages(2))) == "echo: request 2"
+    assert len(attempts) == 3
+
+
+def test_achat_does_not_retry_client_errors(stub_async_client):
+    attempts = []
+
+    async def rejected(request):
+        attempts.append(request)
+        return httpx.Response(400, json={"error": {"message": "bad request"}})
+
+    stub_async_client(rejected)
+    with pytest.raises(BadRequestError):
+        asyncio.run(llm.achat_with_llm(_messages(3)))
+    assert len(attempts) == 1
+
+
+def test_async_client_is_pooled_and_reused():
+    async def build():
+        client = llm.get_async_client()
+        same = llm.get_async_client()
+        await llm.close_async_client()
+        return client, same
+
+    client, same = asyncio.run(build())
+    assert client is same
+    assert client.max_retries == 0
+
+
+def test_async_path_serves_concurrent_requests_per_worker(stub_async_client, monkeypatch):
+    """
+    Benchmark against a stub OpenAI-compatible transport: the blocking client serializes a
+    worker's requests, the async client overlaps them.
+    """
+    requests = 20
+    sync_client = OpenAI(api_key="test-key", http_client=httpx.Client(transport=httpx.MockTransport(_sync_stub)))
+    monkeypatch.setattr(llm, "get_client", lambda: sync_client)
+    stub_async_client(_async_stub)
+
+    async def blocking_worker():
+        # What the tools did before: the sync client called straight from coroutines.
+        async def one(i):
+            return llm.chat_with_llm(_messages(i))
+        return await asyncio.gather(*(one(i) for i in range(requests)))
+
+    async def async_worker():
+        return await asyncio.gather(*(llm.achat_with_llm(_messages(i)) for i in range(requests)))
+
+    started = time.perf_counter()
+    asyncio.run(blocking_worker())
+    blocking_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = asyncio.run(async_worker())
+    async_seconds = time.perf_counter() - started
+
+    print(f"\nrequests/sec per worker: blocking={requests / blocking_seconds:.0f} async={requests / async_seconds:.0f}")
+    assert results == [f"echo: request {i}" for i in range(requests)]
+    assert blocking_seconds >= requests * STUB_LATENCY
+    assert async_seconds < blocking_seconds / 4
@@ -0,0 +1,29 @@
+import sys
+
+import pytest
+
+import maintenance
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(maintenance, "upgrade_database", lambda: calls.append("migrate"))
+    monkeypatch.setattr(maintenance, "SessionLocal", lambda: type("Db", (), {"close": lambda self: None})())
+
+    def collect_garbage(db, dry_run):
+        calls.append(("gc", dry_run))
+        return {"bytes_reclaimed": 0, "blobs_removed": 0, "orphans_removed": 0}
+
+    monkeypatch.setattr(maintenance, "collect_garbage", collect_garbage)
+    return calls
+
+
+def test_only_the_migrate_command_applies_migrations(calls, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["maintenance.py", "gc-blobs", "--dry-run"])
+    maintenance.main()
+    assert calls == [("gc", True)]
+
+    monkeypatch.setattr(sys, "argv", ["maintenance.py", "migrate"])
+    maintenance.main()
+    assert calls == [("gc", True), "migrate"]
@@ -0,0 +1,60 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from database import migrate
+
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    migrate.upgrade_database(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+def _plan(engine, sql: str, **params) -> str:
+    with engine.connect() as connection:
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params).all()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_upgrade_reaches_head_and_is_idempotent(migrated_engine):
+    migrate.upgrade_database(bind=migrated_engine)
+    with migrated_engine.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0004"
+    columns = {column["name"] for column in inspect(migrated_engine).get_columns("messages")}
+    assert "blob_sha256" in columns
+
+
+@pytest.mark.parametrize("sql, index", [
+    ("SELECT id FROM messages WHERE chat_id = :c AND id < :i ORDER BY id DESC LIMIT 50", "ix_messages_chat_id_id"),
+    ("SELECT id FROM chats ORDER BY created_at DESC, id DESC LIMIT 50", "ix_chats_created_at_id"),
+    ("SELECT content FROM resume_versions WHERE session_id = :s ORDER BY created_at DESC LIMIT 1",
+     "ix_resume_versions_session_id_created_at"),
+])
+def test_hot_queries_use_their_indexes(migrated_engine, sql, index):
+    plan = _plan(migrated_engine, sql, c=1, i=100, s="s1")
+    assert index in plan
+    assert "TEMP B-TREE" not in plan
+
+
+class _RecordingConnection:
+    def __init__(self, dialect: str):
+        self.dialect = SimpleNamespace(name=dialect)
+        self.statements = []
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+
+    def commit(self):
+        pass
+
+
+def test_postgres_migrators_hold_an_advisory_lock():
+    connection = _RecordingConnection("postgresql")
+    with migrate.migration_lock(connection):
+        assert connection.statements == ["SELECT pg_advisory_lock(:key)"]
+    assert connection.statements[-1] == "SELECT pg_advisory_unlock(:key)"
+
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import pytest
+
+import prompt_budget
+from prompt import SYSTEM_PROMPT
+
+STUB_LATENCY = 0.05
+PAGE = "\n\n".join(
+    f"Staff Engineer — Zürich, 20{i:02d}. Led the café-ordering platform rewrite, cut p99 latency by 40% "
+    f"and mentored six engineers across three time zones; owned on-call, hiring loops and the roadmap."
+    for i in range(12)
+)
+
+
+class ByteEncoding:
+    """tiktoken stand-in whose 3-byte tokens regularly split multi-byte characters."""
+
+    def encode(self, text):
+        data = text.encode("utf-8")
+        return [data[i:i + 3] for i in range(0, len(data), 3)]
+
+    def decode_bytes(self, tokens):
+        return b"".join(tokens)
+
+
+@pytest.fixture
+def byte_encoding(monkeypatch):
+    encoding = ByteEncoding()
+    monkeypatch.setattr(prompt_budget, "_encoding", lambda model: encoding)
+    return encoding
+
+
+def test_long_paragraph_splits_without_losing_text(byte_encoding):
+    paragraph = " ".join(["Résumé ✓ naïve café 😀"] * 40)
+    chunks = prompt_budget.split_into_chunks(paragraph, chunk_tokens=7)
+    assert "".join(chunks) == paragraph
+    assert all("�" not in chunk for chunk in chunks)
+
+
+def test_chunks_keep_every_paragraph_in_order(byte_encoding):
+    chunks = prompt_budget.split_into_chunks(PAGE, chunk_tokens=100)
+    assert len(chunks) > 1
+    assert "\n\n".join(chunks) == PAGE
+
+
+def test_truncation_drops_a_split_character(byte_encoding):
+    assert prompt_budget.truncate_to_tokens("abñ", 1) == "ab"
+
+
+def test_missing_encoding_falls_back_to_heuristic(monkeypatch):
+    monkeypatch.setattr(prompt_budget, "_encoding", lambda model: None)
+    chunks = prompt_budget.split_into_chunks("x" * 50, chunk_tokens=5)
+    assert chunks == ["x" * 20, "x" * 20, "x" * 10]
+
+
+def test_prompt_tokens_and_latency_by_document_size(byte_encoding, monkeypatch):
+    """
+    Benchmark of prompt tokens per turn and fit_document latency for 1-, 5- and 20-page
+    documents against a stub LLM that condenses each chunk to a quarter of its length.
+    """
+    calls = []
+
+    async def stub_llm(messages, **kwargs):
+        calls.append(messages)
+        await asyncio.sleep(STUB_LATENCY)
+        chunk = messages[-1]["content"]
+        return chunk[:len(chunk) // 4]
+
+    monkeypatch.setattr(prompt_budget, "achat_with_llm", stub_llm)
+    query = "Please tailor my experience section for a staff backend role."
+
+    for pages in (1, 5, 20):
+        document = "\n\n".join([PAGE] * pages)
+        calls.clear()
+        started = time.perf_counter()
+        fitted = asyncio.run(prompt_budget.fit_document(query, document, "bench"))
+        elapsed = time.perf_counter() - started
+        sent = sum(prompt_budget.count_tokens(text) for text in (SYSTEM_PROMPT, query, fitted))
+        print(f"\n{pages:>2} pages: document={prompt_budget.count_tokens(document)} tokens "
+              f"-> prompt={sent} tokens/turn | condense calls={len(calls)} | latency={elapsed * 1000:.0f}ms")
+        assert sent <= prompt_budget.PROMPT_TOKEN_BUDGET
+        if calls:
+            # Chunks are condensed concurrently, MAP_REDUCE_CONCURRENCY at a time.
+            waves = -(-len(calls) // prompt_budget.MAP_REDUCE_CONCURRENCY)
+            assert elapsed < (waves + 1) * STUB_LATENCY + 0.5
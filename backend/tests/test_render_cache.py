@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import agent
+from render_cache import RenderCache
+from tools.registry import TOOL_PROMPTS, TOOL_REGISTRY
+
+
+def test_lookup_misses_then_hits_memory_and_disk(tmp_path):
+    path = str(tmp_path / "render.db")
+    cache = RenderCache(db_path=path)
+    key = RenderCache.key_for("skills", "Python", "prompt", "model")
+
+    async def run():
+        assert await cache.lookup(key) is None
+        await cache.store(key, "- Python")
+        assert await cache.lookup(key) == "- Python"
+        # Another worker opening the same file is served from the SQLite tier.
+        return await RenderCache(db_path=path).lookup(key)
+
+    assert asyncio.run(run()) == "- Python"
+    assert cache.metrics()["misses"] == 1
+    assert cache.metrics()["memory_hits"] == 1
+
+
+def test_key_changes_with_input_prompt_and_model():
+    base = RenderCache.key_for("skills", "Python", "prompt", "model")
+    assert RenderCache.key_for("skills", "Python", "prompt", "model") == base
+    assert len({
+        base,
+        RenderCache.key_for("skills", "Go", "prompt", "model"),
+        RenderCache.key_for("skills", "Python", "new prompt", "model"),
+        RenderCache.key_for("skills", "Python", "prompt", "other-model"),
+        RenderCache.key_for("summary", "Python", "prompt", "model"),
+    }) == 5
+
+
+@pytest.fixture
+def counted_tools(monkeypatch):
+    """Every section tool echoes its input and counts its calls; renders go to a fresh cache."""
+    calls = {}
+
+    def fake(name):
+        async def tool(query, session_id):
+            calls[name] = calls.get(name, 0) + 1
+            return {"result": f"{name}: {query}"}
+        return tool
+
+    for name in TOOL_REGISTRY:
+        monkeypatch.setitem(TOOL_REGISTRY, name, fake(name))
+    monkeypatch.setattr(agent, "TOOL_TRANSPORT", "local")
+    monkeypatch.setattr(agent, "render_cache", RenderCache(db_path=None))
+    return calls
+
+
+def _session(summary="Backend engineer"):
+    return {"summary": summary, "skills": ["Python", "Go"], "education": ["BSc Computer Science, MIT"]}
+
+
+def test_only_the_changed_section_rerenders(counted_tools):
+    async def run():
+        await agent.assemble_resume(_session(), "s1")
+        counted_tools.clear()
+        return await agent.assemble_resume(_session("Staff backend engineer"), "s1")
+
+    resume = asyncio.run(run())
+    assert counted_tools == {"summary": 1}
+    assert resume.startswith("summary: Staff backend engineer")
+
+
+def test_changing_a_tool_prompt_invalidates_only_its_section(counted_tools, monkeypatch):
+    async def run():
+        await agent.assemble_resume(_session(), "s1")
+        counted_tools.clear()
+        monkeypatch.setitem(TOOL_PROMPTS, "skills", TOOL_PROMPTS["skills"] + " Group them by category.")
+        await agent.assemble_resume(_session(), "s1")
+
+    asyncio.run(run())
+    assert counted_tools == {"skills": 2}
@@ -0,0 +1,150 @@
+import asyncio
+import time
+import tracemalloc
+from typing import Dict, Tuple
+
+from session_state import (
+    EXTRACTED_BLOBS_KEY, DatabaseSessionState, MemorySessionState, SessionData, SessionStateBackend,
+    StaleSessionState, empty_session, set_section,
+)
+
+MB = 1024 * 1024
+
+
+class VersionStore(SessionStateBackend):
+    """Durable-store stand-in that keeps only versions, for durability checks without a database."""
+
+    def __init__(self):
+        self.versions: Dict[str, int] = {}
+
+    async def load(self, session_id: str) -> Tuple[SessionData, int]:
+        return empty_session(), self.versions.get(session_id, 0)
+
+    async def save(self, session_id: str, session_data: SessionData, version: int) -> int:
+        if self.versions.get(session_id, 0) != version:
+            raise StaleSessionState(session_id)
+        self.versions[session_id] = version + 1
+        return version + 1
+
+    async def delete(self, session_id: str) -> None:
+        self.versions.pop(session_id, None)
+
+
+class SinkStore(VersionStore):
+    """Accepts every write and keeps nothing, so traced memory during the soak is the cache's own."""
+
+    async def save(self, session_id: str, session_data: SessionData, version: int) -> int:
+        return version + 1
+
+
+def _turn(i: int):
+    def apply(data):
+        set_section(data, "summary", f"Summary for session {i} " + "x" * 200)
+        set_section(data, "skills", f"Skill {i}")
+    return apply
+
+
+def test_soak_100k_sessions_keeps_the_cache_bounded():
+    """
+    Soak: 100k distinct sessions through a 2k-entry cache. Memory stays flat at the cache bound
+    instead of growing with the number of sessions ever seen.
+    """
+    sessions, bound = 100_000, 2_000
+    cache = MemorySessionState(max_sessions=bound, store=SinkStore())
+
+    async def run():
+        started = time.perf_counter()
+        for i in range(sessions):
+            await cache.update(f"s{i}", _turn(i))
+            if i == bound * 2:
+                # The cache is full and churning from here on; nothing should accumulate.
+                warm = tracemalloc.get_traced_memory()[0]
+        return tracemalloc.get_traced_memory()[0] - warm, time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        growth, elapsed = asyncio.run(run())
+    finally:
+        tracemalloc.stop()
+    metrics = cache.metrics()
+    print(f"\n{sessions} sessions in {elapsed:.1f}s | cache size {metrics['size']} | "
+          f"memory growth after warm-up {growth / MB:.2f} MB | evictions {metrics['lru_evictions']}")
+    assert metrics["size"] == bound
+    assert metrics["lru_evictions"] == sessions - bound
+    assert growth < 1 * MB
+
+
+def test_evicted_sessions_reload_exactly_what_was_applied(sqlite_db):
+    store = DatabaseSessionState(sqlite_db)
+    cache = MemorySessionState(max_sessions=2, store=store)
+
+    def llm_decided(data):
+        # Content the regex rules would never re-attribute from the raw chat history.
+        set_section(data, "experience", "Acme Corp, Staff Engineer, 2020-2024")
+        set_section(data, "summary", "Rewritten by the model")
+        data.setdefault(EXTRACTED_BLOBS_KEY, []).append("ab" * 32)
+
+    async def run():
+        await cache.update("s0", llm_decided)
+        expected = (await cache.load("s0"))[0]
+        for i in range(1, 5):
+            await cache.update(f"s{i}", _turn(i))
+        evicted = await cache.load("s0")
+        restarted = await MemorySessionState(store=store).load("s0")
+        return expected, evicted, restarted
+
+    expected, evicted, restarted = asyncio.run(run())
+    assert cache.metrics()["lru_evictions"] >= 3
+    assert evicted == restarted == (expected, 1)
+    assert expected["experience"] == ["Acme Corp, Staff Engineer, 2020-2024"]
+
+
+def test_write_by_another_worker_invalidates_the_cached_copy(sqlite_db):
+    store = DatabaseSessionState(sqlite_db)
+    first, second = MemorySessionState(store=store), MemorySessionState(store=store)
+
+    async def run():
+        await first.update("s1", lambda data: set_section(data, "skills", "Python"))
+        await second.update("s1", lambda data: set_section(data, "skills", "Go"))
+        # first still caches version 1; its save conflicts, drops the entry and retries from the store.
+        return await first.update("s1", lambda data: set_section(data, "skills", "Rust"))
+
+    assert asyncio.run(run())["skills"] == ["Python", "Go", "Rust"]
+    assert first.metrics()["invalidations"] == 1
+
+
+def test_idle_sessions_expire_from_the_cache_but_not_the_store():
+    store = VersionStore()
+    cache = MemorySessionState(idle_ttl=0, store=store)
+
+    async def run():
+        await cache.update("s1", _turn(1))
+        time.sleep(0.01)
+        return await cache.load("s2"), cache.metrics()
+
+    _, metrics = asyncio.run(run())
+    assert metrics["ttl_evictions"] == 1 and metrics["size"] == 0
+    assert store.versions == {"s1": 1}
+
+
+class SlowStore(VersionStore):
+    async def load(self, session_id: str) -> Tuple[SessionData, int]:
+        await asyncio.sleep(0.02)
+        return await super().load(session_id)
+
+
+def test_store_reload_latency_is_reported(client, monkeypatch):
+    import mcp_host
+    cache = MemorySessionState(store=SlowStore())
+
+    async def run():
+        await cache.update("s1", _turn(1))
+        await cache.load("s1")
+
+    asyncio.run(run())
+    metrics = cache.metrics()
+    assert (metrics["store_loads"], metrics["hits"]) == (1, 1)
+    assert metrics["avg_store_load_seconds"] >= 0.02
+
+    monkeypatch.setattr(mcp_host, "session_state", cache)
+    assert client.get("/metrics").json()["session_state"]["avg_store_load_seconds"] >= 0.02
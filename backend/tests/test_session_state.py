@@ -0,0 +1,197 @@
+import asyncio
+import multiprocessing
+
+import fakeredis
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+import database.db as db
+import database.models  # noqa: F401  registers the tables on Base
+import dedup
+import session_state
+from session_state import (
+    DatabaseSessionState, MemorySessionState, RedisSessionState, SessionStateBackend, StaleSessionState, set_section,
+)
+
+WORKERS = 4
+UPDATES_PER_WORKER = 15
+
+
+def test_backend_contract_is_abstract():
+    with pytest.raises(TypeError):
+        SessionStateBackend()
+
+    class Partial(SessionStateBackend):
+        async def load(self, session_id):
+            return {}, 0
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def _append(worker: int, i: int):
+    return lambda data: set_section(data, "skills", f"worker {worker} skill {i}", dedupe=False)
+
+
+def _load(backend, session_id):
+    return asyncio.run(backend.load(session_id))
+
+
+async def _hammer(backend: SessionStateBackend, worker: int) -> None:
+    for i in range(UPDATES_PER_WORKER):
+        await backend.update("shared", _append(worker, i))
+
+
+def _database_worker(path: str, worker: int) -> None:
+    """One 'uvicorn worker': its own process, engine and backend over the shared database file."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool, connect_args={"timeout": 30})
+    backend = DatabaseSessionState(async_sessionmaker(bind=engine, expire_on_commit=False))
+
+    async def run():
+        await _hammer(backend, worker)
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+def test_database_backend_is_consistent_across_worker_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(session_state, "SESSION_STATE_MAX_RETRIES", 1000)
+    monkeypatch.setattr(session_state, "SESSION_MAX_ITEMS", WORKERS * UPDATES_PER_WORKER)
+    path = tmp_path / "state.db"
+    db.Base.metadata.create_all(create_engine(f"sqlite:///{path}"))
+
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=_database_worker, args=(str(path), w)) for w in range(WORKERS)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=120)
+    assert [process.exitcode for process in processes] == [0] * WORKERS
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    data, version = _load(DatabaseSessionState(async_sessionmaker(bind=engine)), "shared")
+    assert version == WORKERS * UPDATES_PER_WORKER
+    assert sorted(data["skills"]) == sorted(
+        f"worker {w} skill {i}" for w in range(WORKERS) for i in range(UPDATES_PER_WORKER)
+    )
+
+
+def test_redis_backend_is_consistent_across_workers(monkeypatch):
+    monkeypatch.setattr(session_state, "SESSION_STATE_MAX_RETRIES", 1000)
+    monkeypatch.setattr(session_state, "SESSION_MAX_ITEMS", WORKERS * UPDATES_PER_WORKER)
+    server = fakeredis.FakeServer()
+
+    async def run():
+        # One client per worker, all talking to the same server.
+        workers = [
+            RedisSessionState(client=fakeredis.FakeAsyncRedis(server=server, decode_responses=True))
+            for _ in range(WORKERS)
+        ]
+        await asyncio.gather(*(_hammer(backend, w) for w, backend in enumerate(workers)))
+        return await workers[0].load("shared")
+
+    data, version = asyncio.run(run())
+    assert version == WORKERS * UPDATES_PER_WORKER
+    assert len(set(data["skills"])) == WORKERS * UPDATES_PER_WORKER
+
+
+def test_stale_first_save_is_rejected(sqlite_db):
+    backend = DatabaseSessionState(sqlite_db)
+
+    async def run():
+        await backend.save("s1", {"skills": ["a"]}, 0)
+        with pytest.raises(StaleSessionState):
+            await backend.save("s1", {"skills": ["b"]}, 0)
+        return await backend.load("s1")
+
+    data, version = asyncio.run(run())
+    assert (data["skills"], version) == (["a"], 1)
+
+
+@pytest.mark.parametrize("make_backend", [
+    lambda factory: MemorySessionState(),
+    lambda factory: DatabaseSessionState(factory),
+    lambda factory: RedisSessionState(client=fakeredis.FakeAsyncRedis(decode_responses=True)),
+])
+def test_deleting_a_chat_deletes_its_state(client, sqlite_db, monkeypatch, make_backend):
+    import routers.chats as chats
+    backend = make_backend(sqlite_db)
+    monkeypatch.setattr(chats, "session_state", backend)
+
+    async def assemble(session_data, session_id, **kwargs):
+        return "# Resume"
+
+    monkeypatch.setattr(chats, "assemble_resume", assemble)
+
+    async def seed():
+        await backend.update("s1", lambda data: set_section(data, "skills", "Python"))
+
+    asyncio.run(seed())
+    client.post("/chats/update_section", json={"session_id": "s1", "section": "summary", "content": "Hi"})
+    assert client.delete("/chats/s1").json() == {"message": "Chat s1 deleted successfully"}
+    assert _load(backend, "s1") == (session_state.empty_session(), 0)
+
+
+
+def test_reworded_entry_replaces_the_original():
+    data = session_state.empty_session()
+    set_section(data, "experience", "Software Engineer at Acme Corp, 2019-2022: built billing services in Go")
+    assert set_section(data, "experience", "Software Engineer at Acme Corp, 2019-2023: built billing services in Go") == "near"
+    # A promotion at the same company has another title and start year, so it is a separate entry.
+    assert set_section(data, "experience", "Senior Software Engineer at Acme Corp, 2022-2024") is None
+    assert data["experience"] == [
+        "Software Engineer at Acme Corp, 2019-2023: built billing services in Go",
+        "Senior Software Engineer at Acme Corp, 2022-2024",
+    ]
+
+
+@pytest.mark.parametrize("section, first, second", [
+    ("education", "BSc Computer Science, MIT", "MSc Computer Science, MIT"),
+    ("experience", "Software Engineer at Google", "Senior Software Engineer at Google"),
+    ("achievements", "Won 1st place at HackMIT 2019", "Won 2nd place at HackMIT 2019"),
+    ("skills", "Python", "Python 3"),
+    ("achievements", "AWS Certified Solutions Architect - Associate", "AWS Certified Solutions Architect - Professional"),
+    ("experience", "Software Engineer at Google, 2018-2021: built the ads ranking pipeline",
+     "Software Engineer at Google, 2018-2021: built the search indexing service"),
+    ("projects", "Built a todo app in React", "Built a chat app in React"),
+])
+def test_similar_but_distinct_entries_are_both_kept(section, first, second):
+    data = session_state.empty_session()
+    set_section(data, section, first)
+    assert set_section(data, section, second) in (None, "flagged")
+    assert data[section] == [first, second]
+
+
+def test_exact_repeat_is_dropped():
+    data = session_state.empty_session()
+    set_section(data, "skills", "Python, Go")
+    assert set_section(data, "skills", "python,  go.") == "exact"
+    assert data["skills"] == ["Python, Go"]
+
+
+def test_duplicates_are_counted_once_per_saved_update(monkeypatch):
+    monkeypatch.setattr(dedup, "dedup_stats", {"exact_duplicates": 0, "near_duplicates": 0, "flagged_similar": 0})
+
+    class Contended(MemorySessionState):
+        conflicts = 2
+
+        async def save(self, session_id, session_data, version):
+            if self.conflicts:
+                self.conflicts -= 1
+                raise StaleSessionState(session_id)
+            return await super().save(session_id, session_data, version)
+
+    backend = Contended()
+
+    async def run():
+        backend.conflicts = 0
+        await backend.apply_section("s1", "skills", "Python, Go, PostgreSQL")
+        backend.conflicts = 2
+        return await backend.apply_section("s1", "skills", "Python, Go, Postgres")
+
+    assert asyncio.run(run())["skills"] == ["Python, Go, Postgres"]
+    assert dedup.dedup_metrics() == {
+        "exact_duplicates": 0, "near_duplicates": 1, "flagged_similar": 0, "merged_items_total": 1,
+    }
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flight = SingleFlight("test")
+    executions = []
+
+    async def work():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return "done"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert asyncio.run(run()) == ["done"] * 5
+    assert len(executions) == 1
+    assert flight.metrics() == {"calls": 5, "executions": 1, "coalesced": 4, "cancelled": 0, "in_flight": 0}
+
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight("test")
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(run()) == "done"
+    assert flight.metrics()["cancelled"] == 0
+
+
+def test_one_instance_is_safe_across_event_loop_threads():
+    flight = SingleFlight("test")
+    threads, rounds, keys = 4, 200, 8
+    errors = []
+
+    async def work(key):
+        await asyncio.sleep(0)
+        return key
+
+    async def hammer():
+        for _ in range(rounds):
+            results = await asyncio.gather(*(flight.do(k % keys, lambda k=k: work(k % keys)) for k in range(keys * 2)))
+            assert results == [k % keys for k in range(keys * 2)]
+
+    def run():
+        try:
+            asyncio.run(hammer())
+        except Exception as e:
+            errors.append(e)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    metrics = flight.metrics()
+    assert errors == []
+    assert metrics["in_flight"] == 0
+    assert metrics["calls"] == threads * rounds * keys * 2
+    assert metrics["executions"] + metrics["coalesced"] == metrics["calls"]
@@ -0,0 +1,111 @@
+import asyncio
+import time
+
+from aiohttp import web
+
+import agent
+from tools.registry import TOOL_REGISTRY
+
+
+async def _echo_tool(query: str, session_id: str) -> dict:
+    return {"result": f"{session_id}:{query}"}
+
+
+def test_registry_covers_every_resume_tool():
+    assert set(TOOL_REGISTRY) == set(agent.RESUME_TOOLS)
+    assert all(asyncio.iscoroutinefunction(tool) for tool in TOOL_REGISTRY.values())
+
+
+def test_local_dispatch_calls_tool_in_process(monkeypatch):
+    monkeypatch.setitem(TOOL_REGISTRY, "skills", _echo_tool)
+    monkeypatch.setattr(agent, "TOOL_TRANSPORT", "local")
+    assert asyncio.run(agent.call_mcp_tool("skills", "python", "s1")) == "s1:python"
+
+
+def test_unknown_tool_is_reported_as_tool_error(monkeypatch):
+    monkeypatch.setattr(agent, "TOOL_TRANSPORT", "local")
+    assert asyncio.run(agent.call_mcp_tool("nope", "x", "s1")).startswith("[tool_error]")
+
+
+async def _serve_registry() -> web.AppRunner:
+    async def handle(request: web.Request) -> web.Response:
+        body = await request.json()
+        return web.json_response(await TOOL_REGISTRY[request.match_info["tool"]](body["query"], body["session_id"]))
+
+    app = web.Application()
+    app.router.add_post("/mcp/tools/{tool}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    return runner
+
+
+def test_dispatch_overhead_local_vs_remote(monkeypatch):
+    """
+    Microbenchmark of per-call dispatch overhead with a no-op tool in both transports.
+    """
+    calls = 200
+    monkeypatch.setitem(TOOL_REGISTRY, "skills", _echo_tool)
+
+    async def measure(transport: str) -> float:
+        monkeypatch.setattr(agent, "TOOL_TRANSPORT", transport)
+        started = time.perf_counter()
+        for i in range(calls):
+            assert await agent.call_mcp_tool("skills", str(i), "bench") == f"bench:{i}"
+        return (time.perf_counter() - started) / calls
+
+    async def run():
+        runner = await _serve_registry()
+        port = runner.addresses[0][1]
+        monkeypatch.setattr(agent, "MCP_HOST", f"http://127.0.0.1:{port}/mcp/tools")
+        await agent.open_http_session()
+        try:
+            return await measure("local"), await measure("remote")
+        finally:
+            await agent.close_http_session()
+            await runner.cleanup()
+
+    local, remote = asyncio.run(run())
+    print(f"\ndispatch overhead per call: local={local * 1e6:.0f}us remote={remote * 1e6:.0f}us")
+    assert local < remote
+
+
+def test_lifespan_session_is_shared_and_reuses_connections(monkeypatch):
+    monkeypatch.setitem(TOOL_REGISTRY, "skills", _echo_tool)
+    monkeypatch.setattr(agent, "TOOL_TRANSPORT", "remote")
+    monkeypatch.setattr(agent, "http_stats", dict.fromkeys(agent.http_stats, 0))
+
+    async def run():
+        runner = await _serve_registry()
+        monkeypatch.setattr(agent, "MCP_HOST", f"http://127.0.0.1:{runner.addresses[0][1]}/mcp/tools")
+        session = await agent.open_http_session()
+        try:
+            assert await agent.open_http_session() is session
+            for i in range(5):
+                assert await agent.call_mcp_tool("skills", str(i), "s1") == f"s1:{i}"
+            assert agent._http_session is session and not session.closed
+        finally:
+            await agent.close_http_session()
+            await runner.cleanup()
+        assert session.closed and agent._http_session is None and agent._http_session_loop is None
+
+    asyncio.run(run())
+    assert agent.http_stats == {"requests": 5, "connections_created": 1, "connections_reused": 4}
+
+
+def test_calls_outside_the_lifespan_loop_use_a_private_session(monkeypatch):
+    monkeypatch.setitem(TOOL_REGISTRY, "skills", _echo_tool)
+    monkeypatch.setattr(agent, "TOOL_TRANSPORT", "remote")
+    monkeypatch.setattr(agent, "http_stats", dict.fromkeys(agent.http_stats, 0))
+
+    async def run():
+        runner = await _serve_registry()
+        monkeypatch.setattr(agent, "MCP_HOST", f"http://127.0.0.1:{runner.addresses[0][1]}/mcp/tools")
+        try:
+            for i in range(3):
+                assert await agent.call_mcp_tool("skills", str(i), "s1") == f"s1:{i}"
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+    assert agent.http_stats == {"requests": 3, "connections_created": 3, "connections_reused": 0}
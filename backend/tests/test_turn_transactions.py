@@ -0,0 +1,213 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import event, func, select
+
+import agent
+import database.db as db_module
+import routers.chats as chats
+from database.crud import DEFAULT_CHAT_TITLE, import_chat_history
+from database.models import Chat, Message, ResumeVersion
+
+
+class PoolWatch:
+    """Tracks connections checked out of an engine's pool and commits on its sessions."""
+
+    def __init__(self, engine):
+        self.checked_out = 0
+        self.commits = 0
+        event.listen(engine.pool, "checkout", self._checkout)
+        event.listen(engine.pool, "checkin", self._checkin)
+        event.listen(engine, "commit", self._commit)
+
+    def _checkout(self, *args):
+        self.checked_out += 1
+
+    def _checkin(self, *args):
+        self.checked_out -= 1
+
+    def _commit(self, *args):
+        self.commits += 1
+
+
+@pytest.fixture
+def watch(sqlite_db):
+    return PoolWatch(sqlite_db.kw["bind"].sync_engine)
+
+
+def _messages(sqlite_db, session_id):
+    async def run():
+        async with sqlite_db() as db:
+            return (await db.execute(
+                select(Message.role, Message.content).join(Chat).where(Chat.session_id == session_id)
+                .order_by(Message.id)
+            )).all()
+    return asyncio.run(run())
+
+
+def test_turn_commits_user_message_before_llm_work_and_holds_no_connection(sqlite_db, watch, monkeypatch):
+    seen = {}
+
+    async def respond(query, session_id, attachments):
+        seen["checked_out"] = watch.checked_out
+        seen["commits"] = watch.commits
+        async with sqlite_db() as other:
+            seen["visible"] = await other.scalar(select(func.count()).select_from(Message))
+        return "reply"
+
+    monkeypatch.setattr(agent.Runner, "_respond", staticmethod(respond))
+
+    async def turn():
+        async with sqlite_db() as db:
+            return await agent.Runner.run("hello", {"session_id": "s1"}, db=db)
+
+    assert asyncio.run(turn()) == {"final_output": "reply"}
+    assert seen == {"checked_out": 0, "commits": 1, "visible": 1}
+    assert watch.commits == 2
+    assert _messages(sqlite_db, "s1") == [("user", "hello"), ("assistant", "reply")]
+
+
+def test_failed_turn_keeps_the_user_message(sqlite_db, monkeypatch):
+    async def respond(query, session_id, attachments):
+        raise RuntimeError("model down")
+
+    monkeypatch.setattr(agent.Runner, "_respond", staticmethod(respond))
+
+    async def turn():
+        async with sqlite_db() as db:
+            await agent.Runner.run("hello", {"session_id": "s1"}, db=db)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(turn())
+    assert _messages(sqlite_db, "s1") == [("user", "hello")]
+
+
+def test_concurrent_first_turns_share_one_chat(sqlite_db, monkeypatch):
+    async def respond(query, session_id, attachments):
+        await asyncio.sleep(0.01)
+        return f"re: {query}"
+
+    monkeypatch.setattr(agent.Runner, "_respond", staticmethod(respond))
+
+    async def turn(query):
+        async with sqlite_db() as db:
+            return await agent.Runner.run(query, {"session_id": "new"}, db=db)
+
+    async def run():
+        return await asyncio.gather(*(turn(f"q{i}") for i in range(5)))
+
+    assert len(asyncio.run(run())) == 5
+
+    async def count_chats():
+        async with sqlite_db() as db:
+            return await db.scalar(select(func.count()).select_from(Chat))
+
+    assert asyncio.run(count_chats()) == 1
+    assert len(_messages(sqlite_db, "new")) == 10
+
+
+def test_update_section_assembles_outside_a_transaction(client, sqlite_db, watch, monkeypatch):
+    seen = {}
+
+    class StubState:
+        async def apply_section(self, session_id, section, content, replace=False):
+            return {section: content}
+
+    async def assemble(session_data, session_id, **kwargs):
+        seen["checked_out"] = watch.checked_out
+        return "# Resume"
+
+    monkeypatch.setattr(chats, "session_state", StubState())
+    monkeypatch.setattr(chats, "assemble_resume", assemble)
+
+    res = client.post("/chats/update_section", json={"session_id": "s1", "section": "skills", "content": "Python"})
+    assert res.json() == {"result": "# Resume"}
+    assert seen == {"checked_out": 0}
+    assert watch.commits == 2
+
+    async def version():
+        async with sqlite_db() as db:
+            return await db.scalar(select(ResumeVersion.content).where(ResumeVersion.session_id == "s1"))
+
+    assert asyncio.run(version()) == "# Resume"
+
+
+@pytest.mark.parametrize("body", [{}, {"content": None}, {"content": ["Python"]}])
+def test_update_section_rejects_missing_or_non_string_content(client, sqlite_db, watch, body):
+    res = client.post("/chats/update_section", json={"session_id": "s1", "section": "skills", **body})
+    assert res.status_code == 400
+    assert "error" in res.json()
+    assert watch.commits == 0
+
+
+def test_imported_history_round_trips_through_get_chat(client, sqlite_db):
+    history = [
+        {"session_id": "old-1", "messages": [
+            {"role": "user", "content": "  Help me tailor my resume for a platform engineering role  ",
+             "created_at": "2024-03-01T10:00:00"},
+            {"role": "assistant", "content": "Sure, paste your experience.", "created_at": "2024-03-01T10:00:05"},
+        ]},
+        {"session_id": "old-2", "title": "Kept title", "messages": [{"role": "user", "content": "hi"}]},
+        {"session_id": "old-3", "messages": [{"role": "assistant", "content": "Welcome back"}]},
+    ]
+    with db_module.SessionLocal() as session:
+        assert import_chat_history(session, history, batch_size=1) == (3, 4)
+
+    chat = client.get("/chats/old-1").json()
+    assert [(m["role"], m["content"]) for m in chat["messages"]] == [
+        ("user", history[0]["messages"][0]["content"]), ("assistant", "Sure, paste your experience."),
+    ]
+    assert chat["messages"][0]["created_at"].startswith("2024-03-01T10:00:00")
+    titles = {c["id"]: c["title"] for c in client.get("/chats/").json()}
+    assert titles == {"old-1": "Help me tailor my resume for a...", "old-2": "Kept title",
+                      "old-3": DEFAULT_CHAT_TITLE}
+
+
+async def _baseline_turn(db, session_id, query):
+    """The pre-change turn: chat, user message and reply each committed, and the whole history loaded."""
+    chat = await db.scalar(select(Chat).where(Chat.session_id == session_id))
+    if chat is None:
+        chat = Chat(session_id=session_id)
+        db.add(chat)
+        await db.commit()
+    db.add(Message(chat_id=chat.id, role="user", content=query))
+    await db.commit()
+    await db.scalars(select(Message).where(Message.chat_id == chat.id))
+    db.add(Message(chat_id=chat.id, role="assistant", content="reply"))
+    await db.commit()
+
+
+def test_db_time_per_turn_before_and_after(sqlite_db, watch, monkeypatch):
+    """
+    Benchmark on a chat with a long history and an instant model: commits per turn and p95 of the
+    time each turn spends in the database, for the pre-change turn and Runner.run.
+    """
+    turns, history = 40, 2000
+
+    async def respond(query, session_id, attachments):
+        return "reply"
+
+    monkeypatch.setattr(agent.Runner, "_respond", staticmethod(respond))
+    with db_module.SessionLocal() as session:
+        import_chat_history(session, [
+            {"session_id": sid, "messages": [{"role": "user", "content": f"message {i}"} for i in range(history)]}
+            for sid in ("before", "after")
+        ])
+
+    async def measure(turn):
+        durations = []
+        commits = watch.commits
+        for i in range(turns):
+            async with sqlite_db() as db:
+                started = time.perf_counter()
+                await turn(db, f"turn {i}")
+                durations.append(time.perf_counter() - started)
+        return (watch.commits - commits) / turns, sorted(durations)[int(turns * 0.95) - 1]
+
+    before = asyncio.run(measure(lambda db, q: _baseline_turn(db, "before", q)))
+    after = asyncio.run(measure(lambda db, q: agent.Runner.run(q, {"session_id": "after"}, db=db)))
+    print(f"\ncommits/turn: before={before[0]:.0f} after={after[0]:.0f} | "
+          f"p95 DB time/turn: before={before[1] * 1000:.1f}ms after={after[1] * 1000:.1f}ms")
+    assert after[0] <= before[0]
+    assert after[1] < before[1]
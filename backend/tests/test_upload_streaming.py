@@ -0,0 +1,68 @@
+import asyncio
+import hashlib
+import tracemalloc
+
+import pytest
+
+import documents
+
+MB = 1024 * 1024
+
+
+class StreamingUpload:
+    """UploadFile stand-in that produces `size` bytes of PDF-looking content on demand."""
+
+    def __init__(self, size: int, header: bytes = b"%PDF-1.7\n"):
+        self.remaining = size
+        self.header = header
+        self.digest = hashlib.sha256()
+
+    async def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        size = self.remaining if size < 0 else min(size, self.remaining)
+        chunk = (self.header + b"0" * size)[:size]
+        self.header = b""
+        self.remaining -= size
+        self.digest.update(chunk)
+        return chunk
+
+
+def _peak_during(coro) -> int:
+    tracemalloc.start()
+    try:
+        asyncio.run(coro)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_50mb_upload_streams_with_bounded_memory(tmp_path):
+    upload = StreamingUpload(50 * MB)
+    dest = tmp_path / "big.pdf"
+    result = {}
+
+    async def save():
+        result["digest"], result["size"] = await documents.save_upload(upload, dest, max_bytes=64 * MB)
+
+    peak = _peak_during(save())
+    print(f"\npeak traced memory for a 50 MB upload: {peak / MB:.1f} MB")
+    assert result == {"digest": upload.digest.hexdigest(), "size": 50 * MB}
+    assert dest.stat().st_size == 50 * MB
+    assert peak < 4 * documents.UPLOAD_CHUNK_SIZE
+
+
+def test_oversized_upload_is_aborted_without_leftovers(tmp_path):
+    dest = tmp_path / "big.pdf"
+    with pytest.raises(documents.UploadTooLarge):
+        asyncio.run(documents.save_upload(StreamingUpload(3 * MB), dest, max_bytes=2 * MB))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_content_not_matching_extension_is_rejected_before_writing(tmp_path):
+    dest = tmp_path / "fake.pdf"
+    with pytest.raises(documents.UnsupportedFileType):
+        asyncio.run(documents.save_upload(StreamingUpload(MB, header=b"MZ\x90\x00"), dest))
+    with pytest.raises(documents.UnsupportedFileType):
+        asyncio.run(documents.save_upload(StreamingUpload(MB), tmp_path / "script.exe"))
+    assert list(tmp_path.iterdir()) == []
@@ -1,17 +1,18 @@
 from fastapi import APIRouter
 from database.schemas import ExperienceRequest
-from llm import chat_with_llm
+from llm import achat_with_llm
 
 router = APIRouter()
 
+SYSTEM_PROMPT = "You are a professional resume writer. Improve work experience details for impact."
+
 
 async def experience_tool(query: str, session_id: str) -> dict:
-    system_prompt = "You are a professional resume writer. Improve work experience details for impact."
     messages = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": query}
     ]
-    result_text = chat_with_llm(messages)
+    result_text = await achat_with_llm(messages)
     return {"result": result_text}
 
 
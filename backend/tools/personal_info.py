@@ -1,20 +1,21 @@
 from fastapi import APIRouter
 from database.schemas import PersonalInfoRequest
-from llm import chat_with_llm
+from llm import achat_with_llm
 
 router = APIRouter()
 
+SYSTEM_PROMPT = "You are a resume parser. Extract personal info in JSON format."
+
 
 async def personal_info_tool(query: str, session_id: str) -> dict:
     """
     Extract personal info (name, email, phone) from text.
     """
-    system_prompt = "You are a resume parser. Extract personal info in JSON format."
     messages = [
-        {"role": "system", "content": system_prompt},
+        {"role": "system", "content": SYSTEM_PROMPT},
         {"role": "user", "content": query}
     ]
-    result_text = chat_with_llm(messages)  # async
+    result_text = await achat_with_llm(messages)
     return {"result": result_text}
 
 
@@ -0,0 +1,33 @@
+from typing import Awaitable, Callable, Dict
+
+from tools import achievements, education, experience, personal_info, projects, skills, summary
+from tools.achievements import achievements_tool
+from tools.education import education_tool
+from tools.experience import experience_tool
+from tools.personal_info import personal_info_tool
+from tools.projects import projects_tool
+from tools.skills import skills_tool
+from tools.summary import summary_tool
+
+ToolFunc = Callable[[str, str], Awaitable[dict]]
+
+TOOL_REGISTRY: Dict[str, ToolFunc] = {
+    "personal_info": personal_info_tool,
+    "summary": summary_tool,
+    "experience": experience_tool,
+    "education": education_tool,
+    "skills": skills_tool,
+    "projects": projects_tool,
+    "achievements": achievements_tool,
+}
+
+# Each tool's system prompt; render cache keys hash it, so editing one re-renders only that section.
+TOOL_PROMPTS: Dict[str, str] = {
+    "personal_info": personal_info.SYSTEM_PROMPT,
+    "summary": summary.SYSTEM_PROMPT,
+    "experience": experience.SYSTEM_PROMPT,
+    "education": education.SYSTEM_PROMPT,
+    "skills": skills.SYSTEM_PROMPT,
+    "projects": projects.SYSTEM_PROMPT,
+    "achievements": achievements.SYSTEM_PROMPT,
+}
@@ -22,7 +22,9 @@ interface Message {
 interface ChatSession {
   id: string
   chat_id: number
-  messages: Message[]
+  title?: string
+  last_message?: string | null
+  messages?: Message[]
 }
 
 const API_BASE = "http://localhost:8000"
@@ -34,7 +36,12 @@ const Chat = () => {
   const [isTyping, setIsTyping] = useState(false)
   const [chatHistory, setChatHistory] = useState<ChatSession[]>([])
   const [activeChatId, setActiveChatId] = useState<string | null>(null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingOlder, setLoadingOlder] = useState(false)
+  const [olderMessagesCursor, setOlderMessagesCursor] = useState<number | null>(null)
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false)
   const chatListRef = useRef<HTMLDivElement | null>(null)
+  const keepScrollRef = useRef(false)
   const { toast } = useToast()
   const navigate = useNavigate()
 
@@ -48,17 +55,40 @@ const Chat = () => {
       const res = await fetch(`${API_BASE}/chats/`)
       const data = await res.json()
       setChatHistory(data)
+      setNextCursor(res.headers.get("X-Next-Cursor"))
       if (data.length > 0 && !activeChatId) {
         const last = data[data.length - 1]
         setActiveChatId(last.id)
-        setMessages(last.messages ?? [])
+        refreshChat(last.id)
       }
     } catch {
       toast({ title: "Error", description: "Failed to load chats", variant: "destructive" })
     }
   }
 
+  // --- Load the next (older) page of chats ---
+  const loadOlderChats = async () => {
+    if (!nextCursor || loadingOlder) return
+    setLoadingOlder(true)
+    try {
+      const res = await fetch(`${API_BASE}/chats/?cursor=${encodeURIComponent(nextCursor)}`)
+      const data: ChatSession[] = await res.json()
+      // Pages come back oldest-to-newest, so older chats go above the ones already listed.
+      keepScrollRef.current = true
+      setChatHistory((prev) => [...data, ...prev])
+      setNextCursor(res.headers.get("X-Next-Cursor"))
+    } catch {
+      toast({ title: "Error", description: "Failed to load older chats", variant: "destructive" })
+    } finally {
+      setLoadingOlder(false)
+    }
+  }
+
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false
+      return
+    }
     if (chatListRef.current) {
       chatListRef.current.scrollTop = chatListRef.current.scrollHeight
     }
@@ -73,6 +103,7 @@ const Chat = () => {
     setChatHistory((prev) => [...prev, newChat])
     setActiveChatId(newChat.id)
     setMessages([])
+    setOlderMessagesCursor(null)
     return newChat.id
   }
 
@@ -123,6 +154,7 @@ const Chat = () => {
       const res = await fetch(`${API_BASE}/chats/${chatId}`)
       const chat = await res.json()
       setMessages(chat.messages ?? [])
+      setOlderMessagesCursor(chat.next_before_id ?? null)
       setChatHistory((prev) =>
         prev.map((c) => (c.id === chatId ? chat : c))
       )
@@ -131,11 +163,27 @@ const Chat = () => {
     }
   }
 
+  // --- Load the next (older) page of messages in the active chat ---
+  const loadOlderMessages = async () => {
+    if (!activeChatId || olderMessagesCursor === null || loadingOlderMessages) return
+    setLoadingOlderMessages(true)
+    try {
+      const res = await fetch(`${API_BASE}/chats/${activeChatId}?before_id=${olderMessagesCursor}`)
+      const chat = await res.json()
+      setMessages((prev) => [...(chat.messages ?? []), ...prev])
+      setOlderMessagesCursor(chat.next_before_id ?? null)
+    } catch {
+      toast({ title: "Error", description: "Failed to load older messages", variant: "destructive" })
+    } finally {
+      setLoadingOlderMessages(false)
+    }
+  }
+
   // --- Handle file upload ---
   const handleFileUpload = () => {
     const input = document.createElement("input")
     input.type = "file"
-    input.accept = ".pdf,.doc,.docx"
+    input.accept = ".pdf,.docx"
     input.onchange = async (e) => {
       const file = (e.target as HTMLInputElement).files?.[0]
       if (!file) return
@@ -192,7 +240,7 @@ const Chat = () => {
   // --- New chat ---
   const handleNewChat = async () => {
     const activeChat = chatHistory.find((c) => c.id === activeChatId)
-    if (activeChat && activeChat.messages.length === 0) {
+    if (activeChat && !activeChat.last_message && !activeChat.messages?.length) {
       toast({ title: "Info", description: "Current chat is empty.", variant: "default" })
       return
     }
@@ -202,6 +250,7 @@ const Chat = () => {
     setChatHistory((prev) => [...prev, newChat])
     setActiveChatId(newChat.id)
     setMessages([])
+    setOlderMessagesCursor(null)
   }
 
   // --- Switch chat ---
@@ -223,6 +272,7 @@ const Chat = () => {
       } else {
         setActiveChatId(null)
         setMessages([])
+        setOlderMessagesCursor(null)
       }
     }
   }
@@ -267,6 +317,17 @@ const Chat = () => {
           </div>
           <div ref={chatListRef} className="flex-1 overflow-y-auto px-2 py-3">
             <div className="space-y-2">
+              {nextCursor && (
+                <Button
+                  variant="ghost"
+                  size="sm"
+                  className="w-full text-muted-foreground"
+                  onClick={loadOlderChats}
+                  disabled={loadingOlder}
+                >
+                  {loadingOlder ? "Loading..." : "Load older chats"}
+                </Button>
+              )}
               {chatHistory.map((chat) => (
                 <div key={chat.id} className="flex items-center justify-between space-x-2">
                   <Button
@@ -303,6 +364,17 @@ const Chat = () => {
         <div className="flex-1 flex flex-col min-w-0">
           <ScrollArea className="flex-1 px-6 py-4">
             <div className="space-y-4">
+              {olderMessagesCursor !== null && (
+                <Button
+                  variant="ghost"
+                  size="sm"
+                  className="w-full text-muted-foreground"
+                  onClick={loadOlderMessages}
+                  disabled={loadingOlderMessages}
+                >
+                  {loadingOlderMessages ? "Loading..." : "Load earlier messages"}
+                </Button>
+              )}
               {messages.map((message) => (
                 <div
                   key={message.id}